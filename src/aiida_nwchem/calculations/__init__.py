@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 """Calculation classes for NWCHEM."""
+from .driver import *
 from .nwchem import *
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Calculation class to evaluate many geometries with a single, persistent NWChem process."""
+import json
+import pathlib
+
+from aiida import orm
+from aiida.common.datastructures import CodeInfo, CodeRunMode
+
+from .nwchem import NwchemCalculation
+
+__all__ = ('NwchemDriverCalculation',)
+
+
+class NwchemDriverCalculation(NwchemCalculation):
+    """
+    Calculation class to compute energies and forces for a sequence of geometries.
+
+    Instead of starting a new NWChem process for every geometry, a single NWChem process is started that connects
+    as a client to a small i-PI server, which runs next to it in the same job. The server sends the geometries of the
+    ``trajectory`` one by one and writes the energy and forces of each step to a single file, which is split per step
+    by the parser. This avoids paying the startup cost of NWChem for each geometry.
+
+    The ``task`` in the ``parameters`` should be the theory only, e.g. ``dft`` or ``scf``.
+    """
+
+    _DEFAULT_DRIVER_SCRIPT = 'aiida_driver.py'
+    _DEFAULT_GEOMETRIES_FILE = 'aiida.geometries.json'
+    _DEFAULT_STEPS_FILE = 'aiida.steps'
+
+    @classmethod
+    def define(cls, spec):
+        """Define the process specification."""
+        super().define(spec)
+        spec.input(
+            'trajectory',
+            valid_type=orm.TrajectoryData,
+            required=True,
+            help='The geometries for which to compute the energy and forces. The sites should be in the same order '
+            'as those of `structure`, which defines the kinds and the geometry used to initialize NWChem.'
+        )
+        spec.input(
+            'driver_code',
+            valid_type=orm.AbstractCode,
+            required=True,
+            help='A code for a Python 3 interpreter on the same computer, which is used to run the i-PI server.'
+        )
+        spec.inputs['metadata']['options']['parser_name'].default = 'nwchem.driver'
+
+        spec.exit_code(
+            320,
+            'ERROR_DRIVER_STEPS_INCOMPLETE',
+            message='The driver did not complete all steps of the trajectory.',
+            invalidates_cache=True
+        )
+
+    @staticmethod
+    def validate_inputs(value, ctx):
+        """Validate the inputs."""
+        result = NwchemCalculation.validate_inputs(value, ctx)
+        if result:
+            return result
+
+        if value['trajectory'].numsites != len(value['structure'].sites):
+            return 'the `trajectory` and `structure` do not have the same number of sites.'
+
+        task = value['parameters'].get('task', None)
+        if not isinstance(task, str) or len(task.split()) != 1:
+            return 'the `task` in the `parameters` should only specify the theory, e.g. `dft`.'
+
+    def _get_socket_name(self):
+        """Return the name of the unix socket, which is unique for this calculation."""
+        return f'aiida_{self.node.uuid.split("-")[0]}'
+
+    def _get_parameters(self):
+        """Add the socket directives to the parameters and run the theory as a client of the driver."""
+        parameters = super()._get_parameters()
+        driver = parameters.pop('driver', {})
+        driver['socket'] = f'unix {self._get_socket_name()}'
+        driver['maxiter'] = self.inputs.trajectory.numsteps + 1
+        parameters['driver'] = driver
+        parameters['task'] = f'{parameters["task"]} optimize'
+        return parameters
+
+    def _get_geometries(self):
+        """Return the geometries of the ``trajectory`` as a list of dictionaries with ``cell`` and ``positions``."""
+        trajectory = self.inputs.trajectory
+        positions = trajectory.get_positions()
+        cells = trajectory.get_cells()
+
+        geometries = []
+        for step in range(trajectory.numsteps):
+            if not self.inputs.add_cell:
+                cell = [[0.] * 3 for _ in range(3)]
+            elif cells is not None:
+                cell = cells[step].tolist()
+            else:
+                cell = self.inputs.structure.cell
+            geometries.append({'cell': cell, 'positions': positions[step].tolist()})
+
+        return geometries
+
+    def prepare_for_submission(self, folder):
+        """Prepare the calculation job for submission by transforming input nodes into input files.
+
+        In addition to the NWChem input file, the geometries and the driver script are written to the sandbox folder
+        and the driver is added as a second code that runs in parallel to NWChem.
+
+        :param folder: a sandbox folder to temporarily write files on disk.
+        :return: `aiida.common.datastructures.CalcInfo` instance.
+        """
+        calcinfo = super().prepare_for_submission(folder)
+
+        with folder.open(self._DEFAULT_GEOMETRIES_FILE, 'w', encoding='utf-8') as handle:
+            json.dump(self._get_geometries(), handle)
+
+        script = pathlib.Path(__file__).parent / 'ipi_driver.py'
+        folder.insert_path(str(script), self._DEFAULT_DRIVER_SCRIPT)
+
+        driver_codeinfo = CodeInfo()
+        driver_codeinfo.cmdline_params = [
+            self._DEFAULT_DRIVER_SCRIPT,
+            self._DEFAULT_GEOMETRIES_FILE,
+            self._get_socket_name(),
+            self._DEFAULT_STEPS_FILE,
+        ]
+        driver_codeinfo.code_uuid = self.inputs.driver_code.uuid
+        driver_codeinfo.withmpi = False
+
+        # The driver is started first, such that the socket is available by the time NWChem connects to it
+        calcinfo.codes_info.insert(0, driver_codeinfo)
+        calcinfo.codes_run_mode = CodeRunMode.PARALLEL
+        calcinfo.retrieve_list.append(self._DEFAULT_STEPS_FILE)
+
+        return calcinfo
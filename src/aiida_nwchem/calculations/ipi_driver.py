@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Minimal i-PI server that drives a single, persistent NWChem process through a list of geometries.
+
+This script is copied to the working directory of an ``NwchemDriverCalculation`` and run next to NWChem, which acts
+as the i-PI client through its ``driver`` socket interface. It only depends on the Python standard library, such that
+it can run with any Python 3 interpreter on the remote computer.
+
+Usage::
+
+    python ipi_driver.py GEOMETRIES_FILE SOCKET_NAME STEPS_FILE
+
+The geometries file contains a JSON list of dictionaries with the ``cell`` and ``positions`` in Angstrom. For each
+geometry, a JSON line with the step index and the energy (Hartree) and forces (Hartree/bohr) computed by NWChem is
+appended to the steps file.
+"""
+import json
+import os
+import socket
+import struct
+import sys
+
+HEADER_LENGTH = 12
+ANGSTROM_TO_BOHR = 1.8897261245650618
+
+# Time in seconds to wait for NWChem to connect, after which it is assumed to have failed before reaching the driver
+ACCEPT_TIMEOUT = 600
+
+
+def send_header(connection, message):
+    """Send a message header, padded to the fixed header length."""
+    connection.sendall(message.ljust(HEADER_LENGTH).encode('ascii'))
+
+
+def receive_exactly(connection, size):
+    """Receive exactly ``size`` bytes from the connection."""
+    data = b''
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('the NWChem client closed the connection.')
+        data += chunk
+    return data
+
+
+def receive_header(connection):
+    """Receive a message header."""
+    return receive_exactly(connection, HEADER_LENGTH).decode('ascii').strip()
+
+
+def receive_values(connection, fmt, count=1):
+    """Receive ``count`` values of the given ``struct`` format."""
+    size = struct.calcsize(fmt)
+    return struct.unpack(f'{count}{fmt}', receive_exactly(connection, size * count))
+
+
+def invert_matrix(matrix):
+    """Return the inverse of a 3x3 matrix as nested lists, or zeros if it is singular, e.g. for molecules."""
+    # The signed cofactor of an element of a 3x3 matrix is the minor of the cyclically following rows and columns
+    cofactors = [[
+        matrix[(row + 1) % 3][(column + 1) % 3] * matrix[(row + 2) % 3][(column + 2) % 3] -
+        matrix[(row + 1) % 3][(column + 2) % 3] * matrix[(row + 2) % 3][(column + 1) % 3] for column in range(3)
+    ] for row in range(3)]
+    determinant = sum(matrix[0][column] * cofactors[0][column] for column in range(3))
+    if abs(determinant) < 1e-12:
+        return [[0.] * 3 for _ in range(3)]
+    # The inverse is the transpose of the matrix of cofactors divided by the determinant
+    return [[cofactors[column][row] / determinant for column in range(3)] for row in range(3)]
+
+
+def wait_for_status(connection, expected):
+    """Poll the status of the client until it reports the ``expected`` status, initializing it if necessary."""
+    while True:
+        send_header(connection, 'STATUS')
+        status = receive_header(connection)
+        if status == expected:
+            return
+        if status == 'NEEDINIT':
+            send_header(connection, 'INIT')
+            connection.sendall(struct.pack('ii', 0, 1) + b'\0')
+            continue
+        raise RuntimeError(f'unexpected status `{status}` from the NWChem client, expected `{expected}`.')
+
+
+def compute(connection, geometry):
+    """Send a geometry to the client and return the energy and forces it computed, in atomic units."""
+    cell = [[value * ANGSTROM_TO_BOHR for value in row] for row in geometry['cell']]
+    positions = [value * ANGSTROM_TO_BOHR for position in geometry['positions'] for value in position]
+    natoms = len(geometry['positions'])
+
+    wait_for_status(connection, 'READY')
+    send_header(connection, 'POSDATA')
+    # The cell matrix with the lattice vectors as columns is sent transposed, i.e. with the lattice vectors one after
+    # the other, followed by the transpose of its inverse, which is the inverse of the matrix with the lattice vectors
+    # as rows
+    connection.sendall(struct.pack('9d', *[cell[i][j] for i in range(3) for j in range(3)]))
+    connection.sendall(struct.pack('9d', *[value for row in invert_matrix(cell) for value in row]))
+    connection.sendall(struct.pack('i', natoms))
+    connection.sendall(struct.pack(f'{3 * natoms}d', *positions))
+
+    wait_for_status(connection, 'HAVEDATA')
+    send_header(connection, 'GETFORCE')
+    message = receive_header(connection)
+    if message != 'FORCEREADY':
+        raise RuntimeError(f'unexpected message `{message}` from the NWChem client, expected `FORCEREADY`.')
+
+    (energy,) = receive_values(connection, 'd')
+    (natoms_received,) = receive_values(connection, 'i')
+    forces = receive_values(connection, 'd', 3 * natoms_received)
+    receive_values(connection, 'd', 9)  # virial
+    (extra_size,) = receive_values(connection, 'i')
+    receive_exactly(connection, extra_size)
+
+    return energy, [list(forces[index:index + 3]) for index in range(0, len(forces), 3)]
+
+
+def main(geometries_file, socket_name, steps_file, timeout=ACCEPT_TIMEOUT):
+    """Serve all geometries to the NWChem client, writing the results of each step to the steps file.
+
+    Exits with an error if the client does not connect within ``timeout`` seconds, e.g. because NWChem failed on its
+    input, such that the job does not wait for it until its walltime.
+    """
+    with open(geometries_file, encoding='utf-8') as handle:
+        geometries = json.load(handle)
+
+    # Same convention for the socket path as i-PI and NWChem
+    socket_path = f'/tmp/ipi_{socket_name}'
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+    server.settimeout(timeout)
+
+    try:
+        try:
+            connection, _ = server.accept()
+        except socket.timeout:
+            sys.exit(f'the NWChem client did not connect within {timeout} seconds.')
+        # The computation of a single geometry can take arbitrarily long
+        connection.settimeout(None)
+        with connection, open(steps_file, 'w', encoding='utf-8') as handle:
+            for step, geometry in enumerate(geometries):
+                energy, forces = compute(connection, geometry)
+                handle.write(json.dumps({'step': step, 'energy': energy, 'forces': forces}) + '\n')
+                handle.flush()
+            send_header(connection, 'EXIT')
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], sys.argv[2], sys.argv[3])
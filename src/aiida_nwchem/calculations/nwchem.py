@@ -1,12 +1,28 @@
 # -*- coding: utf-8 -*-
 """Calculation classes for aiida-nwchem."""
-import re
+import json
+import shlex
 
 from aiida import orm
 from aiida.common.datastructures import CalcInfo, CodeInfo
 from aiida.engine import CalcJob
 import numpy as np
 
+from aiida_nwchem.utils.basis import get_basis_block, get_basis_library, parse_library_name, validate_basis
+from aiida_nwchem.utils.files import FILE_PARSERS
+from aiida_nwchem.utils.restart import get_hardlink_commands, get_restart_files, validate_restart_policy
+from aiida_nwchem.utils.template import (
+    GEOMETRY_TEMPLATE,
+    HEADER_TEMPLATE,
+    SYSTEM_TEMPLATE,
+    get_dplot_block,
+    get_parameter_block,
+    get_unknown_directives,
+    render_directives,
+    validate_directives,
+    validate_dplot,
+)
+
 __all__ = ('NwchemBaseCalculation', 'NwchemCalculation')
 
 
@@ -15,6 +31,52 @@ def validate_parameters(value, ctx=None):  # pylint: disable=unused-argument
     value.get_dict()
 
 
+def validate_retrieve_temporary_files(value, ctx=None):  # pylint: disable=unused-argument
+    """Validate the files that are retrieved temporarily."""
+    if any(not isinstance(pattern, str) for pattern in value):
+        return 'the `retrieve_temporary_files` should be a list of file names or glob patterns.'
+
+
+def validate_file_parser_settings(value, ctx=None):  # pylint: disable=unused-argument
+    """Validate the settings of the parsers of the files that are retrieved temporarily."""
+    unknown = set(value) - set(FILE_PARSERS)
+    if unknown:
+        return f'unknown parsers in the `file_parser_settings`: {", ".join(sorted(unknown))}.'
+    if any(not isinstance(settings, dict) for settings in value.values()):
+        return 'the `file_parser_settings` should be dictionaries of keyword arguments.'
+
+
+def validate_dplot_input(value, ctx=None):  # pylint: disable=unused-argument
+    """Validate the `dplot` input."""
+    return validate_dplot(value.get_dict())
+
+
+def validate_symmetry_tolerance(value, ctx=None):  # pylint: disable=unused-argument
+    """Validate the `symmetry_tolerance` input."""
+    if value.value <= 0:
+        return 'the `symmetry_tolerance` should be positive.'
+
+
+def validate_kpoints(inputs):
+    """Validate the `kpoints` input against the other inputs."""
+    if not inputs['add_cell']:
+        return 'the `kpoints` can only be used for periodic calculations, with `add_cell` set to `True`.'
+    try:
+        _, offset = inputs['kpoints'].get_kpoints_mesh()
+    except AttributeError:
+        return 'the `kpoints` should be defined as a mesh.'
+    if any(offset):
+        return 'the `kpoints` mesh cannot have an offset, since the `monkhorst-pack` directive has none.'
+    if 'monkhorst-pack' in inputs['parameters'].get('nwpw', {}):
+        return 'the `monkhorst-pack` directive of `nwpw` cannot be combined with the `kpoints` input.'
+
+
+def validate_restart_transfer(value, ctx=None):  # pylint: disable=unused-argument
+    """Validate the restart-transfer policy."""
+    if value:
+        return validate_restart_policy(value)
+
+
 class NwchemBaseCalculation(CalcJob):
     """
     Base calculation class for NWChem.
@@ -25,6 +87,8 @@ class NwchemBaseCalculation(CalcJob):
     _DEFAULT_ABBREVIATION = 'aiida'  # files will be named aiida.db, ...
     _DEFAULT_OUTPUT_FILE = 'aiida.out'
     _DEFAULT_ERROR_FILE = 'aiida.err'
+    _DEFAULT_RESTART_MANIFEST_FILE = 'aiida.restart.json'
+    _DEFAULT_RESTART_CHECKSUMS_FILE = 'aiida.restart.sha256'
 
     @classmethod
     def define(cls, spec):
@@ -48,11 +112,76 @@ class NwchemBaseCalculation(CalcJob):
             default=2000.,
             help='Total memory available per MPI process in MB'
         )
+        spec.input(
+            'metadata.options.parse_in_subprocess',
+            valid_type=bool,
+            default=False,
+            help='If `True`, the output is scanned in a separate process, such that parsing large outputs does not '
+            'block the daemon worker.'
+        )
+        spec.input(
+            'metadata.options.restart_transfer',
+            valid_type=dict,
+            default={},
+            validator=validate_restart_transfer,
+            help='Policy that controls which files of the `restart_folder` are transferred and how, with the optional '
+            'keys `include`, `exclude`, `max_size`, `link` and `checksums`. See `aiida_nwchem.utils.restart`.'
+        )
+        spec.input(
+            'metadata.options.archive_output',
+            valid_type=bool,
+            default=False,
+            help='If `True`, the output file is only retrieved temporarily and stored as the compressed '
+            '`output_archive`, with an index to read single tasks, instead of in full in the `retrieved` folder.'
+        )
+        spec.input(
+            'metadata.options.retrieve_temporary_files',
+            valid_type=list,
+            default=[],
+            validator=validate_retrieve_temporary_files,
+            help='Names or glob patterns of files that are retrieved temporarily, such as `aiida.hess`. Files with a '
+            'parser in `aiida_nwchem.utils.files.FILE_PARSERS` are parsed into the `output_files` and then discarded.'
+        )
+        spec.input(
+            'metadata.options.file_parser_settings',
+            valid_type=dict,
+            default={},
+            validator=validate_file_parser_settings,
+            help='Keyword arguments of the parsers of the files that are retrieved temporarily, by name of the parser, '
+            'e.g. `{"cube": {"stride": 2}}` to keep every second point of the grids of cube files.'
+        )
 
         spec.output('output_parameters', valid_type=orm.Dict)
         spec.output(
             'output_structure', valid_type=orm.StructureData, required=False, help='The relaxed output structure.'
         )
+        spec.output(
+            'output_trajectory',
+            valid_type=orm.TrajectoryData,
+            required=False,
+            help='The geometries of the steps of a geometry optimization or driver calculation, with the `energies` '
+            'of each step.'
+        )
+        spec.output(
+            'output_arrays',
+            valid_type=orm.ArrayData,
+            required=False,
+            help='Array quantities of the final task, such as forces and derivative dipoles.'
+        )
+        spec.output(
+            'output_archive',
+            valid_type=orm.FolderData,
+            required=False,
+            help='The compressed output file and the index of its tasks, if the `archive_output` option is set. See '
+            '`aiida_nwchem.utils.archive.read_output_archive`.'
+        )
+        spec.output_namespace(
+            'output_files',
+            valid_type=orm.ArrayData,
+            dynamic=True,
+            required=False,
+            help='The arrays extracted from the files that were retrieved temporarily, by name of the file.'
+        )
 
         spec.default_output_node = 'output_parameters'
 
@@ -92,6 +221,31 @@ class NwchemBaseCalculation(CalcJob):
             'scheduler before the files were safely written to disk for a potential restart.',
             invalidates_cache=True
         )
+        spec.exit_code(
+            341,
+            'ERROR_GEOMETRY_OPTIMIZATION_INCOMPLETE',
+            message='The geometry optimization stopped before it finished, probably because it ran out of walltime. '
+            'The last complete step was parsed and can be used for a restart.',
+            invalidates_cache=True
+        )
+        spec.exit_code(
+            342,
+            'ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED',
+            message='The geometry optimization did not converge within the maximum number of steps. The last step '
+            'was parsed and can be used for a restart.'
+        )
+        spec.exit_code(
+            343,
+            'ERROR_GEOMETRY_OPTIMIZATION_OSCILLATING',
+            message='The geometry optimization was oscillating between geometries. The last step was parsed and can be '
+            'used for a restart.'
+        )
+        spec.exit_code(
+            344,
+            'ERROR_GEOMETRY_OPTIMIZATION_STAGNATING',
+            message='The energy and gradient of the geometry optimization were no longer decreasing. The last step was '
+            'parsed and can be used for a restart.'
+        )
         spec.exit_code(
             350,
             'ERROR_UNEXPECTED_PARSER_EXCEPTION',
@@ -99,6 +253,19 @@ class NwchemBaseCalculation(CalcJob):
             invalidates_cache=True
         )
 
+        # Errors reported by NWChem
+        spec.exit_code(400, 'ERROR_NWCHEM', message='NWChem reported an error: {error}')
+        spec.exit_code(410, 'ERROR_GA_MEMORY', message='NWChem ran out of memory.')
+        spec.exit_code(420, 'ERROR_SCF_NOT_CONVERGED', message='The SCF cycle did not converge.')
+        spec.exit_code(430, 'ERROR_BASIS_NOT_FOUND', message='NWChem could not find or load a basis set.')
+        spec.exit_code(440, 'ERROR_GEOMETRY', message='NWChem reported an error in the geometry.')
+        spec.exit_code(
+            450,
+            'ERROR_DISK_FULL',
+            message='NWChem could not write to disk, which may be full.',
+            invalidates_cache=True
+        )
+
     def prepare_for_submission(self, folder):
         """Prepare the calculation job for submission by transforming input nodes into input files.
         In addition to the input files being written to the sandbox folder, a `CalcInfo` instance will be returned that
@@ -126,37 +293,77 @@ class NwchemBaseCalculation(CalcJob):
         calcinfo.local_copy_list = []
         calcinfo.remote_copy_list = []
         calcinfo.retrieve_list = [self._DEFAULT_OUTPUT_FILE, self._DEFAULT_ERROR_FILE]
+        calcinfo.retrieve_temporary_list = []
         calcinfo.retrieve_singlefile_list = []
 
-        # Symlinks.
+        # The output file is then stored by the parser as a compressed archive
+        if self.inputs.metadata.options.archive_output:
+            calcinfo.retrieve_list.remove(self._DEFAULT_OUTPUT_FILE)
+            calcinfo.retrieve_temporary_list.append(self._DEFAULT_OUTPUT_FILE)
+
+        calcinfo.retrieve_temporary_list.extend(self.inputs.metadata.options.retrieve_temporary_files)
+
         calcinfo.remote_symlink_list = []
-        calcinfo.remote_copy_list = []
         if 'restart_folder' in self.inputs:
-            comp_uuid = self.inputs.restart_folder.computer.uuid
-            remote_path = self.inputs.restart_folder.get_remote_path()
-            # Note: this opens a transport but we need to know which files are there
-            files = self.inputs.restart_folder.listdir()
-
-            for extension in ('db', 'movecs', 't1amp', 't2amp'):
-                # catch files like aiida.db, aiida.t1amp.0001
-                rgxp = re.compile(r'.+\.' + extension + r'\.?\d*')
-                files_to_link = filter(rgxp.match, files)
-
-                copy_infos = []
-                for file_to_link in files_to_link:
-                    copy_infos.append((comp_uuid, remote_path + f'/{file_to_link}', file_to_link))
-
-                # If running on the same computer - make a symlink.
-                # Except for .db files: Those are typically small, and written/added to
-                # by follow-up calculations. Symlinks can therefore lead to confusing results.
-                if self.inputs.code.computer.uuid == comp_uuid and extension != 'db':
-                    calcinfo.remote_symlink_list += copy_infos
-                # If not - copy the folder.
-                else:
-                    calcinfo.remote_copy_list += copy_infos
+            self._add_restart_files(folder, calcinfo)
 
         return calcinfo
 
+    def _add_restart_files(self, folder, calcinfo):
+        """Add the files of the ``restart_folder`` to be transferred according to the restart-transfer policy.
+
+        A manifest of the files of the restart folder and the action taken for each of them is written to the sandbox
+        folder, such that the transfer cost is recorded in the repository of the calculation.
+
+        :param folder: a sandbox folder to temporarily write files on disk.
+        :param calcinfo: the `aiida.common.datastructures.CalcInfo` to add the copy and symlink instructions to.
+        """
+        policy = self.inputs.metadata.options.restart_transfer
+        restart_folder = self.inputs.restart_folder
+        comp_uuid = restart_folder.computer.uuid
+        remote_path = restart_folder.get_remote_path()
+        same_computer = self.inputs.code.computer.uuid == comp_uuid
+
+        # Note: this opens a transport but we need to know which files are there and how large they are
+        entries = [(entry['name'], entry['attributes'].get('st_size', None))
+                   for entry in restart_folder.listdir_withattributes()
+                   if not entry['isdir']]
+        restart_files = get_restart_files(entries, policy, same_computer)
+
+        for restart_file in restart_files:
+            copy_info = (comp_uuid, f'{remote_path}/{restart_file.name}', restart_file.name)
+            if restart_file.action == 'copy':
+                calcinfo.remote_copy_list.append(copy_info)
+            elif restart_file.action == 'symlink':
+                calcinfo.remote_symlink_list.append(copy_info)
+
+        commands = get_hardlink_commands(restart_files, remote_path)
+        transferred = [restart_file.name for restart_file in restart_files if restart_file.action != 'skip']
+        if policy.get('checksums', False) and transferred:
+            names = ' '.join(shlex.quote(name) for name in transferred)
+            commands.append(f'sha256sum {names} > {self._DEFAULT_RESTART_CHECKSUMS_FILE}')
+            calcinfo.retrieve_list.append(self._DEFAULT_RESTART_CHECKSUMS_FILE)
+        if commands:
+            calcinfo.prepend_text = '\n'.join(commands)
+
+        manifest = {
+            'computer': comp_uuid,
+            'path': remote_path,
+            'files': [restart_file.as_dict() for restart_file in restart_files],
+            'copied_bytes': sum(entry.size or 0 for entry in restart_files if entry.action == 'copy'),
+            'linked_bytes': sum(entry.size or 0 for entry in restart_files if entry.action in ('symlink', 'hardlink')),
+            'skipped_bytes': sum(entry.size or 0 for entry in restart_files if entry.action == 'skip'),
+        }
+        with folder.open(self._DEFAULT_RESTART_MANIFEST_FILE, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2)
+
+        for restart_file in restart_files:
+            if restart_file.action == 'skip':
+                self.logger.warning(
+                    f'not transferring restart file `{restart_file.name}` of {restart_file.size} bytes, which '
+                    'exceeds the `max_size` of the restart-transfer policy.'
+                )
+
     def _get_input_file(self) -> str:
         """Prepare NWChem input file from CalcJob inputs.
 
@@ -194,6 +401,41 @@ class NwchemCalculation(NwchemBaseCalculation):
             default=lambda: orm.Bool(False),
             help='The input structure, with or without a cell'
         )
+        spec.input(
+            'kpoints',
+            valid_type=orm.KpointsData,
+            required=False,
+            help='A Monkhorst-Pack mesh of k-points for periodic NWPW calculations, which is written as the '
+            '`monkhorst-pack` directive of the `nwpw` block. Requires `add_cell` and a mesh without offset.'
+        )
+        spec.input(
+            'symmetry_tolerance',
+            valid_type=orm.Float,
+            required=False,
+            validator=validate_symmetry_tolerance,
+            help='If specified, NWChem detects the point group of a molecule within this tolerance in Angstrom, '
+            'symmetrizes the coordinates and uses the symmetry to reduce the cost of the calculation. The detected '
+            'point group is added to the `output_parameters`. NWChem may also translate and rotate the molecule to '
+            'the frame of its symmetry, in which case the forces and the output structure are in that frame rather '
+            'than in the frame of the input structure. For crystals, the space group is only detected and '
+            'recorded, since NWChem cannot detect it itself.'
+        )
+        spec.input(
+            'dplot',
+            valid_type=orm.Dict,
+            required=False,
+            validator=validate_dplot_input,
+            help='Cube files of volumetric data, such as the electron density or orbitals, to write with `dplot` tasks '
+            'after all other tasks, by name of the file. The files are retrieved temporarily and parsed into the '
+            '`output_files`, see `aiida_nwchem.utils.template` for the directives.'
+        )
+        spec.input(
+            'metadata.options.inline_basis',
+            valid_type=bool,
+            default=False,
+            help='If `True`, basis sets and ECPs of the NWChem library are written explicitly in the input file, using '
+            'the local copy of the library defined by the `NWCHEM_BASIS_LIBRARY` environment variable.'
+        )
         spec.inputs.validator = cls.validate_inputs
 
     @staticmethod
@@ -202,99 +444,161 @@ class NwchemCalculation(NwchemBaseCalculation):
         if value['add_cell'] and not all(value['structure'].pbc):
             return 'if `add_cell` is `True` then the `structure` needs to have set `pbc` to `(True, True, True)`.'
 
+        if value['metadata']['options']['inline_basis'] and get_basis_library() is None:
+            return 'the `inline_basis` option requires the `NWCHEM_BASIS_LIBRARY` environment variable to be set.'
+
+        if 'kpoints' in value:
+            result = validate_kpoints(value)
+            if result:
+                return result
+
+        parameters = value['parameters'].get_dict()
+        for key in ('basis', 'ecp'):
+            if isinstance(parameters.get(key, None), dict):
+                result = validate_basis(parameters[key], value['structure'], kind=key)
+                if result:
+                    return result
+
+        return validate_directives(parameters)
+
+    def _get_parameters(self):
+        """Return the parameter dictionary from which the NWChem input file is synthesized.
+
+        Child classes can overwrite this method to add or modify parameters.
+        """
+        parameters = self.inputs.parameters.get_dict()
+
+        if 'kpoints' in self.inputs:
+            mesh, _ = self.inputs.kpoints.get_kpoints_mesh()
+            nwpw = parameters.setdefault('nwpw', {})
+            nwpw['monkhorst-pack'] = ' '.join(str(number) for number in mesh)
+
+        return parameters
+
+    def _get_basis_entry(self, key, atom_type, basis_name):
+        """Return the lines of the ``basis`` or ``ecp`` block for a single atom tag.
+
+        If the ``inline_basis`` option is set, entries that refer to the NWChem library are replaced by the explicit
+        definition of the basis set, taken from the local copy of the library.
+        """
+        library_name = parse_library_name(basis_name)
+        if not self.inputs.metadata.options.inline_basis or library_name is None:
+            return f'  {atom_type} {basis_name}\n'
+
+        if atom_type == '*':
+            kinds = self.inputs.structure.kinds
+        elif atom_type in self.inputs.structure.get_kind_names():
+            kinds = [self.inputs.structure.get_kind(atom_type)]
+        else:
+            kinds = []
+        symbols = {kind.name: kind.symbol for kind in kinds} or {atom_type: atom_type}
+
+        entry = ''
+        for tag, symbol in symbols.items():
+            for line in get_basis_block(symbol, library_name, kind=key):
+                # The lines of a block start with the element symbol, which is replaced by the atom tag
+                tokens = line.split(maxsplit=1)
+                if tokens[0].lower() == symbol.lower():
+                    line = f'{tag} {tokens[1]}' if len(tokens) > 1 else tag
+                entry += f'  {line.rstrip()}\n'
+
+        return entry
+
     def _get_input_file(self):
         """Prepare NWChem input file from CalcJob inputs.
 
-        This overloads the simpler method from the NwchemBaseCalculation class.
+        This overloads the simpler method from the NwchemBaseCalculation class. Only the geometry and basis blocks are
+        rendered for each calculation, the block with the module directives and tasks is cached per parameter set.
         """
         inputs = self.inputs
-        parameters = inputs.parameters.get_dict()
+        parameters = self._get_parameters()
         abbreviation = parameters.pop('abbreviation', self._DEFAULT_ABBREVIATION)
         title = parameters.pop('title', 'AiiDA NWChem calculation')
-        memory = inputs.metadata.options.total_memory
         basis = parameters.pop('basis', None)
+        ecp = parameters.pop('ecp', None)
         symmetry = parameters.pop('symmetry', None)
-        set_commands = parameters.pop('set', None)
-        task = parameters.pop('task', None)
-        add_cell = inputs.add_cell
-
-        atom_kinds = []
-        atom_coords_cartesian = []
-        for site in inputs.structure.sites:
-            site_dict = site.get_raw()
-            atom_kinds.append(site_dict['kind_name'])
-            atom_coords_cartesian.append(site_dict['position'])
 
-        # For calculations with a truly periodic cell, such as solid state calculations,
-        # coordinates must be converted into fractional coordinates
-        if add_cell:
-            cell = inputs.structure.cell
-            inv_cell = np.linalg.inv(cell)
-            atom_coords_fractional = []
-            for coords_cart in atom_coords_cartesian:
-                atom_coords_fractional.append(np.dot(coords_cart, inv_cell))
-
-        cell_lengths = inputs.structure.cell_lengths
-        cell_angles = inputs.structure.cell_angles
-
-        input_str = ''
-
-        # Echo the input file in the output
-        input_str += 'echo\n'
-        # Title
-        if 'restart_folder' in inputs:
-            input_str += f'restart {abbreviation}\ntitle "{title}\"\n'
-        else:
-            input_str += f'start {abbreviation}\ntitle "{title}\"\n'
-        # Memory
-        input_str += f'memory {memory} mb\n'
-        # Cell
-        input_str += 'geometry units angstroms noautoz noautosym\n'
-        if add_cell:
-            input_str += '  system crystal\n'
-            input_str += '    lat_a {}\n    lat_b {}\n    lat_c {}\n'.format(*cell_lengths)  # pylint: disable=consider-using-f-string
-            input_str += '    alpha {}\n    beta  {}\n    gamma {}\n'.format(*cell_angles)  # pylint: disable=consider-using-f-string
-            input_str += '  end\n'
-        if symmetry:
-            input_str += f'  symmetry {symmetry}\n'
-        # Coordinates
-        if add_cell:
-            atom_coords = atom_coords_fractional
-        else:
-            atom_coords = atom_coords_cartesian
-        for kind, coords in zip(atom_kinds, atom_coords):
-            input_str += '  {} {} {} {}\n'.format(kind, *coords)  # pylint: disable=consider-using-f-string
-        input_str += 'end\n'
-        # Basis
-        if basis:
-            input_str += 'basis\n'
-            for atom_type, basis_name in basis.items():
-                input_str += f'  {atom_type} {basis_name}\n'
+        input_str = HEADER_TEMPLATE.substitute(
+            start='restart' if 'restart_folder' in inputs else 'start',
+            abbreviation=abbreviation,
+            title=title,
+            memory=inputs.metadata.options.total_memory,
+        )
+        input_str += self._get_geometry_block(symmetry)
+
+        # Basis and effective core potentials
+        for key, entries in (('basis', basis), ('ecp', ecp)):
+            if not entries:
+                continue
+            if not isinstance(entries, dict):
+                input_str += ''.join(f'{line}\n' for line in render_directives({key: entries}))
+                continue
+            input_str += f'{key}\n'
+            for atom_type, basis_name in entries.items():
+                input_str += self._get_basis_entry(key, atom_type, basis_name)
             input_str += 'end\n'
 
-        input_str = _convert_parameters(parameters, indent=0, input_str=input_str)
-
-        # Any 'set' commands
-        if set_commands:
-            for key, value in set_commands.items():
-                input_str += f'set {key} {value}\n'
+        input_str += get_parameter_block(parameters)
+        for warning in get_unknown_directives(parameters):
+            self.logger.warning(warning)
 
-        # Add the task as the final line
-        if task:
-            input_str += f'task {task}\n'
+        if 'dplot' in inputs:
+            input_str += get_dplot_block(inputs.dplot.get_dict())
 
         return input_str
 
+    def prepare_for_submission(self, folder):
+        """Prepare the calculation job for submission by transforming input nodes into input files.
+
+        The cube files written by the `dplot` tasks are retrieved temporarily, such that they are parsed but not stored.
+
+        :param folder: a sandbox folder to temporarily write files on disk.
+        :return: `aiida.common.datastructures.CalcInfo` instance.
+        """
+        calcinfo = super().prepare_for_submission(folder)
+
+        if 'dplot' in self.inputs:
+            calcinfo.retrieve_temporary_list.extend(f'{name}.cube' for name in self.inputs.dplot.get_dict())
 
-# Additional free-form parameters
-def _convert_parameters(parameters, indent, input_str):
-    """Helper function to write out any further parameters passed."""
-    for key, value in parameters.items():
-        if isinstance(value, dict):
-            input_str += ' ' * 4 * indent + f'{key}\n'
-            input_str = _convert_parameters(value, indent + 1, input_str=input_str)
-            input_str += ' ' * 4 * indent + 'end\n'
+        return calcinfo
+
+    def _get_geometry_block(self, symmetry=None):
+        """Return the geometry block of the input file for the input structure.
+
+        :param symmetry: optional value of the ``symmetry`` directive.
+        """
+        structure = self.inputs.structure
+        add_cell = self.inputs.add_cell.value
+
+        positions = np.array([site.position for site in structure.sites])
+        kind_names = [site.kind_name for site in structure.sites]
+
+        # For calculations with a truly periodic cell, such as solid state calculations,
+        # coordinates must be converted into fractional coordinates
+        if add_cell:
+            positions = np.dot(positions, np.linalg.inv(structure.cell))
+            lat_a, lat_b, lat_c = structure.cell_lengths
+            alpha, beta, gamma = structure.cell_angles
+            system = SYSTEM_TEMPLATE.substitute(
+                lat_a=lat_a, lat_b=lat_b, lat_c=lat_c, alpha=alpha, beta=beta, gamma=gamma
+            )
         else:
-            input_str += ' ' * 4 * indent + f'{key} {value}\n'
+            system = ''
+
+        coordinates = '\n'.join(
+            '  {} {} {} {}'.format(kind_name, *position)  # pylint: disable=consider-using-f-string
+            for kind_name, position in zip(kind_names, positions.tolist())
+        )
 
-    return input_str
+        # NWChem can only detect the symmetry of molecules
+        if 'symmetry_tolerance' in self.inputs and not add_cell:
+            autosym = f'noautoz autosym {self.inputs.symmetry_tolerance.value}'
+        else:
+            autosym = 'noautoz noautosym'
+
+        return GEOMETRY_TEMPLATE.substitute(
+            autosym=autosym,
+            system=system,
+            symmetry=f'  symmetry {symmetry}\n' if symmetry else '',
+            coordinates=coordinates,
+        )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Parser for NWChem calculations driven through the i-PI socket interface."""
+import json
+
+from aiida import orm
+from aiida.engine import ExitCode
+from aiida.parsers import Parser
+import numpy as np
+
+from .nwchem import HARTREE_PER_BOHR_TO_EV_PER_ANGSTROM
+
+__all__ = ('NwchemDriverParser',)
+
+
+class NwchemDriverParser(Parser):
+    """
+    Parser for ``NwchemDriverCalculation``.
+
+    The driver writes one JSON line with the energy and forces per step, which
+    are split per step and stored as arrays of the ``output_trajectory``.
+    """
+
+    def __init__(self, node):
+        """
+        Initialize parser instance and check that node passed is
+        from an NWChem driver calculation.
+        """
+        from aiida.common import exceptions
+
+        from aiida_nwchem.calculations.driver import NwchemDriverCalculation
+        super().__init__(node)
+        if not issubclass(node.process_class, NwchemDriverCalculation):
+            raise exceptions.ParsingError('Can only parse NWChem driver calculations')
+
+    def parse(self, **kwargs):
+        """
+        Parse the retrieved steps file
+        """
+        steps_filename = self.node.process_class._DEFAULT_STEPS_FILE  # pylint: disable=protected-access
+
+        if steps_filename not in self.retrieved.base.repository.list_object_names():
+            self.logger.error(f"The retrieved folder does not contain the steps file '{steps_filename}'")
+            return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+
+        with self.retrieved.base.repository.open(steps_filename, 'r') as handle:
+            steps = [json.loads(line) for line in handle if line.strip()]
+
+        trajectory = self.node.inputs.trajectory
+        num_steps = len(steps)
+
+        if num_steps:
+            output_trajectory = orm.TrajectoryData()
+            cells = trajectory.get_cells()
+            output_trajectory.set_trajectory(
+                symbols=trajectory.symbols,
+                positions=trajectory.get_positions()[:num_steps],
+                cells=cells[:num_steps] if cells is not None else None,
+            )
+            forces = np.array([step['forces'] for step in steps], np.float64)
+            output_trajectory.set_array('energies', np.array([step['energy'] for step in steps], np.float64))
+            output_trajectory.set_array('forces', forces)
+            output_trajectory.set_array('forces_ev_angstrom', forces * HARTREE_PER_BOHR_TO_EV_PER_ANGSTROM)
+            self.out('output_trajectory', output_trajectory)
+
+        self.out('output_parameters', orm.Dict({'task': 'driver', 'number_of_steps': num_steps}))
+
+        if num_steps < trajectory.numsteps:
+            return self.exit_codes.ERROR_DRIVER_STEPS_INCOMPLETE
+
+        return ExitCode(0)
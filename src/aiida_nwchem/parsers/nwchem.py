@@ -7,24 +7,219 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+# pylint: disable=too-many-lines
 """Parsers for aiida-nwchem"""
+import asyncio
+import atexit
+import concurrent.futures
+import multiprocessing
+import pathlib
 import re
 
 from aiida import orm
 from aiida.engine import ExitCode
 from aiida.parsers import Parser
-from aiida.plugins import CalculationFactory
-from ase import Atoms
 import numpy as np
 
-NwchemCalculation = CalculationFactory('nwchem.base')
+from aiida_nwchem.utils.archive import create_output_archive
+from aiida_nwchem.utils.files import get_file_parser, get_output_label
+from aiida_nwchem.utils.optimization import EXTRA_OPTIMIZATION_STATUS, analyze_optimization, parse_optimization_table
+from aiida_nwchem.utils.structure import create_structure, get_kinds
+from aiida_nwchem.utils.symmetry import get_space_group, parse_point_group
+
+# Conversion factor of forces from Hartree/bohr to eV/Angstrom
+HARTREE_PER_BOHR_TO_EV_PER_ANGSTROM = 51.42208619083232
+
+# Signatures of known failures in the error messages of NWChem and the corresponding exit codes, in order of priority.
+# The messages of NWChem start with the name of the routine that failed, e.g. ``dft_scf:``, which the signatures of
+# failures of specific modules are anchored to, such that the same words in messages of other modules do not match.
+ERROR_SIGNATURES = (
+    ('ERROR_DISK_FULL', re.compile(r'no space left on device|disk quota|\b(eaf|sf|da)_(write|open)\w*:', re.I)),
+    (
+        'ERROR_GA_MEMORY',
+        re.compile(
+            r'\b(ga_create|ga_duplicate|ma_push_get|ma_alloc_get)|insufficient memory|out of memory|not enough memory|'
+            r'error related to memory', re.I
+        )
+    ),
+    ('ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED', re.compile(r'^\s*task_optimize\w*:|maximum number of steps', re.I)),
+    (
+        'ERROR_BASIS_NOT_FOUND',
+        re.compile(
+            r'^\s*(bas_\w+:|int_init\w*:.*basis)|no basis|could not load basis|basis set.*not (found|defined)', re.I
+        )
+    ),
+    ('ERROR_SCF_NOT_CONVERGED', re.compile(r'^\s*(dft|scf|rohf|uhf)\w*\s*:.*(failed to converge|not converged)', re.I)),
+    ('ERROR_GEOMETRY', re.compile(r'^\s*(geom|sym)_\w*\s*:', re.I)),
+)
+
+__all__ = ('NwchemBaseParser', 'NwchemOutputScanner', 'scan_output')
+
+# Exit codes of geometry optimizations that did not converge, by the status of their convergence analysis
+OPTIMIZATION_EXIT_CODES = {
+    'oscillating': 'ERROR_GEOMETRY_OPTIMIZATION_OSCILLATING',
+    'stagnating': 'ERROR_GEOMETRY_OPTIMIZATION_STAGNATING',
+}
+
+# Exit codes of geometry optimisations that stopped before they converged, e.g. because they were killed by a monitor
+UNFINISHED_OPTIMIZATION_EXIT_CODES = (
+    'ERROR_GEOMETRY_OPTIMIZATION_INCOMPLETE',
+    'ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED',
+    *OPTIMIZATION_EXIT_CODES.values(),
+)
+
+# Process pool used to scan outputs in a separate process, created on first use
+_PROCESS_POOL = None
+
+
+def split_lines(content):
+    """Split the content of an output file in lines, stripped of the newline character."""
+    lines = content.split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def scan_output(content):
+    """
+    Scan the content of an NWChem output file
+
+    This function only deals with plain Python data, such that it can be
+    run in a separate process. In that case, the whole content is pickled
+    and copied to the worker process, and the results back, which takes
+    away part of the gain for very large outputs.
 
-__all__ = ('NwchemBaseParser',)
+    args: content: the content of the output file
+    returns: tuple of the label of the exit code, or None on success, the
+             arguments to format its message and the dictionary of results
+    """
+    scanner = NwchemOutputScanner()
+    exit_code_label, exit_code_kwargs = scanner.scan(split_lines(content))
+    return exit_code_label, exit_code_kwargs, scanner.results
 
 
-class NwchemBaseParser(Parser):
+def get_process_pool():
     """
-    Base parser for NWChem calculations.
+    Return the process pool used to scan outputs in a separate process
+
+    The pool is created on first use and shut down when the interpreter
+    exits.
+    """
+    global _PROCESS_POOL  # pylint: disable=global-statement
+    if _PROCESS_POOL is None:
+        # Processes are spawned rather than forked, such that they do not share the connections of the daemon worker
+        _PROCESS_POOL = concurrent.futures.ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(shutdown_process_pool)
+    return _PROCESS_POOL
+
+
+def shutdown_process_pool():
+    """Shut down the process pool used to scan outputs, if it was created."""
+    global _PROCESS_POOL  # pylint: disable=global-statement
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown()
+        _PROCESS_POOL = None
+
+
+def wait_for(future):
+    """
+    Wait for the result of a future
+
+    If the engine provides a portal to its event loop (``plumpy`` with
+    ``greenback`` support), the event loop keeps running other processes
+    while waiting. Otherwise this blocks until the result is available.
+    """
+    try:
+        from plumpy.greenback_bridge import has_portal, sync_await
+    except ImportError:
+        return future.result()
+
+    if has_portal():
+        return sync_await(asyncio.wrap_future(future))
+
+    return future.result()
+
+
+class NwpwForceTables:
+    """
+    State machine for the per-atom force tables of NWPW tasks
+
+    Lines are only matched against the rows of the table after its header,
+    and the forces are written directly in a float64 array. Once the number
+    of atoms is known from the first table, the arrays of the following
+    tables are allocated with their final size.
+    """
+
+    REGEX_HEADER = re.compile(r'^\s*ion forces', re.IGNORECASE)
+    REGEX_ROW = re.compile(r'^\s+[0-9]+[\sA-z\(]+([0-9\-.]+)\s+([0-9\-.]+)\s+([0-9\-.]+)\s+\)$')
+
+    def __init__(self):
+        self.tables = []
+        self._active = False
+        self._forces = None
+        self._row = 0
+
+    def feed(self, line):
+        """
+        Process the next line of the output
+
+        args: line: the line to process
+        returns: True if the line is part of a force table
+        """
+        if not self._active:
+            if 'orces' in line and self.REGEX_HEADER.match(line):
+                self._active = True
+                self._row = 0
+                size = len(self.tables[-1]) if self.tables else 64
+                self._forces = np.empty((size, 3), np.float64)
+                return True
+            return False
+
+        result = self.REGEX_ROW.match(line)
+        if result is None:
+            # Blank lines between the header and the first row
+            if self._row == 0 and not line.strip():
+                return True
+            self.close()
+            return False
+
+        if self._row == len(self._forces):
+            self._forces = np.resize(self._forces, (2 * len(self._forces), 3))
+        self._forces[self._row] = result.groups()
+        self._row += 1
+        return True
+
+    def close(self):
+        """
+        Close the current table, if any
+        """
+        if self._active and self._row:
+            forces = self._forces if self._row == len(self._forces) else self._forces[:self._row].copy()
+            self.tables.append(forces)
+        self._active = False
+        self._forces = None
+
+    def get_results(self):
+        """
+        Return the forces of the last table and of all tables
+
+        returns: dictionary with the ``forces`` of the last table and, if
+                 there are several tables with the same number of atoms,
+                 the ``forces_steps`` of all tables
+        """
+        self.close()
+        if not self.tables:
+            return {}
+
+        results = {'forces': self.tables[-1]}
+        if len(self.tables) > 1 and len({len(forces) for forces in self.tables}) == 1:
+            results['forces_steps'] = np.stack(self.tables)
+        return results
+
+
+class NwchemOutputScanner:
+    """
+    Scanner for the standard output of NWChem calculations.
 
     The goal for the standard parser is to parse all standard
     NWChem modules.
@@ -34,92 +229,219 @@ class NwchemBaseParser(Parser):
     - DFT
     - Geo-opt
     - Frequency analysis
+    - Gradients
 
     Multiple tasks are possible so we must parse each one.
     To simplify providence, only one task directive is allowed.
 
-    The output will be parameter data containing a list
-    of dictionaries in the order of the tasks.
+    The results are collected as plain Python data in the ``results``
+    dictionary, keyed by the label of the output they are stored in, such
+    that the scanner does not need access to the database.
     """
 
-    def __init__(self, node):
-        """
-        Initialize parser instance and check that node passed is
-        from an NWChem calculation.
-        """
-        from aiida.common import exceptions
-        super().__init__(node)
-        if not issubclass(node.process_class, NwchemCalculation):
-            raise exceptions.ParsingError('Can only parse NWChem calculations')
+    # Keys of parsed quantities that are stored in the ``output_arrays`` node instead of ``output_parameters``
+    _ARRAY_KEYS = ('forces', 'forces_steps', 'dipoles', 'normal_modes', 'optimization_table', 'tce_iterations')
 
-    def parse(self, **kwargs):
+    # Maximum number of lines before the end of an error message that are searched for its content
+    _ERROR_SEARCH_LINES = 50
+
+    # Number of lines at the start and end of the output that are searched for the statistics of the job
+    _HEADER_SEARCH_LINES = 200
+    _FOOTER_SEARCH_LINES = 300
+
+    def __init__(self):
         """
-        Parse retrieved file
+        Initialize the scanner with empty results.
         """
-        output_filename = self.node.get_option('output_filename')
+        self.results = {}
 
-        # Check that folder content is as expected
-        files_retrieved = self.retrieved.base.repository.list_object_names()
-        files_expected = [output_filename]
-        # Note: set(A) <= set(B) checks whether A is a subset of B
-        if not set(files_expected) <= set(files_retrieved):
-            self.logger.error(f"Found files '{files_retrieved}', expected to find '{files_expected}'")
-            return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+    def scan(self, all_lines):
+        """
+        Scan the lines of the output file
 
-        # Read output file
-        self.logger.info(f"Parsing '{output_filename}'")
-        with self.retrieved.base.repository.open(output_filename, 'r') as fhandle:
-            all_lines = [line.strip('\n') for line in fhandle.readlines()]
+        args: all_lines: list of lines from outfile, stripped of newline char
+        returns: tuple of the label of the exit code, or None on success,
+                 and the arguments to format its message
+        """
+        # Check if NWChem reported a fatal error
+        error_index = self.find_error(all_lines)
+        if error_index is not None:
+            error_dict = self.parse_errors(all_lines, error_index)
+            exit_code_label, exit_code_kwargs = self.get_error_exit_code(error_dict)
+            if exit_code_label == 'ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED':
+                # The steps of the optimization are parsed, such that it can be continued from the last one
+                task_list = self.separate_tasks(all_lines, include_incomplete=True)
+                if task_list and task_list[-1]['task_type'] == 'geoopt':
+                    self.parse_geoopt_incomplete(task_list[-1]['lines'])
+                    exit_code_label = self.get_optimization_exit_code(exit_code_label)
+            return exit_code_label, exit_code_kwargs
 
         # Check if NWChem finished:
         #TODO: Handle the case of the 'ignore' keyword  # pylint: disable=fixme
         if not all_lines or not re.search(r'^\sTotal times  cpu:', all_lines[-1]):
-            return self.exit_codes.ERROR_OUTPUT_STDOUT_INCOMPLETE
+            # An interrupted geometry optimisation can be continued from its last complete step
+            task_list = self.separate_tasks(all_lines, include_incomplete=True)
+            if task_list and task_list[-1].get('incomplete') and task_list[-1]['task_type'] == 'geoopt':
+                if self.parse_geoopt_incomplete(task_list[-1]['lines']):
+                    return self.get_optimization_exit_code('ERROR_GEOMETRY_OPTIMIZATION_INCOMPLETE'), {}
+            return 'ERROR_OUTPUT_STDOUT_INCOMPLETE', {}
 
         # In either case try to parse
         # Cut the data into lists
         task_list = self.separate_tasks(all_lines)
         # Parsing of only one task type is permitted, although many may be detected
         # if len(task_types) > 1 :
-        #     return self.exit_codes.ERROR_MULTIPLE_CALCULATIONS
-        if len(task_list) == 0:  # Nothing that we are able to parse
-            return self.exit_codes.ERROR_OUTPUT_STDOUT_INCOMPLETE
+        #     return 'ERROR_MULTIPLE_CALCULATIONS', {}
+        parsed_tasks = [task for task in task_list if task['task_type'] != 'dplot']
+        if len(parsed_tasks) == 0:  # Nothing that we are able to parse
+            return 'ERROR_OUTPUT_STDOUT_INCOMPLETE', {}
 
-        # Parse only the final task
-        task = task_list[-1]
+        # Parse only the final task, ignoring the ``dplot`` tasks that are added after it
+        task = parsed_tasks[-1]
         task_type = task['task_type']
         theory_type = task['theory_type']
         task_lines = task['lines']
         module_parser = getattr(self, 'parse_' + task_type)
         module_parser(task_lines, theory_type)
 
-        return ExitCode(0)
+        point_group = parse_point_group(all_lines)
+        if point_group and 'output_parameters' in self.results:
+            self.results['output_parameters']['point_group'] = point_group
+
+        if 'output_parameters' in self.results:
+            self.results['output_parameters']['job_statistics'] = self.parse_job_statistics(all_lines, task_list)
+
+        # An optimization that finished without converging reached the maximum number of steps
+        if task_type == 'geoopt' and not self.results['output_parameters']['converged']:
+            return self.get_optimization_exit_code('ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED'), {}
+
+        return None, {}
+
+    def parse_job_statistics(self, all_lines, task_list):
+        """
+        Parse the statistics of the parallel run
+
+        Only the header and footer of the output are searched for the number
+        of processes, the memory settings and the GA and MA memory usage,
+        and the end of each task for its timings. The parallel efficiency is
+        derived from the total timings: NWChem reports the cpu time of
+        process 0 only, so the efficiency cpu / (wall * nproc), with the cpu
+        time summed over all processes, is estimated as the cpu time of
+        process 0 over the wall time.
+
+        args: all_lines: list of lines from outfile, stripped of newline char
+              task_list: the tasks returned by ``separate_tasks``
+        returns: dictionary of the statistics
+        """
+        stats = {}
+
+        for line in all_lines[:self._HEADER_SEARCH_LINES]:
+            result = re.match(r'^\s*nproc\s*=\s*(\d+)', line)
+            if result:
+                stats['nproc'] = int(result.group(1))
+            result = re.match(r'^\s*(heap|stack|global|total)\s*=\s*\d+ doubles =\s*([\d.]+) Mbytes', line)
+            if result:
+                stats.setdefault('memory_mb', {})[result.group(1)] = float(result.group(2))
+
+        for line in all_lines[-self._FOOTER_SEARCH_LINES:]:
+            result = re.match(r'^\s*Max memory consumed for GA by this process:\s*(\d+) bytes', line)
+            if result:
+                stats['ga_max_memory_bytes'] = int(result.group(1))
+            result = re.match(r'^\s*maximum total bytes\s+(\d+)\s+(\d+)', line)
+            if result:
+                stats['ma_max_memory_bytes'] = {'heap': int(result.group(1)), 'stack': int(result.group(2))}
+            result = re.match(r'^ Total times  cpu:\s*([\d.]+)s\s*wall:\s*([\d.]+)s', line)
+            if result:
+                stats['cpu_time'] = float(result.group(1))
+                stats['wall_time'] = float(result.group(2))
+
+        task_timings = []
+        for task in task_list:
+            for line in reversed(task['lines']):
+                result = re.match(r'^ Task  times  cpu:\s*([\d.]+)s\s*wall:\s*([\d.]+)s', line)
+                if result:
+                    task_timings.append({
+                        'task': task['task_type'],
+                        'theory': task['theory_type'],
+                        'cpu_time': float(result.group(1)),
+                        'wall_time': float(result.group(2)),
+                    })
+                    break
+        if task_timings:
+            stats['task_timings'] = task_timings
+
+        if stats.get('wall_time'):
+            stats['parallel_efficiency'] = stats['cpu_time'] / stats['wall_time']
+
+        return stats
+
+    def _emit_results(self, result_dict):
+        """
+        Collect the parsed results for the outputs
+
+        Array quantities, which can be large, are moved out of the result dictionary and stored in the
+        repository as an ``ArrayData`` node, such that they are only loaded when explicitly requested.
+
+        args: result_dict: dictionary of parsed results, which may contain array quantities
+        """
+        arrays = {}
+        for container in (result_dict, result_dict.get('final_energy', {})):
+            for key in self._ARRAY_KEYS:
+                if key in container:
+                    arrays[key] = np.asarray(container.pop(key), np.float64)
+
+        # Forces are parsed in atomic units (Hartree/bohr), but are also provided in eV/Angstrom
+        if 'forces' in arrays:
+            arrays['forces_ev_angstrom'] = arrays['forces'] * HARTREE_PER_BOHR_TO_EV_PER_ANGSTROM
+
+        self.results['output_parameters'] = result_dict
+
+        if arrays:
+            self.results['output_arrays'] = arrays
+
+    def find_error(self, all_lines):
+        """
+        Find the line with which NWChem ends the message of a fatal error
+
+        The error message is printed just before the program aborts, so the
+        lines are searched starting from the end.
+
+        args: all_lines: list of lines from outfile, stripped of newline char
+        returns: the index of the line or None if no error was reported
+        """
+        for index in range(len(all_lines) - 1, -1, -1):
+            if 'For more information see the NWChem manual' in all_lines[index]:
+                return index
+        return None
 
     def parse_errors(self, all_lines, err_index):
         """
         Parse the specific error messages
 
+        NWChem prints three blocks delimited by lines of dashes before the
+        reference to the manual: the error message, the current input line
+        and the category of the error. Only a bounded number of lines before
+        ``err_index`` is searched and missing blocks are left out.
+
         args: all_lines: list of lines from outfile, stripped of newline char
+              err_index: index of the line referring to the NWChem manual
         returns: error_dict: dictionary describing the error encountered
         """
-
-        # Limit the search to lines we've seen already
-        lines = all_lines[:err_index]
-
         error_lines = []
-
         state = None
         info = ''
 
         # Read the lines backwards from index looking for info between '-----'
-        for index in range(len(lines) - 1, 0, -1):
-            line = lines[index]
+        for index in range(err_index - 1, max(err_index - self._ERROR_SEARCH_LINES, 0) - 1, -1):
+            line = all_lines[index]
 
             if state == 'error_info':
                 if re.match(r'^\s-+$', line):
-                    error_lines.append(info)
+                    error_lines.append(info.strip())
                     info = ''
                     state = None
+                    if len(error_lines) == 3:
+                        break
                     continue
 
                 info = line + info  # Order important because we looping backwards
@@ -127,20 +449,45 @@ class NwchemBaseParser(Parser):
                 if re.match(r'^\s-+$', line):
                     state = 'error_info'
 
-        # Organise and clean the data a bit
-        # Clean up to do
+        # Organise and clean the data a bit, the error message is always the block furthest from the end
+        error_lines = [re.sub(r'\s+', ' ', info) for info in error_lines]
         error_dict = {}
-        error_dict['error'] = error_lines[2]
-        error_dict['line'] = error_lines[1]
-        error_dict['explanation'] = error_lines[0]
+        if error_lines:
+            error_dict['error'] = error_lines[-1]
+        if len(error_lines) > 1:
+            error_dict['explanation'] = error_lines[0]
+        if len(error_lines) > 2:
+            error_dict['line'] = error_lines[1]
 
         return error_dict
 
-    def separate_tasks(self, all_lines):
+    def get_error_exit_code(self, error_dict):
+        """
+        Return the exit code corresponding to a parsed error
+
+        The error message and its explanation are matched against the
+        signatures of known failures, in order.
+
+        args: error_dict: dictionary describing the error, as returned by ``parse_errors``
+        returns: tuple of the label of the exit code and the arguments to format its message
+        """
+        text = ' '.join(error_dict.get(key, '') for key in ('error', 'explanation'))
+
+        for exit_code_label, signature in ERROR_SIGNATURES:
+            if signature.search(text):
+                return exit_code_label, {}
+
+        return 'ERROR_NWCHEM', {'error': error_dict.get('error', 'unknown error')}
+
+    def separate_tasks(self, all_lines, include_incomplete=False):
         """
         Slice the stdout in to sections according to the module used.
         Returns a list of the tasks parsed and a list of lists containing
         lines from each task
+
+        If ``include_incomplete`` is True, a final task that did not finish,
+        e.g. because the calculation ran out of walltime, is also returned,
+        with its task type set to None if it could not be determined.
         """
 
         # State to track if we're in a task or not
@@ -150,12 +497,6 @@ class NwchemBaseParser(Parser):
 
         for index, line in enumerate(all_lines):
 
-            # Check for errors:
-            if re.search('For more information see the NWChem manual', line):
-                self.parse_errors(all_lines, index)
-                #raise OutputParsingError("NWChem did not finish properly. Reported error:\n"
-                #                         "{}".format(line))
-
             if re.match(r'^\s*NWChem Input Module\s*$', line):
                 # We're inside a task block
                 in_task = True
@@ -176,6 +517,16 @@ class NwchemBaseParser(Parser):
                 if re.match(r'^\s*NWChem Nuclear Hessian and Frequency Analysis\s*$', line):
                     task_dict['task_type'] = 'freq'
                     continue
+                # The ``dplot`` tasks that write cube files after the other tasks have no results to parse
+                if re.match(r'^\s*Limits \(a\.u\.\) specified for the density plot:', line):
+                    task_dict['task_type'] = 'dplot'
+                    continue
+                # Gradient modules are also run in each step of optimisations, so only consider them as the task
+                # if no other task type was found before
+                if re.match(r'^\s*NWChem (DFT Gradient|Gradients) Module\s*$', line):
+                    if task_dict['task_type'] is None:
+                        task_dict['task_type'] = 'gradient'
+                    continue
 
                 # Determine the theory used - eg. HF, DFT, etc.
                 if re.match(r'^\s*NWChem SCF Module\s*$', line):
@@ -209,6 +560,11 @@ class NwchemBaseParser(Parser):
                     if re.match(r'^\s+CITATION\s+$', line):
                         break
 
+        if in_task and include_incomplete:
+            task_dict['lines'] = all_lines[first_line:]
+            task_dict['incomplete'] = True
+            task_list.append(task_dict)
+
         return task_list
 
     def parse_scf(self, lines):
@@ -279,6 +635,19 @@ class NwchemBaseParser(Parser):
 
         return result_dict
 
+    def parse_nwpw_cutoff(self, line, result_dict):
+        """
+        Parse a line with a plane-wave cutoff and the size of its FFT grid
+
+        args: line: the line to parse
+              result_dict: the dictionary to add the cutoff and grid to
+        """
+        result = re.match(r'^\s*(density|wavefnc) cutoff=\s*([\d.]+)\s+fft=\s*(\d+)x\s*(\d+)x\s*(\d+)', line)
+        if result:
+            name = 'density' if result.group(1) == 'density' else 'wavefunction'
+            result_dict[f'{name}_cutoff'] = float(result.group(2))
+            result_dict[f'{name}_fft_grid'] = [int(result.group(index)) for index in (3, 4, 5)]
+
     def parse_nwpw_band(self, lines):
         """
         Parse an 'NWPW Band' task block
@@ -287,10 +656,14 @@ class NwchemBaseParser(Parser):
         """
         result_dict = {'theory': 'nwpw band'}
         state = None
-        forces = []
+        force_tables = NwpwForceTables()
 
         for line in lines:
 
+            # Forces, the rows of the table are not matched by anything else
+            if force_tables.feed(line):
+                continue
+
             result = re.match(r'^\s*electron spin\s*=\s*([A-z]+)\s*$', line)
             if result:
                 result_dict['electron spin'] = result.group(1)
@@ -306,10 +679,9 @@ class NwchemBaseParser(Parser):
                     key = re.sub(r'[^a-zA-Z0-9]+', '_', result.group(1).strip().lower())
                     result_dict[key] = float(result.group(2))
 
-            # Forces
-            result = re.match(r'^\s+[0-9]+[\sA-z\(]+([0-9\-.]+)\s+([0-9\-.]+)\s+([0-9\-.]+)\s+\)$', line)
-            if result:
-                forces.append([result.group(1), result.group(2), result.group(3)])
+            # Plane-wave cutoffs in Hartree and the size of the corresponding FFT grid
+            if 'cutoff=' in line:
+                self.parse_nwpw_cutoff(line, result_dict)
 
             # End of task
             if re.match('^ Task  times  cpu:', line):
@@ -318,8 +690,7 @@ class NwchemBaseParser(Parser):
                 result_dict['wall_time'] = result.group(2)
                 break
 
-        if forces:
-            result_dict['forces'] = forces
+        result_dict.update(force_tables.get_results())
 
         return result_dict
 
@@ -331,10 +702,14 @@ class NwchemBaseParser(Parser):
         """
         result_dict = {'theory': 'nwpw pspw'}
         state = None
-        forces = []
+        force_tables = NwpwForceTables()
 
         for line in lines:
 
+            # Forces, the rows of the table are not matched by anything else
+            if force_tables.feed(line):
+                continue
+
             result = re.match(r'^\s*electron spin\s*=\s*([A-z]+)\s*$', line)
             if result:
                 result_dict['electron spin'] = result.group(1)
@@ -350,10 +725,9 @@ class NwchemBaseParser(Parser):
                     key = re.sub(r'[^a-zA-Z0-9]+', '_', result.group(1).strip().lower())
                     result_dict[key] = float(result.group(2))
 
-            # Forces
-            result = re.match(r'^\s+[0-9]+[\sA-z\(]+([0-9\-.]+)\s+([0-9\-.]+)\s+([0-9\-.]+)\s+\)$', line)
-            if result:
-                forces.append([result.group(1), result.group(2), result.group(3)])
+            # Plane-wave cutoffs in Hartree and the size of the corresponding FFT grid
+            if 'cutoff=' in line:
+                self.parse_nwpw_cutoff(line, result_dict)
 
             # End of task
             if re.match('^ Task  times  cpu:', line):
@@ -362,8 +736,7 @@ class NwchemBaseParser(Parser):
                 result_dict['wall_time'] = result.group(2)
                 break
 
-        if forces:
-            result_dict['forces'] = forces
+        result_dict.update(force_tables.get_results())
 
         return result_dict
 
@@ -371,14 +744,45 @@ class NwchemBaseParser(Parser):
         """
         Parse a TCE task block
 
+        Besides the final energies, the rows of the table of the coupled
+        cluster iterations are parsed as the ``tce_iterations`` array, with
+        the residuum, correlation energy, cpu and wall time of each iteration,
+        and the timings are split in the integral transformation, the
+        iterations and the triples correction.
+
         args: lines: the lines to parse
         """
 
         result_dict = {'theory': 'tce'}
         state = None
+        # Phase of the calculation to which the printed timings are attributed
+        phase = 'integral_transformation'
+        timings = {}
+        file_sizes = {}
+        table = None
+        iterations = None
 
         for line in lines:
 
+            # Rows of the table of iterations
+            if table is not None:
+                result = re.match(
+                    r'^\s*\d+\s+([-+\d.EeDd]+)\s+([-+\d.EeDd]+)\s+([\d.]+)\s+([\d.]+)(\s+[\d.]+)*\s*$', line
+                )
+                if result:
+                    table.append([float(value.replace('D', 'E').replace('d', 'e')) for value in result.groups()[:4]])
+                    continue
+                if re.match(r'^\s*-+\s*$', line):
+                    continue
+                if iterations is None:
+                    iterations = table
+                table = None
+
+            if re.match(r'^\s*Iter\s+Residuum\s+Correlation\s+Cpu\s+Wall', line):
+                table = []
+                phase = 'cc_iterations'
+                continue
+
             result = re.match(r'^[\s]+Wavefunction type :([A-z\s-]+)\s*$', line)
             if result:
                 result_dict['wavefunction_type'] = result.group(1).strip()
@@ -395,14 +799,31 @@ class NwchemBaseParser(Parser):
             if result:
                 result_dict['calculation_type'] = result.group(1).strip()
 
+            # Sizes of the integral and amplitude files
+            result = re.match(r'^\s*(\S+) file size\s*=\s*(\d+)\s*$', line)
+            if result:
+                file_sizes[result.group(1)] = int(result.group(2))
+
             if re.match(r'^\s*Iterations converged\s*$', line):
                 state = 'final-results'
+                phase = 'other'
             if state == 'final-results':
+                if phase == 'other' and re.search(r'\(T\)|\[T\]', line):
+                    phase = 'triples'
+                result = re.match(r'^\s*\(T\) correction energy / hartree\s*=\s*([\-\d\.]+)$', line)
+                if result:
+                    result_dict['triples_correction_energy'] = float(result.group(1))
                 result = re.match(r'^\s*([^=]+?)\s*=\s*([\-\d\.]+)$', line)
                 if result:
                     key = re.sub(r'[^a-zA-Z0-9]+', '_', result.group(1).lower())
                     result_dict[key] = result.group(2)
 
+            result = re.match(r'^\s*Cpu & wall time / sec\s+([\d.]+)\s+([\d.]+)\s*$', line)
+            if result and phase != 'cc_iterations':
+                timing = timings.setdefault(phase, {'cpu': 0., 'wall': 0.})
+                timing['cpu'] += float(result.group(1))
+                timing['wall'] += float(result.group(2))
+
             # End of task
             if re.match('^ Task  times  cpu:', line):
                 result = re.match(r'^ Task  times  cpu:\s*([\d\.\d]+)s\s*wall:\s*([\d\.\d]+)s', line)
@@ -410,6 +831,18 @@ class NwchemBaseParser(Parser):
                 result_dict['wall_time'] = result.group(2)
                 break
 
+        iterations = iterations if iterations is not None else table
+        if iterations:
+            result_dict['tce_iterations'] = iterations
+            timings['cc_iterations'] = {
+                'cpu': sum(row[2] for row in iterations),
+                'wall': sum(row[3] for row in iterations),
+            }
+        if timings:
+            result_dict['tce_timings'] = timings
+        if file_sizes:
+            result_dict['tce_file_sizes'] = file_sizes
+
         return result_dict
 
     def parse_energy(self, task_lines, theory_type, create_node=True):
@@ -421,10 +854,47 @@ class NwchemBaseParser(Parser):
         module_parser = getattr(self, 'parse_' + theory_type)
         result_dict = module_parser(task_lines)
         if create_node:
-            self.out('output_parameters', orm.Dict(dict=result_dict))
+            self._emit_results(result_dict)
         else:
             return result_dict
 
+    def parse_gradient(self, task_lines, theory_type):
+        """
+        Parse a gradient task block
+
+        The forces are obtained from the last table of energy gradients, which
+        NWChem prints in atomic units (Hartree/bohr).
+
+        params: lines: the lines to parse
+        """
+        result_dict = self.parse_energy(task_lines, theory_type, create_node=False)
+        result_dict['task'] = 'gradient'
+        state = None
+        forces = []
+
+        for line in task_lines:
+            # E.g. 'DFT ENERGY GRADIENTS' or 'RHF ENERGY GRADIENTS'
+            if re.match(r'^\s*[A-Z]+ ENERGY GRADIENTS\s*$', line):
+                state = 'gradients'
+                forces = []
+                continue
+            if state == 'gradients':
+                result = re.match(
+                    r'^\s*[\d]+\s+[\w\-]+(?:\s+[\-\d\.]+){3}'
+                    r'\s+([\-\d\.]+)\s+([\-\d\.]+)\s+([\-\d\.]+)\s*$', line
+                )
+                if result:
+                    forces.append([-float(result.group(1)), -float(result.group(2)), -float(result.group(3))])
+                    continue
+                # The table ends with the first line that is not a row, after the header lines
+                if forces:
+                    state = None
+
+        if forces:
+            result_dict['forces'] = forces
+
+        self._emit_results(result_dict)
+
     def parse_geoopt(self, task_lines, theory_type):
         """
         Parse a geometry optimisation task block
@@ -432,9 +902,15 @@ class NwchemBaseParser(Parser):
         params: lines: the lines to parse
         """
 
+        # An optimization that did not converge is reported from its last complete step
+        if not any(re.match(r'^\s*Optimization converged\s*$', line) for line in task_lines):
+            if not self.parse_geoopt_incomplete(task_lines):
+                self._emit_results({'task': 'geo-opt', 'converged': False})
+            return
+
         result_dict = {'task': 'geo-opt'}
         state = None
-        symbols = []
+        tags = []
         positions = []
         cell = []
 
@@ -459,11 +935,11 @@ class NwchemBaseParser(Parser):
                     continue
             if state == 'final-coords':
                 result = re.match(
-                    r'^\s*[\d]+\s*([a-zA-Z]+)\s*[\-\d\.]+'
-                    r'\s*([\-\d\.]+)\s*([\-\d\.]+)\s*([\-\d\.]+)$', line
+                    r'^\s*[\d]+\s+(\S+)\s+[\-\d\.]+'
+                    r'\s+([\-\d\.]+)\s+([\-\d\.]+)\s+([\-\d\.]+)$', line
                 )
                 if result:
-                    symbols.append(result.group(1))
+                    tags.append(result.group(1))
                     positions.append([result.group(2), result.group(3), result.group(4)])
                     continue
                 if re.match(r'^\s*lattice vectors in angstroms', line):
@@ -505,22 +981,131 @@ class NwchemBaseParser(Parser):
         final_energy_dict = self.parse_energy(final_energy_lines, theory_type, create_node=False)
 
         result_dict['final_energy'] = final_energy_dict
+        result_dict['converged'] = True
+        table = parse_optimization_table(task_lines)
+        result_dict['optimization_table'] = table
+        result_dict['convergence'] = dict(analyze_optimization(table), status='converged')
+
+        self._emit_results(result_dict)
+        self._emit_trajectory(self.parse_geoopt_steps(task_lines))
+
+        # The cell is only printed if it was optimized, otherwise that of the input structure is kept
+        self.results['output_structure'] = {
+            'tags': tags,
+            'positions': np.array(positions, np.float64),
+            'cell': np.array(cell, np.float64) if cell else None,
+        }
+
+    def parse_geoopt_steps(self, task_lines):
+        """
+        Parse the geometry and energy of each step of a geometry optimisation
+
+        The geometry of a step is printed at its start, while the energy is
+        reported on the line starting with '@' at its end. Steps without an
+        energy, e.g. the last one of an interrupted optimisation, are left out.
 
-        self.out('output_parameters', orm.Dict(dict=result_dict))
+        params: lines: the lines to parse
+        returns: list of dictionaries with the step number, energy, tags and positions
+        """
+        steps = []
+        step = None
+        state = None
 
-        # Create StructureData node
-        if positions:
-            positions = np.array(positions, np.float64)
+        for line in task_lines:
+            result = re.match(r'^\s+Step\s+([0-9]+)\s*$', line)
+            if result:
+                step = {'step': int(result.group(1)), 'tags': [], 'positions': []}
+                state = None
+                continue
+            if step is None:
+                continue
+            if re.match(r'^\s*Output coordinates in angstroms', line) and not step['positions']:
+                state = 'coords'
+                continue
+            if state == 'coords':
+                result = re.match(
+                    r'^\s*[\d]+\s+(\S+)\s+[\-\d\.]+'
+                    r'\s+([\-\d\.]+)\s+([\-\d\.]+)\s+([\-\d\.]+)$', line
+                )
+                if result:
+                    step['tags'].append(result.group(1))
+                    step['positions'].append([float(result.group(i)) for i in (2, 3, 4)])
+                    continue
+                if step['positions']:
+                    state = None
+                continue
+            result = re.match(r'^@\s*([\d]+)\s+([\-\d\.]+)', line)
+            if result and int(result.group(1)) == step['step'] and step['positions']:
+                step['energy'] = float(result.group(2))
+                steps.append(step)
+                step = None
 
-        if not cell:
-            # If the cell is specified, ASE defaults to 0,0,0, which throws an AiiDA
-            # error for cell with volume of 0. Here we arbitrarily set the cell.
-            # This isn't really satisfactory.
-            # TODO: Look into changing AiiDA test of cell volume.  # pylint: disable=fixme
-            cell = (1., 1., 1.)
-        else:
-            cell = np.array(cell, np.float64)
-        self.out('output_structure', orm.StructureData(ase=Atoms(symbols=symbols, positions=positions, cell=cell)))
+        return steps
+
+    def parse_geoopt_incomplete(self, task_lines):
+        """
+        Parse a geometry optimisation task block that did not finish or converge
+
+        The last complete step and its geometry are reported, such that the
+        optimisation can be continued from there, with the table of the steps
+        and the analysis of their convergence.
+
+        params: lines: the lines to parse
+        returns: True if at least one step was completed, False otherwise
+        """
+        steps = self.parse_geoopt_steps(task_lines)
+        if not steps:
+            return False
+
+        last_step = steps[-1]
+        table = parse_optimization_table(task_lines)
+        self._emit_results({
+            'task': 'geo-opt',
+            'converged': False,
+            'final_step': str(last_step['step']),
+            'final_opt_energy': str(last_step['energy']),
+            'optimization_table': table,
+            'convergence': analyze_optimization(table),
+        })
+        self._emit_trajectory(steps)
+        self.results['output_structure'] = {
+            'tags': last_step['tags'],
+            'positions': np.array(last_step['positions'], np.float64),
+            'cell': None,
+        }
+
+        return True
+
+    def get_optimization_exit_code(self, exit_code_label):
+        """
+        Return the exit code of a geometry optimisation that did not converge
+
+        An optimisation that is oscillating or stagnating, according to the
+        analysis of its steps, e.g. because it was stopped by the monitor of
+        ``aiida_nwchem.utils.optimization``, fails with the exit code of its
+        status, such that it is restarted differently.
+
+        args: exit_code_label: the label of the exit code otherwise
+        returns: the label of the exit code
+        """
+        convergence = self.results.get('output_parameters', {}).get('convergence', {})
+        return OPTIMIZATION_EXIT_CODES.get(convergence.get('status', None), exit_code_label)
+
+    def _emit_trajectory(self, steps):
+        """
+        Collect the geometries and energies of the steps of an optimisation for the trajectory output
+
+        args: steps: list of steps, as returned by ``parse_geoopt_steps``
+        """
+        if not steps:
+            return
+
+        self.results['output_trajectory'] = {
+            'tags': steps[0]['tags'],
+            'positions': np.array([step['positions'] for step in steps], np.float64),
+            'stepids': np.array([step['step'] for step in steps], np.int64),
+            'energies': np.array([step['energy'] for step in steps], np.float64),
+        }
 
     def parse_freq(self, task_lines, theory_type):
         # pylint: disable=unused-argument
@@ -542,6 +1127,11 @@ class NwchemBaseParser(Parser):
                 state = 'final-results'
                 continue
             if state == 'final-results':
+                # Rotational constants in cm-1, zero for the axis of linear molecules
+                result = re.match(r'^\s*([ABC])=\s*([\d\.]+)\s*cm-1', line)
+                if result:
+                    task_dict.setdefault('rotational_constants', []).append(float(result.group(2)))
+                    continue
                 result = re.match(r'^\s([A-z\s\(\)\-]+)\s+=\s*([\d\.]+)', line)
                 if result:
                     if result.group(1).strip() == 'Total Entropy':
@@ -576,6 +1166,13 @@ class NwchemBaseParser(Parser):
                 if result:
                     key = re.sub(r'[^a-zA-Z0-9]+', '_', result.group(1).strip().lower())
                     task_dict['entropy'][key] = result.group(2)
+                    # The molecular weight and symmetry number are reported with their entropy contributions
+                    result = re.search(r'mol\. weight =\s*([\d\.]+)', line)
+                    if result:
+                        task_dict['molecular_weight'] = float(result.group(1))
+                    result = re.search(r'symmetry #\s*=\s*(\d+)', line)
+                    if result:
+                        task_dict['symmetry_number'] = int(result.group(1))
                 else:
                     state = 'final-results'
                     continue
@@ -590,7 +1187,7 @@ class NwchemBaseParser(Parser):
                     continue
             # Parse dipole data
             if state == 'final-freq-results-dipole':
-                result = re.match(r'^\s*[\d]\s*([\-\d\.]+)\s*\|\|'
+                result = re.match(r'^\s*[\d]+\s+([\-\d\.]+)\s*\|\|'
                                   r'\s*([-\d.]+)\s*([-\d.]+)\s*([-\d.]+)$', line)
                 if result:
                     # Get vibrational eigenvalues (cm^-1)
@@ -598,7 +1195,7 @@ class NwchemBaseParser(Parser):
                     # Get dipole moments (cartesian, debye/angs)
                     dipoles_list.append([result.group(2), result.group(3), result.group(4)])
                     continue
-                if re.match(r'^\s-+$', line):
+                if re.match(r'^\s*-+$', line):
                     state = 'final-results'
                     task_dict['frequencies'] = frequencies
                     task_dict['dipoles'] = np.array(dipoles_list, np.float64)
@@ -606,14 +1203,14 @@ class NwchemBaseParser(Parser):
             # Parse IR data
             if state == 'final-freq-results-ir':
                 result = re.match(
-                    r'^\s*[\d]\s*[\-\d\.]+\s*\|\|\s*([-\d.]+)'
+                    r'^\s*[\d]+\s+[\-\d\.]+\s*\|\|\s*([-\d.]+)'
                     r'\s*([-\d.]+)\s*([-\d.]+)\s*([-\d.]+)$', line
                 )
                 if result:
                     # Get intensity (arbitrary units)
                     intensities.append(result.group(4))
                     continue
-                if re.match(r'^\s-+$', line):
+                if re.match(r'^\s*-+$', line):
                     state = 'final-results'
                     task_dict['ir-intensities'] = intensities
                     continue
@@ -625,6 +1222,232 @@ class NwchemBaseParser(Parser):
                 task_dict['wall_time'] = result.group(2)
                 break
 
-        self.out('output_parameters', orm.Dict(task_dict))
+        normal_modes = self.parse_normal_modes(task_lines)
+        if normal_modes is not None:
+            task_dict['normal_modes'] = normal_modes
+
+        self._emit_results(task_dict)
 
         return task_dict, nodes
+
+    @staticmethod
+    def parse_normal_modes(task_lines):
+        """
+        Parse the last table of normal mode eigenvectors of a frequency analysis
+
+        The table is printed in blocks of at most six modes, with a row for
+        each Cartesian coordinate. The dimension follows from the number of
+        rows of the first block, after which the displacements are written
+        directly in a preallocated float64 array. The last table is the one of
+        the projected frequencies, if these are computed.
+
+        args: task_lines: the lines of the task
+        returns: the (3N, 3N) array with the displacements of mode j in
+                 column j, or None if there is no table
+        """
+        starts = [index for index, line in enumerate(task_lines) if 'NORMAL MODE EIGENVECTORS' in line]
+        if not starts:
+            return None
+
+        normal_modes = None
+        columns = []
+        rows = []
+        values = []
+
+        # Skip the line below the title of the table, the line after the last row ends the loop
+        for line in task_lines[starts[-1] + 2:] + ['']:
+            tokens = line.split()
+            if tokens and (tokens[0] in ('Frequency', 'P.Frequency') or tokens[0].startswith('(')):
+                continue
+            if tokens and tokens[0].isdigit() and len(tokens) == len(columns) + 1 and '.' in tokens[-1]:
+                rows.append(int(tokens[0]) - 1)
+                values.append(tokens[1:])
+                continue
+
+            # Any other line ends the current block, whose values are converted at once
+            if rows:
+                if normal_modes is None:
+                    normal_modes = np.full((len(rows), len(rows)), np.nan)
+                normal_modes[np.ix_(rows, columns)] = np.array(values, np.float64)
+                rows, values = [], []
+
+            if tokens and all(token.isdigit() for token in tokens):
+                # Numbers of the modes of the next block
+                columns = [int(token) - 1 for token in tokens]
+            elif tokens:
+                break
+
+        return normal_modes
+
+
+class NwchemBaseParser(NwchemOutputScanner, Parser):
+    """
+    Base parser for NWChem calculations.
+
+    The output is scanned by the ``NwchemOutputScanner``, optionally in a
+    separate process, after which the output nodes are created from the
+    plain results.
+    """
+
+    def __init__(self, node):
+        """
+        Initialize parser instance and check that node passed is
+        from an NWChem calculation.
+        """
+        from aiida.common import exceptions
+
+        from aiida_nwchem.calculations.nwchem import NwchemBaseCalculation
+        Parser.__init__(self, node)
+        NwchemOutputScanner.__init__(self)
+        if not issubclass(node.process_class, NwchemBaseCalculation):
+            raise exceptions.ParsingError('Can only parse NWChem calculations')
+
+    def parse(self, **kwargs):
+        """
+        Parse retrieved file
+        """
+        output_filename = self.node.get_option('output_filename')
+
+        retrieved_temporary_folder = kwargs.get('retrieved_temporary_folder', None)
+        if retrieved_temporary_folder is None and self.node.get_retrieve_temporary_list():
+            return self.exit_codes.ERROR_NO_RETRIEVED_TEMPORARY_FOLDER
+
+        if self.node.get_option('archive_output'):
+            # The output file was retrieved temporarily and is only stored as a compressed archive
+            filepath = pathlib.Path(retrieved_temporary_folder) / output_filename
+            if not filepath.is_file():
+                self.logger.error(f"Expected to find '{output_filename}' in the retrieved temporary folder")
+                return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+
+            self.logger.info(f"Parsing '{output_filename}'")
+            content = filepath.read_text(encoding='utf-8')
+
+            # The archive is also stored if parsing fails, as it is the only copy of the output
+            self.out('output_archive', create_output_archive(content, output_filename))
+        else:
+            # Check that folder content is as expected
+            files_retrieved = self.retrieved.base.repository.list_object_names()
+            files_expected = [output_filename]
+            # Note: set(A) <= set(B) checks whether A is a subset of B
+            if not set(files_expected) <= set(files_retrieved):
+                self.logger.error(f"Found files '{files_retrieved}', expected to find '{files_expected}'")
+                return self.exit_codes.ERROR_MISSING_OUTPUT_FILES
+
+            # Read output file
+            self.logger.info(f"Parsing '{output_filename}'")
+            with self.retrieved.base.repository.open(output_filename, 'r') as fhandle:
+                content = fhandle.read()
+
+        # Scanning large outputs can take a while, which can be moved to a separate process
+        if self.node.get_option('parse_in_subprocess'):
+            exit_code_label, exit_code_kwargs, results = wait_for(get_process_pool().submit(scan_output, content))
+        else:
+            exit_code_label, exit_code_kwargs = self.scan(split_lines(content))
+            results = self.results
+
+        # The monitor of the optimisation may have used other settings than the analysis of the scanner, so the
+        # status for which it killed the calculation takes precedence
+        status = self.node.base.extras.get(EXTRA_OPTIMIZATION_STATUS, None)
+        if status in OPTIMIZATION_EXIT_CODES and exit_code_label in UNFINISHED_OPTIMIZATION_EXIT_CODES:
+            exit_code_label = OPTIMIZATION_EXIT_CODES[status]
+            if 'convergence' in results.get('output_parameters', {}):
+                results['output_parameters']['convergence']['status'] = status
+
+        # NWChem cannot detect the space group of crystals, so it is detected from the input structure instead
+        if 'output_parameters' in results and 'symmetry_tolerance' in self.node.inputs and self.node.inputs.add_cell:
+            results['output_parameters'].update(
+                get_space_group(self.node.inputs.structure, self.node.inputs.symmetry_tolerance.value)
+            )
+
+        # The layout of the processes over the nodes is only known from the resources of the job
+        if 'output_parameters' in results and 'job_statistics' in results['output_parameters']:
+            resources = self.node.get_option('resources') or {}
+            results['output_parameters']['job_statistics'].update({
+                key: resources[key] for key in ('num_machines', 'num_mpiprocs_per_machine') if key in resources
+            })
+
+        # Results can also be available for failed calculations, e.g. the last step of an interrupted optimisation
+        self.create_outputs(results)
+
+        if retrieved_temporary_folder is not None:
+            self.parse_temporary_files(pathlib.Path(retrieved_temporary_folder))
+
+        if exit_code_label is not None:
+            exit_code = getattr(self.exit_codes, exit_code_label).format(**exit_code_kwargs)
+            self.logger.error(exit_code.message)
+            return exit_code
+
+        return ExitCode(0)
+
+    def parse_temporary_files(self, folder):
+        """
+        Extract the arrays from the files that were retrieved temporarily
+
+        Files without a parser, or that cannot be parsed, are skipped with a
+        warning, as they do not affect the results of the calculation.
+
+        args: folder: the path of the retrieved temporary folder
+        """
+        output_filename = self.node.get_option('output_filename')
+        settings = self.node.get_option('file_parser_settings') or {}
+
+        for filepath in sorted(path for path in folder.rglob('*') if path.is_file()):
+            filename = filepath.relative_to(folder).as_posix()
+            if filename == output_filename:
+                continue
+
+            result = get_file_parser(filepath.name)
+            if result is None:
+                self.logger.warning(f"No parser for the retrieved temporary file '{filename}', it is discarded")
+                continue
+
+            name, file_parser = result
+            try:
+                arrays = file_parser(filepath, **settings.get(name, {}))
+            except (OSError, ValueError) as exception:
+                self.logger.warning(f"Could not parse the retrieved temporary file '{filename}': {exception}")
+                continue
+
+            output_array = orm.ArrayData()
+            for key, array in arrays.items():
+                output_array.set_array(key, array)
+            self.out(f'output_files.{get_output_label(filename)}', output_array)
+
+    def create_outputs(self, results):
+        """
+        Create the output nodes from the results of the scanner
+
+        args: results: dictionary of plain results, keyed by output label
+        """
+        if 'output_parameters' in results:
+            self.out('output_parameters', orm.Dict(results['output_parameters']))
+
+        if 'output_arrays' in results:
+            output_arrays = orm.ArrayData()
+            for key, array in results['output_arrays'].items():
+                output_arrays.set_array(key, array)
+            self.out('output_arrays', output_arrays)
+
+        # The kinds, cell and periodic boundary conditions are taken from the input structure, if there is one
+        reference = self.node.inputs.structure if 'structure' in self.node.inputs else None
+
+        if 'output_structure' in results:
+            structure = results['output_structure']
+            kinds = get_kinds(structure['tags'], reference)
+            if reference is not None and structure['cell'] is None:
+                cell, pbc = reference.cell, reference.pbc
+            else:
+                cell, pbc = structure['cell'], None
+            self.out('output_structure', create_structure(kinds, structure['tags'], structure['positions'], cell, pbc))
+
+        if 'output_trajectory' in results:
+            trajectory = results['output_trajectory']
+            symbols = {kind['name']: kind['symbols'][0] for kind in get_kinds(trajectory['tags'], reference)}
+            output_trajectory = orm.TrajectoryData()
+            output_trajectory.set_trajectory(
+                symbols=[symbols[tag] for tag in trajectory['tags']],
+                positions=trajectory['positions'],
+                stepids=trajectory['stepids']
+            )
+            output_trajectory.set_array('energies', trajectory['energies'])
+            self.out('output_trajectory', output_trajectory)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Efficient access to the parsed results of many NWChem calculations.
+
+Loading the ``output_parameters`` node of a calculation fetches all of its content, while downstream analysis
+typically only needs a few scalar values, such as the total energy, of many calculations. The functions in this module
+project only the requested fields of the ``output_parameters`` in a single query. Array quantities, such as forces, are
+stored in the repository of the ``output_arrays`` node and are only read when explicitly requested.
+"""
+from aiida import orm
+
+__all__ = ('get_output_array', 'get_output_scalars')
+
+
+def _get_pk(calculation):
+    """Return the pk of a calculation passed as a node, pk or UUID."""
+    if isinstance(calculation, orm.Node):
+        return calculation.pk
+    if isinstance(calculation, int):
+        return calculation
+    return orm.load_node(calculation).pk
+
+
+def get_output_scalars(calculations, keys):
+    """Return the requested fields of the ``output_parameters`` of many calculations, using a single query.
+
+    Nested fields can be selected using dots as separators, e.g. ``final_energy.total_dft_energy``. Fields that are
+    not present in the ``output_parameters`` of a calculation are returned as ``None``.
+
+    :param calculations: an iterable of calculation nodes, pks or UUIDs, or a ``Group`` containing them.
+    :param keys: the keys of the fields to project.
+    :return: a dictionary mapping the pk of each calculation onto a dictionary of the requested fields.
+    """
+    keys = list(keys)
+
+    builder = orm.QueryBuilder()
+
+    if isinstance(calculations, orm.Group):
+        builder.append(orm.Group, filters={'id': calculations.pk}, tag='group')
+        builder.append(orm.CalcJobNode, with_group='group', project=['id'], tag='calculation')
+    else:
+        pks = [_get_pk(calculation) for calculation in calculations]
+        if not pks:
+            return {}
+        builder.append(orm.CalcJobNode, filters={'id': {'in': pks}}, project=['id'], tag='calculation')
+
+    builder.append(
+        orm.Dict,
+        with_incoming='calculation',
+        edge_filters={'label': 'output_parameters'},
+        project=[f'attributes.{key}' for key in keys],
+    )
+
+    return {pk: dict(zip(keys, values)) for pk, *values in builder.iterall()}
+
+
+def get_output_array(calculation, name):
+    """Return an array from the ``output_arrays`` of a calculation.
+
+    Only the requested array is read from the repository.
+
+    :param calculation: the calculation node, pk or UUID.
+    :param name: the name of the array, e.g. ``forces``.
+    :return: the array as a ``numpy.ndarray``.
+    :raises KeyError: if the calculation has no ``output_arrays`` or the array is not defined.
+    """
+    builder = orm.QueryBuilder()
+    builder.append(orm.CalcJobNode, filters={'id': _get_pk(calculation)}, tag='calculation')
+    builder.append(orm.ArrayData, with_incoming='calculation', edge_filters={'label': 'output_arrays'})
+    result = builder.first(flat=True)
+
+    if result is None or name not in result.get_arraynames():
+        raise KeyError(f'calculation<{_get_pk(calculation)}> does not have an output array `{name}`.')
+
+    return result.get_array(name)
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Utilities for aiida-nwchem."""
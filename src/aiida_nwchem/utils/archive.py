@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Compressed archives of the output file, from which single tasks can be read without decompressing the whole file.
+
+The output is split in segments, the header of the output before the first task and one segment per task, starting at
+the ``NWChem Input Module`` banner. Each segment is compressed as a separate member of a gzip file, which as a whole
+is still a valid gzip file of the full output. An index with the offset and size of each member in the archive, and of
+the segment in the uncompressed output, is stored next to it, such that a single task is read by seeking to its member
+and decompressing only that.
+"""
+import gzip
+import json
+import re
+
+from aiida import orm
+
+__all__ = ('create_output_archive', 'get_output_index', 'read_output_archive')
+
+ARCHIVE_SUFFIX = '.gz'
+INDEX_SUFFIX = '.index.json'
+COMPRESSION_LEVEL = 6
+
+REGEX_TASK_START = re.compile(rb'^[ \t]*NWChem Input Module[ \t]*$', re.MULTILINE)
+
+
+def create_output_archive(content, filename):
+    """Create the compressed archive of an output file and its index.
+
+    :param content: the content of the output file.
+    :param filename: the name of the output file, the archive and index are named after it.
+    :return: ``FolderData`` with the archive and the index.
+    """
+    data = content.encode('utf-8')
+    starts = sorted({0, *(match.start() for match in REGEX_TASK_START.finditer(data))})
+    ends = starts[1:] + [len(data)]
+
+    members = []
+    segments = []
+    offset = 0
+    for start, end in zip(starts, ends):
+        member = gzip.compress(data[start:end], compresslevel=COMPRESSION_LEVEL, mtime=0)
+        members.append(member)
+        segments.append({'start': start, 'length': end - start, 'offset': offset, 'size': len(member)})
+        offset += len(member)
+
+    index = {'filename': filename, 'size': len(data), 'segments': segments}
+
+    archive = orm.FolderData()
+    archive.base.repository.put_object_from_bytes(b''.join(members), f'{filename}{ARCHIVE_SUFFIX}')
+    archive.base.repository.put_object_from_bytes(json.dumps(index).encode('utf-8'), f'{filename}{INDEX_SUFFIX}')
+
+    return archive
+
+
+def get_output_index(archive):
+    """Return the index of an output archive.
+
+    :param archive: the ``FolderData`` created by ``create_output_archive``.
+    """
+    filename = next(name for name in archive.base.repository.list_object_names() if name.endswith(INDEX_SUFFIX))
+    return json.loads(archive.base.repository.get_object_content(filename, 'rb'))
+
+
+def read_output_archive(archive, segment=None):
+    """Return the content of an output archive.
+
+    :param archive: the ``FolderData`` created by ``create_output_archive``.
+    :param segment: optional index of the segment to read, where ``0`` is the header of the output and the tasks are
+        numbered from ``1`` in the order in which they were run. The full output is returned if not specified.
+    :return: the content of the output, or of the segment, as a string.
+    """
+    index = get_output_index(archive)
+
+    with archive.base.repository.open(f'{index["filename"]}{ARCHIVE_SUFFIX}', 'rb') as handle:
+        if segment is None:
+            return gzip.decompress(handle.read()).decode('utf-8')
+        entry = index['segments'][segment]
+        handle.seek(entry['offset'])
+        return gzip.decompress(handle.read(entry['size'])).decode('utf-8')
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Resolution and validation of basis sets and ECPs against a local copy of the NWChem basis library.
+
+Mistakes in the ``basis`` of the ``parameters``, such as a typo in the name of a basis set or a kind without a basis,
+are only reported by NWChem once the calculation starts running. The functions in this module allow to catch these
+before submission. The NWChem basis library is found through the ``NWCHEM_BASIS_LIBRARY`` environment variable, which
+is also used by NWChem itself. Indexing all files of the library is relatively slow, so the index of which elements
+are defined in which basis set is cached on disk and only rebuilt when the content of the library directory changes.
+"""
+import functools
+import json
+import os
+import pathlib
+import re
+
+__all__ = (
+    'BasisLibrary', 'get_basis_library', 'get_basis_block', 'get_missing_kinds', 'parse_library_name', 'validate_basis'
+)
+
+ENVIRONMENT_VARIABLE = 'NWCHEM_BASIS_LIBRARY'
+
+# Header of a basis set or ECP in a library file, e.g. `basis "H_STO-3G" PRINT`
+REGEX_HEADER = re.compile(r'^\s*(basis|ecp)\s+"([A-Za-z]+)_([^"]+)"', re.IGNORECASE)
+REGEX_END = re.compile(r'^\s*end\s*$', re.IGNORECASE)
+
+
+def parse_library_name(value):
+    """Return the name of the library basis set of a ``basis`` or ``ecp`` entry, or ``None`` if not a library entry.
+
+    :param value: the value of the entry, e.g. ``library 6-31g*``.
+    """
+    tokens = str(value).split()
+    if len(tokens) == 2 and tokens[0].lower() == 'library':
+        return tokens[1].lower()
+    return None
+
+
+def _get_cache_directory():
+    """Return the directory in which the index of the basis library is cached."""
+    cache_home = os.environ.get('XDG_CACHE_HOME', pathlib.Path.home() / '.cache')
+    return pathlib.Path(cache_home) / 'aiida-nwchem'
+
+
+class BasisLibrary:
+    """Index of the basis sets and ECPs defined in a local copy of the NWChem basis library.
+
+    :param path: the path to the ``libraries`` directory of NWChem.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._index = None
+
+    @property
+    def index(self):
+        """Return the index, mapping ``basis`` and ``ecp`` onto dictionaries of library names and element lists.
+
+        The index is loaded from the cache on disk, unless files were added to or removed from the library after the
+        index was created.
+        """
+        if self._index is None:
+            cache_file = _get_cache_directory() / 'basis_index.json'
+            mtime = self.path.stat().st_mtime
+
+            try:
+                with cache_file.open(encoding='utf-8') as handle:
+                    cached = json.load(handle)
+            except (OSError, ValueError):
+                cached = {}
+
+            entry = cached.get(str(self.path.resolve()), {})
+            if entry.get('mtime') == mtime:
+                self._index = entry['index']
+            else:
+                self._index = self._build_index()
+                cached[str(self.path.resolve())] = {'mtime': mtime, 'index': self._index}
+                try:
+                    cache_file.parent.mkdir(parents=True, exist_ok=True)
+                    with cache_file.open('w', encoding='utf-8') as handle:
+                        json.dump(cached, handle)
+                except OSError:
+                    pass
+
+        return self._index
+
+    def _build_index(self):
+        """Scan all files of the library and return the index of the elements defined per basis set and ECP."""
+        index = {'basis': {}, 'ecp': {}}
+
+        for filepath in sorted(self.path.iterdir()):
+            if not filepath.is_file():
+                continue
+            with filepath.open(encoding='utf-8', errors='replace') as handle:
+                for line in handle:
+                    result = REGEX_HEADER.match(line)
+                    if result:
+                        elements = index[result.group(1).lower()].setdefault(filepath.name.lower(), [])
+                        element = result.group(2).capitalize()
+                        if element not in elements:
+                            elements.append(element)
+
+        return index
+
+    def get_elements(self, name, kind='basis'):
+        """Return the elements for which the library defines the given basis set or ECP.
+
+        :param name: the name of the basis set, e.g. ``6-31g*``.
+        :param kind: either ``basis`` or ``ecp``.
+        :raises KeyError: if the library does not define a basis set or ECP with that name.
+        """
+        try:
+            return self.index[kind][name.lower()]
+        except KeyError:
+            raise KeyError(f'the NWChem library does not define the {kind} `{name}`.')
+
+    def get_block(self, element, name, kind='basis'):
+        """Return the lines of the definition of the basis set or ECP for a given element.
+
+        :param element: the symbol of the element.
+        :param name: the name of the basis set, e.g. ``6-31g*``.
+        :param kind: either ``basis`` or ``ecp``.
+        :raises KeyError: if the library does not define the basis set or ECP for that element.
+        """
+        filepath = self.path / name.lower()
+        lines = []
+        state = None
+
+        if filepath.is_file():
+            with filepath.open(encoding='utf-8', errors='replace') as handle:
+                for line in handle:
+                    result = REGEX_HEADER.match(line)
+                    if result:
+                        matches = result.group(1).lower() == kind and result.group(2).lower() == element.lower()
+                        state = 'block' if matches else None
+                        continue
+                    if state == 'block':
+                        if REGEX_END.match(line):
+                            break
+                        if line.strip() and not line.lstrip().startswith('#'):
+                            lines.append(line.rstrip('\n'))
+
+        if not lines:
+            raise KeyError(f'the NWChem library does not define the {kind} `{name}` for element `{element}`.')
+
+        return lines
+
+
+@functools.lru_cache(maxsize=None)
+def _get_basis_library(path):
+    """Return the ``BasisLibrary`` for a given path, such that its index is only loaded once per path."""
+    return BasisLibrary(path)
+
+
+def get_basis_library():
+    """Return the ``BasisLibrary`` defined by the ``NWCHEM_BASIS_LIBRARY`` environment variable, if any.
+
+    :return: the ``BasisLibrary`` or ``None`` if the environment variable is not set or does not point to a directory.
+    """
+    path = os.environ.get(ENVIRONMENT_VARIABLE, None)
+    if not path or not os.path.isdir(path):
+        return None
+    return _get_basis_library(os.path.abspath(path))
+
+
+@functools.lru_cache(maxsize=None)
+def get_basis_block(element, name, kind='basis', library_path=None):
+    """Return the lines of the definition of a basis set or ECP for a given element from the NWChem library.
+
+    Results are memoised per element and basis set.
+
+    :param element: the symbol of the element.
+    :param name: the name of the basis set, e.g. ``6-31g*``.
+    :param kind: either ``basis`` or ``ecp``.
+    :param library_path: the path to the NWChem library, by default the one defined by ``NWCHEM_BASIS_LIBRARY``.
+    :raises KeyError: if the library does not define the basis set or ECP for that element.
+    :raises ValueError: if no NWChem library could be found.
+    """
+    library = _get_basis_library(os.path.abspath(library_path)) if library_path else get_basis_library()
+    if library is None:
+        raise ValueError(f'no NWChem basis library found, set the `{ENVIRONMENT_VARIABLE}` environment variable.')
+    return tuple(library.get_block(element, name, kind))
+
+
+def get_missing_kinds(basis, structure):
+    """Return the names of the kinds of ``structure`` for which ``basis`` does not define a basis set.
+
+    A kind is covered if either its name, the symbol of its element or the wildcard ``*`` is a key of ``basis``.
+
+    :param basis: dictionary mapping atom tags onto basis sets.
+    :param structure: the ``StructureData``.
+    """
+    tags = {str(tag).lower() for tag in basis}
+    if '*' in tags:
+        return []
+    return [kind.name for kind in structure.kinds if kind.name.lower() not in tags and kind.symbol.lower() not in tags]
+
+
+def validate_basis(basis, structure, kind='basis', library=None):
+    """Validate that ``basis`` covers all kinds of ``structure`` and that its library entries exist.
+
+    The library entries are only checked if a ``BasisLibrary`` is passed or can be found through the
+    ``NWCHEM_BASIS_LIBRARY`` environment variable.
+
+    :param basis: dictionary mapping atom tags onto basis sets, e.g. ``{'H': 'library 6-31g'}``.
+    :param structure: the ``StructureData``.
+    :param kind: either ``basis`` or ``ecp``.
+    :param library: optional ``BasisLibrary`` to check the library entries against.
+    :return: an error message or ``None`` if the basis is valid.
+    """
+    if kind == 'basis':
+        missing = get_missing_kinds(basis, structure)
+        if missing:
+            return f'the `basis` does not define a basis set for the kinds: {", ".join(missing)}.'
+
+    library = library or get_basis_library()
+    if library is None:
+        return None
+
+    symbols = {kind.name.lower(): kind.symbol for kind in structure.kinds}
+    for tag, value in basis.items():
+        name = parse_library_name(value)
+        if name is None:
+            continue
+        try:
+            elements = library.get_elements(name, kind)
+        except KeyError as exception:
+            return exception.args[0]
+        if tag == '*':
+            tag_elements = {kind.symbol for kind in structure.kinds}
+        else:
+            tag_elements = {symbols.get(str(tag).lower(), str(tag).capitalize())}
+        missing = sorted(tag_elements - set(elements))
+        if missing:
+            return f'the {kind} `{name}` of the NWChem library is not defined for: {", ".join(missing)}.'
+
+    return None
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Parsers of the auxiliary files written by NWChem, which extract compact data from bulky files.
+
+Files listed in the ``retrieve_temporary_files`` option of a calculation are retrieved temporarily, such that they are
+never stored in the repository. Those with a name that matches a pattern of ``FILE_PARSERS`` are parsed into arrays,
+which are stored as an ``ArrayData`` in the ``output_files`` namespace, after which AiiDA discards the files. The
+parsers can take keyword arguments, which are set per parser with the ``file_parser_settings`` option, e.g.
+``{'cube': {'stride': 2}}``.
+"""
+import fnmatch
+import mmap
+import re
+
+import numpy as np
+
+__all__ = ('FILE_PARSERS', 'get_file_parser', 'get_output_label', 'parse_cube', 'parse_hessian')
+
+BOHR_TO_ANGSTROM = 0.529177210903
+
+# Number of bytes of the volumetric data of a cube file that are converted at once
+CUBE_CHUNK_SIZE = 2**24
+
+
+def parse_hessian(filepath):
+    """Parse the Hessian written to the ``.hess`` file by a frequency calculation.
+
+    The file contains the lower triangle of the Cartesian Hessian, row by row, in Hartree/bohr^2, with numbers in
+    Fortran notation, e.g. ``0.5123D+00``.
+
+    :param filepath: the path of the file.
+    :return: dictionary with the full, symmetric ``hessian`` array.
+    """
+    values = np.array(filepath.read_text(encoding='utf-8').replace('D', 'E').replace('d', 'e').split(), np.float64)
+
+    # The number of values of the lower triangle of a matrix of dimension n is n(n + 1) / 2
+    dimension = int(round((np.sqrt(8 * values.size + 1) - 1) / 2))
+    if dimension * (dimension + 1) // 2 != values.size:
+        raise ValueError(f'{values.size} values do not form the lower triangle of a square matrix.')
+
+    hessian = np.zeros((dimension, dimension))
+    hessian[np.tril_indices(dimension)] = values
+    hessian = hessian + np.tril(hessian, -1).T
+
+    return {'hessian': hessian}
+
+
+def _get_cube_slices(shape, stride, region):
+    """Return the slices of the grid of a cube file that are kept, for each of its axes."""
+    region = region or [[0, size] for size in shape]
+    slices = []
+    for size, (start, stop) in zip(shape, region):
+        start, stop, _ = slice(start, stop).indices(size)
+        slices.append(slice(start, max(start, stop), stride))
+    return slices
+
+
+def parse_cube(filepath, stride=1, region=None):
+    """Parse the volumetric data of a cube file, such as written by the ``dplot`` module, into a grid.
+
+    The file is memory-mapped and the volumetric data is converted in chunks, keeping only the planes of the grid that
+    are within the ``region`` and on the ``stride``, such that grids that do not fit in memory can be downsampled. The
+    reading stops after the last plane of the region.
+
+    :param filepath: the path of the file.
+    :param stride: keep only every ``stride``-th point of the grid along each axis.
+    :param region: optional list with the ``[start, stop)`` indices of the points of the grid that are kept along each
+        of the three axes, before downsampling.
+    :return: dictionary with the ``grid``, the ``origin`` of its first point and the ``voxel`` vectors between points,
+        in Angstrom, and the ``atomic_numbers`` and ``positions`` in Angstrom of the atoms.
+    """
+    if not isinstance(stride, int) or stride < 1:
+        raise ValueError(f'the stride should be a positive integer, got {stride}.')
+
+    with open(filepath, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        data.readline()
+        data.readline()
+        num_atoms, *origin = data.readline().split()[:4]
+        num_atoms = int(num_atoms)
+        axes = [data.readline().split()[:4] for _ in range(3)]
+        atoms = np.array([data.readline().split()[:5] for _ in range(abs(num_atoms))], np.float64).reshape(-1, 5)
+        if num_atoms < 0:
+            # The line after the atoms lists the orbitals of which the grid contains the values
+            if int(data.readline().split()[0]) != 1:
+                raise ValueError('only cube files with the values of a single orbital are supported.')
+
+        shape = [abs(int(axis[0])) for axis in axes]
+        # A negative number of points means that the lengths are in Angstrom instead of bohr
+        units = [1. if int(axis[0]) < 0 else BOHR_TO_ANGSTROM for axis in axes]
+        voxel = np.array([axis[1:] for axis in axes], np.float64) * np.array(units)[:, None]
+        origin = np.array(origin, np.float64) * units[0]
+
+        slices = _get_cube_slices(shape, stride, region)
+        planes = range(*slices[0].indices(shape[0]))
+        grid = np.empty([len(range(*item.indices(size))) for item, size in zip(slices, shape)], np.float64)
+
+        plane_size = shape[1] * shape[2]
+        values = np.empty(0, np.float64)
+        remainder = b''
+        index = 0
+        while index < planes.stop and len(planes) > 0:
+            chunk = remainder + data.read(CUBE_CHUNK_SIZE)
+            if len(chunk) == len(remainder):
+                raise ValueError(f'the cube file contains fewer than {shape[0]} planes of the grid.')
+            # The last token of the chunk may continue in the next chunk
+            split = max(chunk.rfind(b' '), chunk.rfind(b'\n'))
+            if split >= 0 and data.tell() < len(data):
+                chunk, remainder = chunk[:split], chunk[split:]
+            else:
+                remainder = b''
+            values = np.concatenate((values, np.array(chunk.split(), np.float64)))
+
+            num_planes = min(values.size // plane_size, planes.stop - index)
+            for plane in range(num_planes):
+                if index + plane in planes:
+                    values_plane = values[plane * plane_size:(plane + 1) * plane_size].reshape(shape[1], shape[2])
+                    grid[planes.index(index + plane)] = values_plane[slices[1], slices[2]]
+            values = values[num_planes * plane_size:]
+            index += num_planes
+
+    return {
+        'grid': grid,
+        'origin': origin + np.array([item.start for item in slices]) @ voxel,
+        'voxel': voxel * stride,
+        'atomic_numbers': atoms[:, 0].astype(np.int64),
+        'positions': atoms[:, 2:] * units[0],
+    }
+
+
+# Parsers of the auxiliary files, by name, with the pattern of the names of the files they parse
+FILE_PARSERS = {
+    'hessian': ('*.hess', parse_hessian),
+    'cube': ('*.cube', parse_cube),
+}
+
+
+def get_file_parser(filename):
+    """Return the name and parser of an auxiliary file, or ``None`` if there is no parser for it.
+
+    :param filename: the name of the file.
+    """
+    for name, (pattern, parser) in FILE_PARSERS.items():
+        if fnmatch.fnmatch(filename, pattern):
+            return name, parser
+    return None
+
+
+def get_output_label(filename):
+    """Return the link label of the output for an auxiliary file, e.g. ``aiida_hess`` for ``aiida.hess``.
+
+    A valid link label cannot start with a digit or an underscore, nor contain double underscores, which separate
+    namespaces. Therefore, consecutive non-word characters are collapsed into a single underscore, leading and
+    trailing underscores are stripped and a label that starts with a digit is prefixed with ``file_``, e.g.
+    ``file_1_hess`` for ``1.hess``.
+
+    :param filename: the name of the file.
+    """
+    label = re.sub(r'[\W_]+', '_', filename).strip('_')
+    if label[:1].isdigit():
+        label = f'file_{label}'
+    return label
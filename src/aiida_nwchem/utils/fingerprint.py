@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Canonical fingerprints of ``NwchemCalculation`` inputs.
+
+The hash AiiDA uses for caching a ``CalcJob`` is built from the hashes of its input nodes, so two structures that only
+differ in the order of their sites, or by floating point noise well below the precision NWChem works with, end up
+as two different calculations. The functions in this module reduce a structure to a canonical form, such that
+equivalent inputs produce nodes with identical hashes and AiiDA's caching mechanism can reuse existing results.
+"""
+import hashlib
+import json
+
+from aiida import orm
+from aiida.engine import calcfunction
+import numpy as np
+
+__all__ = ('canonicalize_structure', 'get_canonical_structure', 'get_input_fingerprint')
+
+#: Number of decimals (in Angstrom) to which positions and cell vectors are rounded.
+DEFAULT_DECIMALS = 6
+
+
+def _round(array, decimals):
+    """Round an array and get rid of negative zeros, which would otherwise make the fingerprint sign dependent."""
+    return np.round(np.asarray(array, dtype=np.float64), decimals) + 0.
+
+
+def get_canonical_structure(structure, decimals=DEFAULT_DECIMALS):
+    """Return an unstored copy of ``structure`` in canonical form.
+
+    Kinds are sorted by name, sites are sorted by kind name and rounded cartesian position and the cell and all
+    positions are rounded to ``decimals`` decimals.
+
+    :param structure: the ``StructureData`` to canonicalize.
+    :param decimals: the number of decimals to which positions and cell vectors are rounded.
+    :return: a new, unstored ``StructureData``.
+    """
+    canonical = orm.StructureData(cell=_round(structure.cell, decimals).tolist(), pbc=structure.pbc)
+
+    for kind in sorted(structure.kinds, key=lambda kind: kind.name):
+        canonical.append_kind(kind)
+
+    sites = [(site.kind_name, tuple(_round(site.position, decimals).tolist())) for site in structure.sites]
+    for kind_name, position in sorted(sites):
+        canonical.append_site(orm.Site(kind_name=kind_name, position=position))
+
+    return canonical
+
+
+def get_input_fingerprint(parameters, structure, add_cell=False, decimals=DEFAULT_DECIMALS):
+    """Return a fingerprint of the inputs that determine the NWChem input file of an ``NwchemCalculation``.
+
+    Equivalent inputs, i.e. structures that only differ in site order or below the rounding precision and parameters
+    that only differ in key order, result in the same fingerprint.
+
+    :param parameters: the input parameters, either as a ``Dict`` node or a plain dictionary.
+    :param structure: the input ``StructureData``.
+    :param add_cell: whether the cell is written to the input file.
+    :param decimals: the number of decimals to which positions and cell vectors are rounded.
+    :return: the hexadecimal SHA-256 digest of the canonical inputs.
+    """
+    if isinstance(parameters, orm.Dict):
+        parameters = parameters.get_dict()
+
+    canonical = get_canonical_structure(structure, decimals)
+    content = {
+        'parameters': parameters,
+        'add_cell': bool(add_cell),
+        'cell': canonical.cell if add_cell else None,
+        'pbc': canonical.pbc,
+        'kinds': [kind.get_raw() for kind in canonical.kinds],
+        'sites': [site.get_raw() for site in canonical.sites],
+    }
+    serialized = json.dumps(content, sort_keys=True, default=str)
+
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+@calcfunction
+def canonicalize_structure(structure, decimals=None):
+    """Return the canonical form of ``structure`` as computed by :func:`get_canonical_structure`.
+
+    Since the hash of a ``Data`` node only depends on its attributes, the outputs of this function for equivalent
+    structures have the same hash, which allows an ``NwchemCalculation`` that takes them as input to be cached.
+    """
+    decimals = decimals.value if decimals is not None else DEFAULT_DECIMALS
+    return get_canonical_structure(structure, decimals)
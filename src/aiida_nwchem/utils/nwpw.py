@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Selection of the plane-wave cutoffs of periodic NWPW calculations.
+
+The wave function cutoff is chosen as the largest cutoff recommended for the elements of the structure, as given by
+hints for the pseudopotentials that are used, for example from their convergence tests. The density cutoff is twice the
+wave function cutoff, as is the default of NWPW.
+"""
+__all__ = ('get_cutoffs',)
+
+# The cutoffs of NWPW are in Hartree
+DEFAULT_WAVEFUNCTION_CUTOFF = 30.0
+DENSITY_CUTOFF_RATIO = 2.0
+
+
+def get_cutoffs(structure, hints):
+    """Return the wave function and density cutoffs in Hartree for the elements of a structure.
+
+    :param structure: the ``StructureData``.
+    :param hints: dictionary mapping element symbols onto their recommended wave function cutoff in Hartree. Elements
+        without a hint are assumed to require the default cutoff of NWPW.
+    :return: dictionary with the ``wavefunction_cutoff`` and ``density_cutoff``.
+    """
+    symbols = {kind.symbol for kind in structure.kinds}
+    wavefunction_cutoff = max(float(hints.get(symbol, DEFAULT_WAVEFUNCTION_CUTOFF)) for symbol in symbols)
+    return {
+        'wavefunction_cutoff': wavefunction_cutoff,
+        'density_cutoff': DENSITY_CUTOFF_RATIO * wavefunction_cutoff,
+    }
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Monitoring of the convergence of geometry optimizations from the table of their steps.
+
+At the end of each step, the ``driver`` of NWChem prints a line starting with ``@`` with the step number, energy,
+energy change, maximum and root mean square of the gradient and of the step, and the wall time, e.g.::
+
+    @ Step       Energy      Delta E   Gmax     Grms     Xrms     Xmax   Walltime
+    @ ---- ---------------- -------- -------- -------- -------- -------- --------
+    @    2     -74.96587612 -6.9E-03  0.02406  0.02213  0.00200  0.00200      1.5
+
+An optimization that keeps going back and forth between geometries, such that its energy goes up and down, is
+``oscillating``, while one of which the energy and gradient no longer decrease is ``stagnating``. Neither will converge
+within the maximum number of steps, so ``monitor_optimization`` can be added to the ``monitors`` of a calculation to
+kill it as soon as it is detected, after which it can be restarted with a smaller trust radius or a fresh Hessian.
+The status for which the calculation was killed is stored as an extra of its node, such that the parser reports it
+even if the monitor was configured with other settings than the default ones of the parser.
+"""
+import re
+
+import numpy as np
+
+__all__ = (
+    'EXTRA_OPTIMIZATION_STATUS', 'OPTIMIZATION_COLUMNS', 'analyze_optimization', 'monitor_optimization',
+    'parse_optimization_table'
+)
+
+EXTRA_OPTIMIZATION_STATUS = 'nwchem_optimization_status'
+
+# Columns of the table of the steps, in Hartree, Hartree/bohr, bohr and seconds
+OPTIMIZATION_COLUMNS = ('step', 'energy', 'delta_e', 'gmax', 'grms', 'xrms', 'xmax', 'walltime')
+
+REGEX_OPTIMIZATION_STEP = re.compile(r'^@\s*(\d+)((?:\s+[\-+\d\.EeDd]+){7})')
+
+
+def parse_optimization_table(lines):
+    """Parse the table of the steps of a geometry optimization.
+
+    The last step is printed again when the optimization converged, in which case the last line of a step is kept.
+
+    :param lines: the lines of the output of the optimization.
+    :return: array with one row per step, in order, and the ``OPTIMIZATION_COLUMNS`` as columns.
+    """
+    rows = {}
+    for line in lines:
+        result = REGEX_OPTIMIZATION_STEP.match(line)
+        if result:
+            rows[int(result.group(1))] = result.group(2).replace('D', 'E').replace('d', 'e').split()
+
+    table = np.array([[step, *rows[step]] for step in sorted(rows)], np.float64)
+    return table.reshape(-1, len(OPTIMIZATION_COLUMNS))
+
+
+def analyze_optimization(table, window=6, energy_tolerance=1e-6, gradient_ratio=0.8):
+    """Analyze the convergence of a geometry optimization from the last steps of the table of its steps.
+
+    The optimization is ``oscillating`` if the sign of the energy change between consecutive steps, ignoring changes
+    smaller than the ``energy_tolerance``, is reversed at least ``window // 2`` times over the last ``window`` steps.
+    It is ``stagnating`` if, over those steps, the energy decreased by less than the ``energy_tolerance`` and the
+    maximum gradient by less than a factor ``gradient_ratio``. Otherwise, or if there are fewer steps than the
+    ``window``, it is ``converging``.
+
+    :param table: the table of the steps, as returned by ``parse_optimization_table``.
+    :param window: the number of last steps that are analyzed.
+    :param energy_tolerance: the energy change in Hartree below which the energy is considered unchanged.
+    :param gradient_ratio: the ratio of the maximum gradient of the last step to that of the first step of the window
+        above which the gradient is considered unchanged.
+    :return: dictionary with the ``status``, the ``num_steps``, the ``lowest_energy_step`` and, if there are enough
+        steps, the ``energy_change``, number of ``energy_reversals`` and ``gradient_ratio`` over the last steps.
+    """
+    if window < 3:
+        raise ValueError(f'the window should contain at least 3 steps, got {window}.')
+
+    table = np.asarray(table, np.float64).reshape(-1, len(OPTIMIZATION_COLUMNS))
+    energies = table[:, 1]
+    analysis = {'status': 'converging', 'num_steps': len(table)}
+
+    if len(table) == 0:
+        return analysis
+
+    analysis['lowest_energy_step'] = int(table[np.argmin(energies), 0])
+
+    if len(table) < window:
+        return analysis
+
+    changes = np.diff(energies[-window:])
+    signs = np.sign(changes[np.abs(changes) > energy_tolerance])
+    reversals = int(np.count_nonzero(signs[1:] != signs[:-1]))
+    energy_change = float(energies[-1] - energies[-window])
+    gradients = table[-window:, 3]
+    ratio = float(gradients[-1] / gradients[0]) if gradients[0] > 0 else 1.
+
+    if reversals >= window // 2:
+        analysis['status'] = 'oscillating'
+    elif energy_change > -energy_tolerance and ratio > gradient_ratio:
+        analysis['status'] = 'stagnating'
+
+    analysis.update({'energy_change': energy_change, 'energy_reversals': reversals, 'gradient_ratio': ratio})
+    return analysis
+
+
+def monitor_optimization(node, transport, window=6, energy_tolerance=1e-6, gradient_ratio=0.8):
+    """Monitor of a running calculation that kills it when its geometry optimization is oscillating or stagnating.
+
+    Only the lines of the table of the steps are read from the output file on the remote, such that large outputs are
+    not transferred. The detected status is stored as the ``EXTRA_OPTIMIZATION_STATUS`` extra of the node, with which
+    the parser then fails the calculation with the exit code of the status. It is added to a calculation with the
+    ``monitors`` input, e.g. ``{'optimization': Dict({'entry_point': 'nwchem.optimization'})}``.
+
+    :param node: the node of the calculation.
+    :param transport: an open transport to the computer of the calculation.
+    :param window: the number of last steps that are analyzed, see ``analyze_optimization``.
+    :param energy_tolerance: the energy change in Hartree below which the energy is considered unchanged.
+    :param gradient_ratio: the ratio of the maximum gradient above which the gradient is considered unchanged.
+    :return: a ``CalcJobMonitorResult`` if the optimization should be stopped, ``None`` otherwise.
+    """
+    from aiida.common.escaping import escape_for_bash
+    from aiida.engine.processes.calcjobs.monitors import CalcJobMonitorResult
+
+    filename = node.get_option('output_filename')
+    _, stdout, _ = transport.exec_command_wait(
+        f'grep -a "^@" {escape_for_bash(filename)}', workdir=node.get_remote_workdir()
+    )
+
+    analysis = analyze_optimization(
+        parse_optimization_table(stdout.splitlines()),
+        window=window,
+        energy_tolerance=energy_tolerance,
+        gradient_ratio=gradient_ratio,
+    )
+    if analysis['status'] == 'converging':
+        return None
+
+    node.base.extras.set(EXTRA_OPTIMIZATION_STATUS, analysis['status'])
+    return CalcJobMonitorResult(
+        message=f'the geometry optimization is {analysis["status"]} after {analysis["num_steps"]} steps.',
+        override_exit_code=False,
+    )
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Selection of the files of a previous calculation that are transferred to restart from it.
+
+Restart files, in particular the amplitudes of TCE calculations, can be very large. Which files are transferred, and
+how, is controlled by a restart-transfer policy, a dictionary with the following optional keys:
+
+* ``include``: the extensions of the files to transfer, by default all of ``DEFAULT_EXTENSIONS``.
+* ``exclude``: extensions that should not be transferred, even if included.
+* ``max_size``: the size in MB above which files are not copied. Linked files are not subject to this threshold.
+* ``link``: how files are linked if the previous calculation ran on the same computer: ``symlink`` (the default),
+  ``hardlink`` or ``copy``. Hard links fall back to a copy if both folders are not on the same filesystem.
+* ``checksums``: if ``True``, the SHA-256 checksums of the transferred files are computed on the remote computer
+  before NWChem starts.
+
+Files with the extensions of ``COPY_EXTENSIONS`` are always copied, since they are written to in place by the next
+calculation, which would otherwise modify the files of the previous calculation.
+"""
+import re
+import shlex
+
+__all__ = ('DEFAULT_EXTENSIONS', 'RestartFile', 'get_hardlink_commands', 'get_restart_files', 'validate_restart_policy')
+
+DEFAULT_EXTENSIONS = ('db', 'movecs', 't1amp', 't2amp', 'drv.hess')
+COPY_EXTENSIONS = ('db', 'drv.hess')
+LINK_MODES = ('symlink', 'hardlink', 'copy')
+
+BYTES_PER_MB = 1024**2
+
+
+class RestartFile:
+    """A file of the restart folder and the action taken to transfer it.
+
+    :param name: the name of the file.
+    :param extension: the restart extension matched by the file.
+    :param size: the size of the file in bytes, or ``None`` if unknown.
+    :param action: one of ``copy``, ``symlink``, ``hardlink`` or ``skip``.
+    """
+
+    def __init__(self, name, extension, size, action):
+        self.name = name
+        self.extension = extension
+        self.size = size
+        self.action = action
+
+    def as_dict(self):
+        """Return the file as a dictionary for the transfer manifest."""
+        return {'name': self.name, 'extension': self.extension, 'size': self.size, 'action': self.action}
+
+
+def validate_restart_policy(policy):
+    """Validate a restart-transfer policy.
+
+    :param policy: the dictionary of the policy.
+    :return: an error message or ``None`` if the policy is valid.
+    """
+    unknown = set(policy) - {'include', 'exclude', 'max_size', 'link', 'checksums'}
+    if unknown:
+        return f'unknown keys in the restart-transfer policy: {", ".join(sorted(unknown))}.'
+
+    for key in ('include', 'exclude'):
+        if not isinstance(policy.get(key, []), (list, tuple)):
+            return f'the `{key}` of the restart-transfer policy should be a list of extensions.'
+
+    max_size = policy.get('max_size', None)
+    if max_size is not None and (isinstance(max_size, bool) or not isinstance(max_size, (int, float)) or max_size < 0):
+        return 'the `max_size` of the restart-transfer policy should be a positive number of MB.'
+
+    if policy.get('link', 'symlink') not in LINK_MODES:
+        return f'the `link` of the restart-transfer policy should be one of: {", ".join(LINK_MODES)}.'
+
+    return None
+
+
+def _match_extension(name, extensions):
+    """Return the extension matched by the name of a file, e.g. ``t1amp`` for ``aiida.t1amp.0001``, or ``None``."""
+    for extension in extensions:
+        if re.fullmatch(r'[^/]+\.' + re.escape(extension) + r'(\.\d+)?', name):
+            return extension
+    return None
+
+
+def get_restart_files(entries, policy, same_computer):
+    """Return the files of the restart folder that should be transferred according to the policy.
+
+    :param entries: the files of the restart folder, as a list of tuples of the name and size in bytes. The size can
+        be ``None`` if it is unknown, in which case the ``max_size`` does not apply.
+    :param policy: the dictionary of the restart-transfer policy.
+    :param same_computer: whether the restart folder is on the computer of the new calculation.
+    :return: list of ``RestartFile``, including those that are skipped because of their size.
+    """
+    exclude = set(policy.get('exclude', []))
+    extensions = [extension for extension in policy.get('include', DEFAULT_EXTENSIONS) if extension not in exclude]
+    max_size = policy.get('max_size', None)
+    link = policy.get('link', 'symlink') if same_computer else 'copy'
+
+    restart_files = []
+
+    for name, size in entries:
+        extension = _match_extension(name, extensions)
+        if extension is None:
+            continue
+
+        action = 'copy' if extension in COPY_EXTENSIONS else link
+        if action == 'copy' and max_size is not None and size is not None and size > max_size * BYTES_PER_MB:
+            action = 'skip'
+
+        restart_files.append(RestartFile(name, extension, size, action))
+
+    return restart_files
+
+
+def get_hardlink_commands(restart_files, remote_path):
+    """Return the shell commands that hard link the files, or copy them if that is not possible.
+
+    :param restart_files: list of ``RestartFile``.
+    :param remote_path: the absolute path of the restart folder.
+    """
+    commands = []
+    for restart_file in restart_files:
+        if restart_file.action == 'hardlink':
+            source = shlex.quote(f'{remote_path}/{restart_file.name}')
+            target = shlex.quote(restart_file.name)
+            commands.append(f'ln -f {source} {target} 2>/dev/null || cp {source} {target}')
+    return commands
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Scaling models of the wall time with the number of MPI processes and recommendations derived from them.
+
+The wall times measured for a ladder of process counts are fitted to Amdahl's law, ``T(p) = a + b / p``, where ``a``
+is the time of the serial part and ``b`` that of the part that parallelizes perfectly. The recommended number of
+processes is the largest one of the ladder for which the parallel efficiency of the fitted model, relative to the
+smallest process count, is still above a threshold, such that the noise of single benchmarks is averaged out.
+
+Recommendations are stored as the output of the ``NwchemScalingWorkChain``, with the size class of the benchmarked
+system as an extra, such that they can be looked up for later calculations of systems in the same class.
+"""
+import math
+
+from aiida import orm
+
+__all__ = ('fit_scaling', 'get_recommended_resources', 'get_size_class')
+
+EXTRA_SIZE_CLASS = 'nwchem_scaling_size_class'
+
+
+def get_size_class(structure, parameters):
+    """Return the size class of a calculation, based on its theory, basis sets and number of atoms.
+
+    The number of atoms is rounded up to the next power of two, such that systems of similar size share a class.
+
+    :param structure: the ``StructureData``.
+    :param parameters: the parameter dictionary of the calculation.
+    :return: the size class as a string, e.g. ``dft:library 6-31g*:16``.
+    """
+    task = parameters.get('task', '')
+    if isinstance(task, (list, tuple)):
+        task = task[-1]['task'] if isinstance(task[-1], dict) else task[-1]
+    theory = str(task).split()[0].lower() if str(task).split() else 'unknown'
+
+    basis = parameters.get('basis', {})
+    basis = ','.join(sorted({str(value).lower() for value in basis.values()})) if isinstance(basis, dict) else ''
+
+    num_atoms = 2**math.ceil(math.log2(max(len(structure.sites), 1)))
+
+    return f'{theory}:{basis}:{num_atoms}'
+
+
+def fit_scaling(num_mpiprocs, wall_times, efficiency_threshold):
+    """Fit the wall times to Amdahl's law and return the recommended number of processes.
+
+    :param num_mpiprocs: the numbers of processes of the benchmarks.
+    :param wall_times: the corresponding wall times.
+    :param efficiency_threshold: the minimum parallel efficiency of the recommended number of processes.
+    :return: dictionary with the ``serial_time`` and ``parallel_time`` of the fit, the ``serial_fraction``, the
+        measured ``efficiencies`` of the benchmarks, the ``model_efficiencies`` of the fit and the recommended
+        ``num_mpiprocs``.
+    """
+    points = sorted(zip(num_mpiprocs, wall_times))
+    count = len(points)
+
+    # Linear least squares of the wall time as a function of the inverse number of processes
+    inverse = [1. / num for num, _ in points]
+    times = [time for _, time in points]
+    mean_inverse = sum(inverse) / count
+    mean_time = sum(times) / count
+    variance = sum((value - mean_inverse)**2 for value in inverse)
+    covariance = sum((value - mean_inverse) * (time - mean_time) for value, time in zip(inverse, times))
+    parallel_time = covariance / variance if variance else 0.
+    serial_time = mean_time - parallel_time * mean_inverse
+
+    # Efficiency relative to the smallest number of processes of the ladder, measured and of the fitted model
+    reference = points[0][0] * points[0][1]
+    efficiencies = [reference / (num * time) if time else 0. for num, time in points]
+    model_times = [serial_time + parallel_time / num for num, _ in points]
+    model_reference = points[0][0] * model_times[0]
+    model_efficiencies = [
+        model_reference / (num * time) if time > 0 else 0. for (num, _), time in zip(points, model_times)
+    ]
+
+    recommended = points[0][0]
+    for (num, _), efficiency in zip(points, model_efficiencies):
+        if efficiency >= efficiency_threshold:
+            recommended = num
+
+    total = serial_time + parallel_time
+    return {
+        'num_mpiprocs': [num for num, _ in points],
+        'wall_times': times,
+        'efficiencies': efficiencies,
+        'model_efficiencies': model_efficiencies,
+        'serial_time': serial_time,
+        'parallel_time': parallel_time,
+        'serial_fraction': serial_time / total if total else None,
+        'recommended_num_mpiprocs': recommended,
+    }
+
+
+def get_recommended_resources(structure, parameters):
+    """Return the resources recommended by the most recent scaling benchmark of the same size class.
+
+    :param structure: the ``StructureData``.
+    :param parameters: the parameter dictionary of the calculation.
+    :return: the ``resources`` dictionary for the ``metadata.options``, or ``None`` if no benchmark of the size class
+        was run.
+    """
+    builder = orm.QueryBuilder()
+    builder.append(
+        orm.Dict,
+        filters={f'extras.{EXTRA_SIZE_CLASS}': get_size_class(structure, parameters)},
+        project=['attributes.resources'],
+    )
+    builder.order_by({orm.Dict: {'ctime': 'desc'}})
+    result = builder.first(flat=True)
+
+    return result
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Creation of ``StructureData`` nodes for the geometries parsed from the output.
+
+NWChem prints each atom with the tag of the geometry block, which is the kind name of the input structure. The output
+structures therefore get the kinds, cell and periodic boundary conditions of the input structure, with only the
+positions, and the cell if it was optimized, taken from the output. Appending the sites one by one validates each site
+against all kinds, so the kinds and sites are set in one go instead, which matters for large structures and when many
+structures are created with the same kinds.
+"""
+import re
+
+from aiida import orm
+from aiida.orm.nodes.data.structure import Kind, is_valid_symbol
+
+__all__ = ('create_structure', 'get_kinds', 'get_symbol')
+
+REGEX_TAG_ELEMENT = re.compile(r'^([A-Za-z])([A-Za-z]?)')
+
+
+def get_symbol(tag):
+    """Return the element of a tag of the geometry block, following NWChem.
+
+    The element is given by the first two letters of the tag, if they form a symbol, or else by its first letter, e.g.
+    ``H1`` is hydrogen and ``Ca2`` calcium. Tags that do not start with an element, such as ``bq`` for ghost atoms, are
+    mapped onto the unknown element ``X``.
+
+    :param tag: the tag of an atom.
+    """
+    result = REGEX_TAG_ELEMENT.match(tag)
+    if result is None or tag.lower().startswith('bq'):
+        return 'X'
+    first, second = result.group(1).upper(), result.group(2).lower()
+    if second and is_valid_symbol(first + second):
+        return first + second
+    if is_valid_symbol(first):
+        return first
+    return 'X'
+
+
+def get_kinds(tags, reference=None):
+    """Return the kinds of the atoms with the given tags.
+
+    :param tags: the tags of the atoms, as printed by NWChem.
+    :param reference: optional ``StructureData`` of which the kinds are used if its kind names are the tags.
+    :return: list of the raw kinds, as stored in the attributes of a ``StructureData``.
+    """
+    if reference is not None and [site.kind_name for site in reference.sites] == list(tags):
+        return [kind.get_raw() for kind in reference.kinds]
+
+    return [Kind(symbols=get_symbol(tag), name=tag).get_raw() for tag in dict.fromkeys(tags)]
+
+
+def create_structure(kinds, tags, positions, cell=None, pbc=None):
+    """Create a ``StructureData`` from the kinds and the positions of the atoms.
+
+    :param kinds: the raw kinds, as returned by ``get_kinds``, which can be shared by many structures.
+    :param tags: the kind names of the atoms.
+    :param positions: array with the positions of the atoms in Angstrom.
+    :param cell: the cell in Angstrom, the default cell of ``StructureData`` is used if not specified.
+    :param pbc: the periodic boundary conditions, by default periodic if and only if a cell is specified.
+    :return: the ``StructureData``.
+    """
+    if pbc is None:
+        pbc = (cell is not None,) * 3
+
+    structure = orm.StructureData(pbc=pbc) if cell is None else orm.StructureData(cell=cell, pbc=pbc)
+    structure.base.attributes.set_many({
+        'kinds': [dict(kind) for kind in kinds],
+        'sites': [{
+            'kind_name': tag,
+            'position': position
+        } for tag, position in zip(tags, positions.tolist())],
+    })
+
+    return structure
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Symmetry of the input structure.
+
+For molecules, NWChem detects the point group itself with the ``autosym`` directive of the geometry, which also
+symmetrizes the coordinates within its tolerance, and the detected group is parsed from the output. NWChem may then
+also translate and rotate the molecule to the frame of its symmetry, so the positions and forces in the output are not
+necessarily in the frame of the input structure. NWChem cannot detect space groups, so for crystals the space group
+is detected with ``spglib`` and only recorded.
+"""
+import re
+
+__all__ = ('get_space_group', 'parse_point_group')
+
+REGEX_SPACE_GROUP = re.compile(r'^(.+)\s+\((\d+)\)$')
+REGEX_POINT_GROUP = re.compile(r'^\s*Group name\s+(\S+)')
+
+
+def parse_point_group(lines):
+    """Parse the point group of the last geometry printed in the output of NWChem.
+
+    :param lines: the lines of the output.
+    :return: the name of the point group, or ``None`` if it was not printed.
+    """
+    for line in reversed(lines):
+        if 'Group name' not in line:
+            continue
+        result = REGEX_POINT_GROUP.match(line)
+        if result:
+            return result.group(1)
+    return None
+
+
+def get_space_group(structure, tolerance):
+    """Return the space group of a periodic structure.
+
+    :param structure: the ``StructureData``.
+    :param tolerance: the tolerance on the positions in Angstrom.
+    :return: dictionary with the international ``space_group`` symbol and ``space_group_number``, or an empty
+        dictionary if the space group could not be determined.
+    """
+    import spglib
+
+    numbers = {kind.name: index for index, kind in enumerate(structure.kinds)}
+    cell = (
+        structure.cell,
+        structure.get_ase().get_scaled_positions(),
+        [numbers[site.kind_name] for site in structure.sites],
+    )
+    result = REGEX_SPACE_GROUP.match(spglib.get_spacegroup(cell, symprec=tolerance) or '')
+    if result is None:
+        return {}
+    return {'space_group': result.group(1), 'space_group_number': int(result.group(2))}
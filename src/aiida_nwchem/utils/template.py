@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""Rendering of NWChem input files from templates and a parameter dictionary.
+
+An input file consists of a header, a geometry block, the ``basis`` and ``ecp`` blocks and a parameter block with the
+directives of all modules, ``set`` commands and tasks. Only the geometry block, and the basis blocks if the basis sets
+are written explicitly, depend on the structure. The parameter block is rendered once per distinct parameter
+dictionary and cached, such that many calculations with the same parameters but different structures do not render
+it again.
+
+The ``task`` of the parameters is either a single task, e.g. ``dft energy``, or a list of tasks that are run in order.
+Each entry of the list is either a task or a dictionary with the ``task`` and the module directives and ``set``
+commands that should be written just before it, e.g.::
+
+    'task': [
+        'scf energy',
+        {'dft': {'xc': 'b3lyp'}, 'task': 'dft energy'},
+    ]
+
+Volumetric data, such as the electron density or orbitals, is written to cube files by ``dplot`` tasks, which are
+added after all other tasks. Each cube file is defined by its name and the directives of its ``dplot`` block, where
+the ``limitxyz`` is a list of the minimum, maximum and number of spacings along each axis, such that the grid has one
+more point than spacings along each axis, and the ``orbitals`` a list of the orbitals to plot, e.g.::
+
+    {'homo': {'limitxyz': [[-3., 3., 50], [-3., 3., 50], [-3., 3., 50]], 'orbitals': [5], 'spin': 'total'}}
+"""
+import collections
+import json
+import re
+import string
+
+__all__ = (
+    'MODULE_DIRECTIVES', 'get_dplot_block', 'get_parameter_block', 'get_unknown_directives', 'render_directives',
+    'validate_directives', 'validate_dplot'
+)
+
+HEADER_TEMPLATE = string.Template('echo\n$start $abbreviation\ntitle "$title"\nmemory $memory mb\n')
+GEOMETRY_TEMPLATE = string.Template('geometry units angstroms $autosym\n$system$symmetry$coordinates\nend\n')
+SYSTEM_TEMPLATE = string.Template(
+    '  system crystal\n'
+    '    lat_a $lat_a\n    lat_b $lat_b\n    lat_c $lat_c\n'
+    '    alpha $alpha\n    beta  $beta\n    gamma $gamma\n'
+    '  end\n'
+)
+
+# Known directives of some modules, used to warn about likely typos. The lists are not complete, e.g. the ``dft``
+# module also accepts ``sym``, ``noscf`` and ``cam``, so unknown directives are not rejected
+MODULE_DIRECTIVES = {
+    'driver': {
+        'ascale', 'bscale', 'clear', 'default', 'eprec', 'firstneg', 'gmax', 'grms', 'hscale', 'inhess', 'linopt',
+        'loose', 'maxiter', 'moddir', 'nofirstneg', 'noprint', 'noxyz', 'print', 'redoautoz', 'sadstp', 'socket',
+        'tight', 'trust', 'tscale', 'vardir', 'xmax', 'xrms', 'xyz'
+    },
+    'scf': {
+        'adapt', 'converge', 'diis', 'direct', 'doublet', 'level', 'maxiter', 'nodiis', 'noprint', 'nopen', 'nr',
+        'octet', 'print', 'profile', 'quartet', 'quintet', 'rhf', 'rohf', 'semidirect', 'septet', 'sextet', 'singlet',
+        'sym', 'thresh', 'tol2e', 'triplet', 'uhf', 'vectors'
+    },
+    'dft': {
+        'adapt', 'cdft', 'cgmin', 'convergence', 'decomp', 'direct', 'disp', 'fon', 'fukui', 'grid', 'incore',
+        'iterations', 'max_ovl', 'maxiter', 'mulliken', 'mult', 'noio', 'noprint', 'occup', 'odft', 'print', 'rodft',
+        'semidirect', 'sic', 'smear', 'tolerances', 'vectors', 'xc', 'xdm'
+    },
+}
+
+_CACHE_SIZE = 128
+_PARAMETER_BLOCKS = collections.OrderedDict()
+
+
+def _get_directive_errors(parameters):
+    """Yield error messages for the directives of the modules in ``parameters``."""
+    for module, directives in parameters.items():
+        if module == 'task':
+            continue
+        if isinstance(directives, (list, tuple)):
+            yield f'the value of `{module}` should be a scalar or a dictionary of directives, got a list.'
+            continue
+        if not isinstance(directives, dict):
+            continue
+        for directive, value in directives.items():
+            if isinstance(value, (list, tuple)):
+                yield f'the value of the `{directive}` directive of `{module}` should be a scalar or a dictionary.'
+
+
+def _get_task_parameters(parameters):
+    """Yield the parameter dictionary itself and the dictionaries of its list of tasks."""
+    yield parameters
+    tasks = parameters.get('task', None)
+    if isinstance(tasks, (list, tuple)):
+        yield from (task for task in tasks if isinstance(task, dict))
+
+
+def get_unknown_directives(parameters):
+    """Return warnings for the directives of modules in ``MODULE_DIRECTIVES`` that are not known.
+
+    The lists of known directives are not complete, so unknown directives do not make the parameters invalid, but
+    they are likely typos.
+
+    :param parameters: the parameter dictionary, without the ``basis`` and ``ecp``.
+    :return: list of warning messages, one per module with unknown directives.
+    """
+    warnings = []
+    for task_parameters in _get_task_parameters(parameters):
+        for module, directives in task_parameters.items():
+            known = MODULE_DIRECTIVES.get(module.lower(), None)
+            if not known or not isinstance(directives, dict):
+                continue
+            unknown = sorted(directive for directive in directives if not set(directive.lower().split()[:1]) <= known)
+            if unknown:
+                warnings.append(f'unknown directives for the `{module}` module, check for typos: {", ".join(unknown)}.')
+    return warnings
+
+
+def validate_directives(parameters):
+    """Validate the module directives and tasks of a parameter dictionary.
+
+    :param parameters: the parameter dictionary, without the ``basis`` and ``ecp``.
+    :return: an error message or ``None`` if the parameters are valid.
+    """
+    tasks = parameters.get('task', None)
+    if isinstance(tasks, (list, tuple)):
+        for task in tasks:
+            if isinstance(task, dict):
+                if 'task' not in task:
+                    return 'each dictionary in the list of tasks should define the `task`.'
+                for error in _get_directive_errors(task):
+                    return error
+            elif not isinstance(task, str):
+                return 'each entry in the list of tasks should be a string or a dictionary.'
+
+    for error in _get_directive_errors(parameters):
+        return error
+
+    return None
+
+
+def render_directives(parameters, indent=0):
+    """Return the lines of the input file for a dictionary of module directives, with nested dictionaries as blocks.
+
+    :param parameters: dictionary of directives.
+    :param indent: the indentation level of the directives.
+    """
+    lines = []
+    prefix = ' ' * 4 * indent
+    for key, value in parameters.items():
+        if isinstance(value, dict):
+            lines.append(f'{prefix}{key}')
+            lines.extend(render_directives(value, indent + 1))
+            lines.append(f'{prefix}end')
+        else:
+            lines.append(f'{prefix}{key} {value}')
+    return lines
+
+
+def _render_task(parameters):
+    """Return the lines for the directives, ``set`` commands and ``task`` of a single task."""
+    parameters = dict(parameters)
+    set_commands = parameters.pop('set', None) or {}
+    task = parameters.pop('task', None)
+
+    lines = render_directives(parameters)
+    lines.extend(f'set {key} {value}' for key, value in set_commands.items())
+    if task:
+        lines.append(f'task {task}')
+    return lines
+
+
+def get_parameter_block(parameters):
+    """Return the parameter block of the input file, with the module directives, ``set`` commands and tasks.
+
+    The block is cached by the serialization of the parameters, so it is only rendered once for identical parameters.
+    The serialization preserves the order of the keys, since directives are written in the order in which they appear.
+
+    :param parameters: the parameter dictionary, without the ``basis``, ``ecp`` and other keys of the header and
+        geometry.
+    """
+    key = json.dumps(parameters, default=repr)
+
+    try:
+        _PARAMETER_BLOCKS.move_to_end(key)
+        return _PARAMETER_BLOCKS[key]
+    except KeyError:
+        pass
+
+    parameters = dict(parameters)
+    tasks = parameters.pop('task', None)
+
+    if isinstance(tasks, (list, tuple)):
+        lines = _render_task(parameters)
+        for task in tasks:
+            lines.extend(_render_task(task if isinstance(task, dict) else {'task': task}))
+    else:
+        lines = _render_task(dict(parameters, task=tasks))
+
+    block = ''.join(f'{line}\n' for line in lines)
+
+    _PARAMETER_BLOCKS[key] = block
+    if len(_PARAMETER_BLOCKS) > _CACHE_SIZE:
+        _PARAMETER_BLOCKS.popitem(last=False)
+
+    return block
+
+
+def validate_dplot(dplot):
+    """Validate the definition of the cube files written by ``dplot`` tasks.
+
+    :param dplot: dictionary with the directives of the ``dplot`` block by name of the cube file.
+    :return: an error message or ``None`` if the definition is valid.
+    """
+    for name, directives in dplot.items():
+        if not re.fullmatch(r'[A-Za-z][A-Za-z0-9_]*', name):
+            return f'the name `{name}` of a cube file should only contain letters, digits and underscores.'
+        if not isinstance(directives, dict):
+            return f'the directives of the cube file `{name}` should be a dictionary.'
+        if {'output', 'gaussian'} & set(directives):
+            return f'the `output` and `gaussian` directives of the cube file `{name}` are set automatically.'
+        limits = directives.get('limitxyz', [[0, 0, 0]] * 3)
+        if not isinstance(limits, (list, tuple)) or len(limits) != 3 or any(
+            not isinstance(limit, (list, tuple)) or len(limit) != 3 for limit in limits
+        ):
+            return (
+                f'the `limitxyz` of the cube file `{name}` should contain the minimum, maximum and number of spacings '
+                'along each of the three axes.'
+            )
+        orbitals = directives.get('orbitals', [])
+        if not isinstance(orbitals, (list, tuple)) or not all(isinstance(orbital, int) for orbital in orbitals):
+            return f'the `orbitals` of the cube file `{name}` should be a list of orbital numbers.'
+
+    return None
+
+
+def get_dplot_block(dplot):
+    """Return the ``dplot`` blocks and tasks that write the cube files.
+
+    :param dplot: dictionary with the directives of the ``dplot`` block by name of the cube file.
+    """
+    lines = []
+    for name, directives in dplot.items():
+        directives = dict(directives)
+        limits = directives.pop('limitxyz', None)
+        orbitals = directives.pop('orbitals', None)
+
+        lines.extend(['dplot', f'    title {directives.pop("title", name)}'])
+        if limits:
+            lines.append('    limitxyz')
+            lines.extend('    {} {} {}'.format(*limit) for limit in limits)  # pylint: disable=consider-using-f-string
+        if orbitals:
+            lines.append(f'    orbitals view; {len(orbitals)}; {" ".join(str(orbital) for orbital in orbitals)}')
+        lines.extend(render_directives(directives, indent=1))
+        lines.extend(['    gaussian', f'    output {name}.cube', 'end', 'task dplot'])
+
+    return ''.join(f'{line}\n' for line in lines)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Thermochemistry of ideal gases from the frequencies of a frequency calculation, on a grid of temperatures and
+pressures.
+
+NWChem only reports the thermochemistry at a single temperature. Here, the zero-point energy, enthalpy, entropy,
+heat capacity at constant volume and Gibbs free energy are computed in the rigid-rotor harmonic-oscillator
+approximation for all temperatures and pressures of a grid at once, and for many molecules at once, from the
+frequencies, rotational constants, molecular weight and symmetry number in the ``output_parameters``.
+
+Energies are in Hartree, entropies and heat capacities in Hartree/K, temperatures in K and pressures in Pa.
+"""
+import numpy as np
+
+__all__ = ('get_thermochemistry', 'get_thermochemistry_from_parameters')
+
+# Physical constants in SI units (CODATA 2018)
+PLANCK = 6.62607015e-34
+BOLTZMANN = 1.380649e-23
+SPEED_OF_LIGHT = 2.99792458e10  # in cm/s, such that wavenumbers in cm-1 are converted to frequencies
+ATOMIC_MASS = 1.66053906660e-27
+HARTREE = 4.3597447222071e-18
+
+BOLTZMANN_HARTREE = BOLTZMANN / HARTREE
+WAVENUMBER_TO_KELVIN = PLANCK * SPEED_OF_LIGHT / BOLTZMANN
+
+# Frequencies below this value in cm-1, including the translations and rotations and imaginary frequencies, which
+# NWChem prints as negative numbers, are not treated as vibrations
+FREQUENCY_CUTOFF = 1.0
+
+
+def _per_molecule(value, num_molecules):
+    """Return a property of the molecules as an array with shape ``(num_molecules, 1, 1)``."""
+    return np.broadcast_to(np.asarray(value, np.float64).reshape(-1), (num_molecules,))[:, None, None]
+
+
+def get_thermochemistry(
+    frequencies,
+    rotational_constants,
+    molecular_weight,
+    symmetry_number=1,
+    multiplicity=1,
+    energy=0.,
+    temperatures=298.15,
+    pressures=101325.,
+):
+    """Return the thermochemistry of one or many molecules on a grid of temperatures and pressures.
+
+    The properties of the molecules are arrays with the molecules along the first axis, or scalars for a single
+    molecule. Molecules with fewer modes are padded with ``nan`` frequencies.
+
+    :param frequencies: the frequencies in cm-1, with shape ``(num_modes,)`` or ``(num_molecules, num_modes)``.
+    :param rotational_constants: the rotational constants in cm-1, with shape ``(3,)`` or ``(num_molecules, 3)``.
+        Molecules with one zero constant are linear, those with only zero constants are atoms.
+    :param molecular_weight: the molecular weight in atomic mass units.
+    :param symmetry_number: the rotational symmetry number.
+    :param multiplicity: the spin multiplicity of the electronic ground state.
+    :param energy: the electronic energy in Hartree, which is added to the enthalpy and Gibbs free energy.
+    :param temperatures: the temperatures in K.
+    :param pressures: the pressures in Pa.
+    :return: dictionary with the ``zero_point_energy`` with shape ``(num_molecules,)`` and the ``enthalpy``,
+        ``entropy``, ``heat_capacity`` and ``gibbs_free_energy`` with shape ``(num_molecules, num_temperatures,
+        num_pressures)``, without the molecule axis for a single molecule.
+    """
+    frequencies = np.asarray(frequencies, np.float64)
+    single = frequencies.ndim == 1
+    frequencies = np.atleast_2d(frequencies)
+    num_molecules = frequencies.shape[0]
+
+    rotational_constants = np.broadcast_to(
+        np.asarray(rotational_constants, np.float64).reshape(-1, 3), (num_molecules, 3)
+    )
+    mass = _per_molecule(molecular_weight, num_molecules) * ATOMIC_MASS
+    symmetry_number = _per_molecule(symmetry_number, num_molecules)
+    multiplicity = _per_molecule(multiplicity, num_molecules)
+    energy = _per_molecule(energy, num_molecules)
+
+    # The grid has the temperatures along the second and the pressures along the third axis
+    temperatures = np.asarray(temperatures, np.float64).reshape(1, -1, 1)
+    pressures = np.asarray(pressures, np.float64).reshape(1, 1, -1)
+
+    # Vibrations, with the modes along the last axis, such that modes padded with ``nan`` are left out of the sums
+    vibrational = np.where(frequencies > FREQUENCY_CUTOFF, frequencies, np.nan) * WAVENUMBER_TO_KELVIN
+    ratio = vibrational[:, None, :] / temperatures[:, :, 0, None]
+    with np.errstate(over='ignore'):
+        occupation = 1. / np.expm1(ratio)
+        capacity = np.where(ratio < 700., ratio**2 * np.exp(np.minimum(ratio, 700.)) * occupation**2, 0.)
+    zero_point_energy = 0.5 * BOLTZMANN_HARTREE * np.nansum(vibrational, axis=-1)
+    energy_vibrational = BOLTZMANN_HARTREE * np.nansum(vibrational[:, None, :] * occupation, axis=-1)
+    entropy_vibrational = BOLTZMANN_HARTREE * np.nansum(ratio * occupation - np.log1p(-np.exp(-ratio)), axis=-1)
+    heat_capacity_vibrational = BOLTZMANN_HARTREE * np.nansum(capacity, axis=-1)
+
+    # Translations
+    wavelength = PLANCK / np.sqrt(2 * np.pi * mass * BOLTZMANN * temperatures)
+    entropy_translational = BOLTZMANN_HARTREE * (np.log(BOLTZMANN * temperatures / pressures / wavelength**3) + 2.5)
+
+    # Rotations, depending on the number of axes with a non-zero rotational constant
+    num_axes = np.count_nonzero(rotational_constants > 0, axis=-1)[:, None, None]
+    rotational = np.where(rotational_constants > 0, rotational_constants * WAVENUMBER_TO_KELVIN, 1.)
+    product = np.prod(rotational, axis=-1)[:, None, None]
+    entropy_rotational = BOLTZMANN_HARTREE * np.select(
+        [num_axes == 3, num_axes == 2],
+        [
+            0.5 * np.log(np.pi * temperatures**3 / product) + 1.5 - np.log(symmetry_number),
+            np.log(temperatures / np.sqrt(product)) + 1. - np.log(symmetry_number),
+        ],
+        0.,
+    )
+    degrees_rotational = np.select([num_axes == 3, num_axes == 2], [1.5, 1.], 0.)
+
+    # The enthalpy includes the pV = kT of the ideal gas
+    enthalpy = (
+        energy + zero_point_energy[:, None, None] + energy_vibrational[..., None] +
+        (2.5 + degrees_rotational) * BOLTZMANN_HARTREE * temperatures
+    )
+    entropy = (
+        entropy_translational + entropy_rotational + entropy_vibrational[..., None] +
+        BOLTZMANN_HARTREE * np.log(multiplicity)
+    )
+    heat_capacity = heat_capacity_vibrational[..., None] + (1.5 + degrees_rotational) * BOLTZMANN_HARTREE
+    shape = (num_molecules, temperatures.size, pressures.size)
+
+    results = {
+        'zero_point_energy': zero_point_energy,
+        'enthalpy': np.broadcast_to(enthalpy, shape),
+        'entropy': np.broadcast_to(entropy, shape),
+        'heat_capacity': np.broadcast_to(heat_capacity, shape),
+        'gibbs_free_energy': np.broadcast_to(enthalpy - temperatures * entropy, shape),
+    }
+
+    if single:
+        results = {key: value[0] for key, value in results.items()}
+
+    return results
+
+
+def get_thermochemistry_from_parameters(output_parameters, energies=0., multiplicities=1, **kwargs):
+    """Return the thermochemistry of many molecules from the ``output_parameters`` of their frequency calculations.
+
+    :param output_parameters: list of the ``output_parameters`` dictionaries or ``Dict`` nodes.
+    :param energies: the electronic energies in Hartree, one per molecule or the same for all.
+    :param multiplicities: the spin multiplicities, one per molecule or the same for all.
+    :param kwargs: the ``temperatures`` and ``pressures`` of the grid, see ``get_thermochemistry``.
+    :return: the dictionary of ``get_thermochemistry``, with the molecules along the first axis.
+    """
+    parameters = [value if isinstance(value, dict) else value.get_dict() for value in output_parameters]
+
+    num_modes = max(len(value['frequencies']) for value in parameters)
+    frequencies = np.full((len(parameters), num_modes), np.nan)
+    for index, value in enumerate(parameters):
+        frequencies[index, :len(value['frequencies'])] = value['frequencies']
+
+    return get_thermochemistry(
+        frequencies,
+        [value['rotational_constants'] for value in parameters],
+        [value['molecular_weight'] for value in parameters],
+        symmetry_number=[value.get('symmetry_number', 1) for value in parameters],
+        multiplicity=multiplicities,
+        energy=energies,
+        **kwargs,
+    )
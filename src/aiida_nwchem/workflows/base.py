@@ -1,11 +1,38 @@
 # -*- coding: utf-8 -*-
 """Base workchain to run an NWChem calculation."""
 
+from aiida import orm
 from aiida.common import AttributeDict
-from aiida.engine import BaseRestartWorkChain, while_
-from aiida.plugins import CalculationFactory
+from aiida.engine import BaseRestartWorkChain, ProcessHandlerReport, calcfunction, process_handler, while_
+import numpy as np
 
-NwchemCalculation = CalculationFactory('nwchem.nwchem')
+from aiida_nwchem.calculations.nwchem import NwchemCalculation
+from aiida_nwchem.utils.fingerprint import canonicalize_structure
+from aiida_nwchem.utils.nwpw import get_cutoffs
+
+
+@calcfunction
+def create_kpoints_from_distance(structure, distance):
+    """Create a k-point mesh for the cell of a structure with the given maximum distance between k-points."""
+    kpoints = orm.KpointsData()
+    kpoints.set_cell_from_structure(structure)
+    kpoints.set_kpoints_mesh_from_density(distance.value)
+    return kpoints
+
+
+@calcfunction
+def concatenate_trajectories(**trajectories):
+    """Concatenate the trajectories of consecutive calculations, passed with labels in their order."""
+    ordered = [trajectories[label] for label in sorted(trajectories)]
+    concatenated = orm.TrajectoryData()
+    concatenated.set_trajectory(
+        symbols=ordered[0].symbols,
+        positions=np.concatenate([trajectory.get_positions() for trajectory in ordered]),
+        stepids=np.arange(sum(trajectory.numsteps for trajectory in ordered)),
+    )
+    if all('energies' in trajectory.get_arraynames() for trajectory in ordered):
+        concatenated.set_array('energies', np.concatenate([trajectory.get_array('energies') for trajectory in ordered]))
+    return concatenated
 
 
 class NwchemBaseWorkChain(BaseRestartWorkChain):
@@ -17,6 +44,35 @@ class NwchemBaseWorkChain(BaseRestartWorkChain):
     def define(cls, spec):
         super().define(spec)
         spec.expose_inputs(NwchemCalculation, namespace='nwchem')
+        spec.input(
+            'canonicalize_structure',
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help='If `True`, the input structure is first converted to a canonical form, with sorted sites and rounded '
+            'positions, such that calculations of equivalent structures can be reused through caching.'
+        )
+        spec.input(
+            'kpoints_distance',
+            valid_type=orm.Float,
+            required=False,
+            help='The maximum distance between k-points in reciprocal space in 1/Angstrom, from which the k-point mesh '
+            'of periodic NWPW calculations is derived. Ignored if `nwchem.kpoints` is specified.'
+        )
+        spec.input(
+            'cutoff_hints',
+            valid_type=orm.Dict,
+            required=False,
+            help='Recommended wave function cutoffs in Hartree of the pseudopotentials of each element. The NWPW '
+            '`cutoff` is set to the largest cutoff of the elements in the structure, unless it is set explicitly.'
+        )
+        spec.input(
+            'monitor_optimization',
+            valid_type=orm.Bool,
+            default=lambda: orm.Bool(False),
+            help='If `True`, geometry optimizations are monitored while they run and stopped as soon as they are '
+            'oscillating or stagnating, after which they are restarted with a fresh Hessian. See '
+            '`aiida_nwchem.utils.optimization`.'
+        )
 
         spec.outline(
             cls.setup,
@@ -28,6 +84,18 @@ class NwchemBaseWorkChain(BaseRestartWorkChain):
         )
 
         spec.expose_outputs(NwchemCalculation)
+        spec.output(
+            'combined_trajectory',
+            valid_type=orm.TrajectoryData,
+            required=False,
+            help='The trajectory of a geometry optimization that was continued over multiple calculations.'
+        )
+
+        spec.exit_code(
+            300,
+            'ERROR_UNRECOVERABLE_FAILURE',
+            message='The calculation failed with an unrecoverable error.',
+        )
 
     def setup(self):
         """Call the `setup` of the `BaseRestartWorkChain` and then create the inputs dictionary in `self.ctx.inputs`.
@@ -37,3 +105,144 @@ class NwchemBaseWorkChain(BaseRestartWorkChain):
         """
         super().setup()
         self.ctx.inputs = AttributeDict(self.exposed_inputs(NwchemCalculation, 'nwchem'))
+
+        if self.inputs.canonicalize_structure:
+            self.ctx.inputs.structure = canonicalize_structure(self.ctx.inputs.structure)
+
+        if 'kpoints_distance' in self.inputs and 'kpoints' not in self.ctx.inputs:
+            self.ctx.inputs.kpoints = create_kpoints_from_distance(
+                self.ctx.inputs.structure, self.inputs.kpoints_distance
+            )
+            mesh, _ = self.ctx.inputs.kpoints.get_kpoints_mesh()
+            self.report(f'using a k-point mesh of {mesh}')
+
+        if 'cutoff_hints' in self.inputs:
+            parameters = self.ctx.inputs.parameters.get_dict()
+            nwpw = parameters.setdefault('nwpw', {})
+            if 'cutoff' not in nwpw:
+                cutoffs = get_cutoffs(self.ctx.inputs.structure, self.inputs.cutoff_hints.get_dict())
+                nwpw['cutoff'] = cutoffs['wavefunction_cutoff']
+                self.ctx.inputs.parameters = orm.Dict(parameters)
+                self.report(
+                    f'using a wave function cutoff of {cutoffs["wavefunction_cutoff"]} Ha and a density cutoff of '
+                    f'{cutoffs["density_cutoff"]} Ha'
+                )
+
+        if self.inputs.monitor_optimization:
+            monitors = dict(self.ctx.inputs.get('monitors', {}))
+            monitors.setdefault('optimization', orm.Dict({'entry_point': 'nwchem.optimization'}))
+            self.ctx.inputs.monitors = monitors
+
+        self.ctx.trajectories = []
+
+    def results(self):
+        """Attach the outputs of the last calculation and the combined trajectory of a continued optimization."""
+        result = super().results()  # pylint: disable=assignment-from-none
+
+        node = self.ctx.children[self.ctx.iteration - 1]
+        if self.ctx.trajectories and 'output_trajectory' in node.outputs:
+            trajectories = self.ctx.trajectories + [node.outputs.output_trajectory]
+            labels = {f'trajectory_{index:04d}': trajectory for index, trajectory in enumerate(trajectories)}
+            self.out('combined_trajectory', concatenate_trajectories(**labels))
+
+        return result
+
+    def report_error_handled(self, node, action):
+        """Report an action taken for a calculation that has failed.
+
+        :param node: the node of the calculation that failed.
+        :param action: a string message with the action taken.
+        """
+        self.report(f'{node.process_label}<{node.pk}> failed with exit status {node.exit_status}: {node.exit_message}')
+        self.report(f'Action taken: {action}')
+
+    # The exit codes are attributes of the process spec, which pylint cannot infer
+    # pylint: disable=no-member
+
+    @process_handler(
+        priority=600,
+        exit_codes=[
+            NwchemCalculation.exit_codes.ERROR_BASIS_NOT_FOUND,
+            NwchemCalculation.exit_codes.ERROR_GEOMETRY,
+            NwchemCalculation.exit_codes.ERROR_DISK_FULL,
+        ]
+    )
+    def handle_unrecoverable_failure(self, node):
+        """Abort for errors that a restart with the same inputs cannot fix."""
+        self.report_error_handled(node, 'unrecoverable error, aborting...')
+        return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+    @process_handler(
+        priority=430,
+        exit_codes=[
+            NwchemCalculation.exit_codes.ERROR_GEOMETRY_OPTIMIZATION_OSCILLATING,
+            NwchemCalculation.exit_codes.ERROR_GEOMETRY_OPTIMIZATION_STAGNATING,
+        ]
+    )
+    def handle_geometry_optimization_not_converging(self, node):
+        """Restart an oscillating or stagnating geometry optimization from its last step with a fresh Hessian.
+
+        The restart folder, with the Hessian of the optimizer that led it astray, is not used. An oscillating
+        optimization is restarted with half the trust radius of the `driver`, such that it takes smaller steps.
+        """
+        self.ctx.inputs.structure = node.outputs.output_structure
+        self.ctx.inputs.pop('restart_folder', None)
+        if 'output_trajectory' in node.outputs:
+            self.ctx.trajectories.append(node.outputs.output_trajectory)
+
+        action = 'restarting from the last step with a fresh Hessian'
+
+        if node.exit_status == NwchemCalculation.exit_codes.ERROR_GEOMETRY_OPTIMIZATION_OSCILLATING.status:
+            parameters = self.ctx.inputs.parameters.get_dict()
+            driver = parameters.get('driver', None)
+            if not isinstance(driver, dict):
+                driver = parameters['driver'] = {}
+            # The default trust radius of the driver is 0.3
+            driver['trust'] = 0.5 * float(driver.get('trust', 0.3))
+            self.ctx.inputs.parameters = orm.Dict(parameters)
+            action += f' and `driver.trust` set to {driver["trust"]}'
+
+        self.report_error_handled(node, action)
+        return ProcessHandlerReport(True)
+
+    @process_handler(
+        priority=420,
+        exit_codes=[
+            NwchemCalculation.exit_codes.ERROR_GEOMETRY_OPTIMIZATION_INCOMPLETE,
+            NwchemCalculation.exit_codes.ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED,
+        ]
+    )
+    def handle_geometry_optimization_incomplete(self, node):
+        """Continue an interrupted or unconverged geometry optimization from its last complete step.
+
+        The restart folder provides the wave function and the Hessian of the optimizer, while the structure is
+        replaced by the one of the last complete step.
+        """
+        self.ctx.inputs.structure = node.outputs.output_structure
+        self.ctx.inputs.restart_folder = node.outputs.remote_folder
+        if 'output_trajectory' in node.outputs:
+            self.ctx.trajectories.append(node.outputs.output_trajectory)
+
+        final_step = node.outputs.output_parameters['final_step']
+        self.report_error_handled(node, f'continuing the optimization from step {final_step}')
+        return ProcessHandlerReport(True)
+
+    @process_handler(priority=410, exit_codes=[NwchemCalculation.exit_codes.ERROR_SCF_NOT_CONVERGED])
+    def handle_scf_not_converged(self, node):
+        """Restart from the last wave function with twice the maximum number of SCF iterations."""
+        parameters = self.ctx.inputs.parameters.get_dict()
+
+        if 'scf' in parameters or str(parameters.get('task', '')).split()[:1] == ['scf']:
+            section, key, default = 'scf', 'maxiter', 8
+        else:
+            section, key, default = 'dft', 'iterations', 30
+
+        block = parameters.get(section, None)
+        if not isinstance(block, dict):
+            block = parameters[section] = {}
+        block[key] = 2 * int(block.get(key, default))
+
+        self.ctx.inputs.parameters = orm.Dict(parameters)
+        self.ctx.inputs.restart_folder = node.outputs.remote_folder
+        self.report_error_handled(node, f'restarting with `{section}.{key}` set to {block[key]}')
+        return ProcessHandlerReport(True)
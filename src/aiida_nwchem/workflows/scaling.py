@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Workchain to benchmark the scaling of an NWChem calculation with the number of MPI processes."""
+import math
+
+from aiida import orm
+from aiida.engine import WorkChain, calcfunction
+
+from aiida_nwchem.calculations.nwchem import NwchemCalculation
+from aiida_nwchem.utils.scaling import EXTRA_SIZE_CLASS, fit_scaling, get_size_class
+
+
+def get_resources(num_mpiprocs, max_mpiprocs_per_machine):
+    """Return the resources to run with a number of processes, using as few machines as possible."""
+    num_machines = math.ceil(num_mpiprocs / max_mpiprocs_per_machine)
+    return {'num_machines': num_machines, 'num_mpiprocs_per_machine': num_mpiprocs // num_machines}
+
+
+def validate_inputs(value, _):
+    """Validate the inputs."""
+    numbers = value['num_mpiprocs'].get_list()
+    if len(set(numbers)) < 2:
+        return 'the `num_mpiprocs` should contain at least two different numbers of processes.'
+    if any(not isinstance(number, int) or number < 1 for number in numbers):
+        return 'the `num_mpiprocs` should be positive integers.'
+
+    max_mpiprocs_per_machine = value['max_mpiprocs_per_machine'].value
+    for number in numbers:
+        resources = get_resources(number, max_mpiprocs_per_machine)
+        if resources['num_machines'] * resources['num_mpiprocs_per_machine'] != number:
+            return f'{number} MPI processes cannot be distributed evenly with {max_mpiprocs_per_machine} per machine.'
+
+
+@calcfunction
+def fit_scaling_model(efficiency_threshold, max_mpiprocs_per_machine, **output_parameters):
+    """Fit the wall times of the benchmarks to a scaling model and recommend the resources."""
+    num_mpiprocs = []
+    wall_times = []
+    for parameters in output_parameters.values():
+        statistics = parameters.get('job_statistics', {})
+        num_mpiprocs.append(statistics['nproc'])
+        wall_times.append(statistics['wall_time'])
+
+    result = fit_scaling(num_mpiprocs, wall_times, efficiency_threshold.value)
+    result['resources'] = get_resources(result['recommended_num_mpiprocs'], max_mpiprocs_per_machine.value)
+
+    return orm.Dict(result)
+
+
+class NwchemScalingWorkChain(WorkChain):
+    """Workchain to run an NWChem calculation for a ladder of numbers of MPI processes and recommend resources.
+
+    The wall times of the calculations are fitted to Amdahl's law and the largest number of processes for which the
+    fitted model still has the requested parallel efficiency is recommended. The recommendation is tagged with the size
+    class of the system, such that it can be looked up with ``aiida_nwchem.utils.scaling.get_recommended_resources``
+    for later calculations of similar systems.
+    """
+
+    @classmethod
+    def define(cls, spec):
+        super().define(spec)
+        spec.expose_inputs(NwchemCalculation, namespace='nwchem')
+        spec.inputs['nwchem']['metadata']['options']['resources'].required = False
+        spec.input(
+            'num_mpiprocs', valid_type=orm.List, help='The numbers of MPI processes to run the calculation with.'
+        )
+        spec.input(
+            'max_mpiprocs_per_machine',
+            valid_type=orm.Int,
+            help='The maximum number of MPI processes per machine. Numbers of processes that do not fit on a single '
+            'machine are distributed evenly over the smallest number of machines.'
+        )
+        spec.input(
+            'efficiency_threshold',
+            valid_type=orm.Float,
+            default=lambda: orm.Float(0.7),
+            help='The minimum parallel efficiency, relative to the smallest number of processes, of the recommended '
+            'number of processes.'
+        )
+
+        spec.inputs.validator = validate_inputs
+
+        spec.outline(
+            cls.run_benchmarks,
+            cls.inspect_benchmarks,
+            cls.results,
+        )
+
+        spec.output(
+            'recommendation',
+            valid_type=orm.Dict,
+            help='The fitted scaling model, the parallel efficiency of each benchmark and the recommended resources.'
+        )
+
+        spec.exit_code(
+            400,
+            'ERROR_BENCHMARKS_FAILED',
+            message='Fewer than two benchmark calculations finished successfully.',
+        )
+
+    def run_benchmarks(self):
+        """Run the calculation for each number of processes of the ladder."""
+        for num_mpiprocs in sorted(set(self.inputs.num_mpiprocs.get_list())):
+            inputs = self.exposed_inputs(NwchemCalculation, 'nwchem')
+            inputs['metadata'] = dict(inputs.get('metadata', {}))
+            inputs['metadata']['options'] = dict(inputs['metadata'].get('options', {}))
+            inputs['metadata']['options']['resources'] = get_resources(
+                num_mpiprocs, self.inputs.max_mpiprocs_per_machine.value
+            )
+            # The calculations only differ in their resources, so they should not be taken from the cache, which
+            # requires ``aiida-core>=2.6`` for the ``disable_cache`` input
+            inputs['metadata']['disable_cache'] = True
+            inputs['metadata']['call_link_label'] = f'benchmark_{num_mpiprocs:04d}'
+
+            node = self.submit(NwchemCalculation, **inputs)
+            self.report(f'launching {node.process_label}<{node.pk}> with {num_mpiprocs} MPI processes')
+            self.to_context(**{f'benchmark_{num_mpiprocs:04d}': node})
+
+    def inspect_benchmarks(self):
+        """Fit the scaling model to the wall times of the successful benchmarks."""
+        output_parameters = {}
+        for num_mpiprocs in sorted(set(self.inputs.num_mpiprocs.get_list())):
+            node = self.ctx[f'benchmark_{num_mpiprocs:04d}']
+            if not node.is_finished_ok:
+                self.report(f'{node.process_label}<{node.pk}> failed with exit status {node.exit_status}')
+                continue
+            statistics = node.outputs.output_parameters.get('job_statistics', {})
+            if 'nproc' not in statistics or 'wall_time' not in statistics:
+                self.report(f'{node.process_label}<{node.pk}> did not report its number of processes and timings')
+                continue
+            output_parameters[f'benchmark_{num_mpiprocs:04d}'] = node.outputs.output_parameters
+
+        if len(output_parameters) < 2:
+            return self.exit_codes.ERROR_BENCHMARKS_FAILED  # pylint: disable=no-member
+
+        self.ctx.recommendation = fit_scaling_model(
+            self.inputs.efficiency_threshold, self.inputs.max_mpiprocs_per_machine, **output_parameters
+        )
+
+    def results(self):
+        """Attach the recommendation, tagged with the size class of the benchmarked system."""
+        recommendation = self.ctx.recommendation
+        size_class = get_size_class(self.inputs.nwchem.structure, self.inputs.nwchem.parameters.get_dict())
+        recommendation.base.extras.set(EXTRA_SIZE_CLASS, size_class)
+        self.report(f'recommending {recommendation["recommended_num_mpiprocs"]} MPI processes for `{size_class}`')
+        self.out('recommendation', recommendation)
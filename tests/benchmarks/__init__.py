@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of ``aiida-nwchem`` that are run by hand, outside of the unit tests."""
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the ``parse_in_subprocess`` option for concurrent parses of large outputs.
+
+The event loop of a daemon worker runs the parsers of all its calculations. While an output is scanned in the
+process of the worker, the event loop is blocked, which is measured as the delay of a heartbeat task. The parses are
+run through a ``greenback`` portal, as the engine does, such that the parser awaits the process pool through it when
+the option is set. Run from the root of the repository with::
+
+    python -m tests.benchmarks.parse_in_subprocess --num-parses 4 --num-steps 500
+"""
+import argparse
+import asyncio
+import time
+
+from plumpy.greenback_bridge import run_with_portal
+
+from aiida_nwchem.parsers.nwchem import get_process_pool, scan_output, shutdown_process_pool, wait_for
+from tests.test_outputs import generate_nwpw_pspw_large
+
+
+def parse(content, parse_in_subprocess):
+    """Scan the content of an output as the parser does, with or without the ``parse_in_subprocess`` option."""
+    if parse_in_subprocess:
+        return wait_for(get_process_pool().submit(scan_output, content))
+    return scan_output(content)
+
+
+async def heartbeat(interval, delays):
+    """Sleep for ``interval`` seconds in a loop and record by how much each wake-up is delayed."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - start - interval)
+
+
+async def run_parses(content, num_parses, parse_in_subprocess, interval):
+    """Run concurrent parses and return the wall time and the longest delay of the event loop."""
+    delays = []
+    task = asyncio.create_task(heartbeat(interval, delays))
+    await asyncio.sleep(2 * interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run_with_portal(parse, content, parse_in_subprocess) for _ in range(num_parses)])
+    elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(2 * interval)
+    task.cancel()
+    return elapsed, max(delays)
+
+
+def main():
+    """Run the benchmark and print the wall time and longest delay of the event loop with and without the option."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--num-parses', type=int, default=4, help='number of concurrent parses')
+    parser.add_argument('--num-atoms', type=int, default=500, help='number of atoms of the generated output')
+    parser.add_argument('--num-steps', type=int, default=100, help='number of force tables of the generated output')
+    parser.add_argument('--interval', type=float, default=0.01, help='interval of the heartbeat in seconds')
+    args = parser.parse_args()
+
+    content = generate_nwpw_pspw_large(args.num_atoms, args.num_steps)
+    print(f'{args.num_parses} concurrent parses of an output of {content.count(chr(10))} lines')
+
+    # Start the workers of the pool before measuring, as the daemon worker only does so once
+    get_process_pool().submit(scan_output, '').result()
+
+    print(f'{"parse_in_subprocess":>20s} {"wall time (s)":>14s} {"max delay (s)":>14s}')
+    for parse_in_subprocess in (False, True):
+        elapsed, delay = asyncio.run(run_parses(content, args.num_parses, parse_in_subprocess, args.interval))
+        print(f'{str(parse_in_subprocess):>20s} {elapsed:14.3f} {delay:14.3f}')
+
+    shutdown_process_pool()
+
+
+if __name__ == '__main__':
+    main()
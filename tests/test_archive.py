@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.archive` module."""
+from aiida_nwchem.utils.archive import create_output_archive, get_output_index, read_output_archive
+
+
+def test_output_archive(filepath_data):
+    """Test that the output and its tasks can be read back from the archive."""
+    content = 'header\n NWChem Input Module\nfirst\n NWChem Input Module\nsecond\n'
+    archive = create_output_archive(content, 'aiida.out')
+    archive.store()
+
+    index = get_output_index(archive)
+    assert [segment['start'] for segment in index['segments']] == [0, 7, 34]
+    assert read_output_archive(archive) == content
+    assert read_output_archive(archive, 0) == 'header\n'
+    assert read_output_archive(archive, 2) == ' NWChem Input Module\nsecond\n'
+
+    content = (filepath_data / 'h2o.inp').read_text()
+    assert read_output_archive(create_output_archive(content, 'aiida.out')) == content
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.basis` module."""
+import pytest
+
+from aiida_nwchem.utils.basis import BasisLibrary, get_missing_kinds, validate_basis
+
+STO_3G = """basis "H_STO-3G" PRINT
+#BASIS SET: (3s) -> [1s]
+H    S
+      3.42525091             0.15432897
+      0.62391373             0.53532814
+      0.16885540             0.44463454
+END
+"""
+
+
+@pytest.fixture(name='library')
+def fixture_library(tmp_path, monkeypatch):
+    """Return a ``BasisLibrary`` with only the STO-3G basis set for hydrogen."""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    path = tmp_path / 'libraries'
+    path.mkdir()
+    (path / 'sto-3g').write_text(STO_3G)
+    return BasisLibrary(path)
+
+
+def test_get_missing_kinds(h2o):
+    """Test the coverage of the kinds of a structure by a basis."""
+    assert get_missing_kinds({'H': 'library sto-3g'}, h2o) == ['O']
+    assert not get_missing_kinds({'*': 'library sto-3g'}, h2o)
+
+
+def test_validate_basis(library, h2o):
+    """Test the validation of library entries against the NWChem library."""
+    assert library.get_elements('STO-3G') == ['H']
+    assert library.get_block('H', 'sto-3g')[0] == 'H    S'
+    assert validate_basis({'H': 'library sto-3g'}, h2o, library=library).endswith('kinds: O.')
+    assert 'does not define the basis `6-31g`' in validate_basis({'*': 'library 6-31g'}, h2o, library=library)
+    assert 'not defined for: O' in validate_basis({'*': 'library sto-3g'}, h2o, library=library)
+    assert validate_basis({'H': 'library sto-3g', 'O': 'O S\n 1.0 1.0'}, h2o, library=library) is None
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 """Test NWChem calculations"""
 from aiida import engine, orm, plugins
+from aiida.common.folders import Folder
+from aiida.engine.utils import instantiate_process
+from aiida.manage import get_manager
 import pytest
 
 
@@ -61,3 +64,27 @@ def test_h2o_restart(nwchem_code, h2o):
         log = handle.read()
 
     assert 'status          = restart' in log
+
+
+@pytest.mark.parametrize(
+    'symmetry_tolerance, add_cell, header', (
+        (None, False, 'geometry units angstroms noautoz noautosym\n'),
+        (0.01, False, 'geometry units angstroms noautoz autosym 0.01\n'),
+        (0.01, True, 'geometry units angstroms noautoz noautosym\n'),
+    )
+)
+def test_symmetry_tolerance(aiida_localhost, h2o, tmp_path, symmetry_tolerance, add_cell, header):
+    """Test that NWChem only detects the symmetry of molecules, with the given tolerance."""
+    builder = plugins.CalculationFactory('nwchem.nwchem').get_builder()
+    builder.code = orm.InstalledCode(computer=aiida_localhost, filepath_executable='/usr/bin/nwchem').store()
+    builder.metadata.options.resources = {'num_machines': 1}
+    builder.structure = h2o
+    builder.parameters = orm.Dict({'task': 'scf', 'basis': {'H': 'library sto-3g', 'O': 'library sto-3g'}})
+    builder.add_cell = orm.Bool(add_cell)
+    if symmetry_tolerance is not None:
+        builder.symmetry_tolerance = orm.Float(symmetry_tolerance)
+
+    process = instantiate_process(get_manager().get_runner(), builder)
+    process.prepare_for_submission(Folder(str(tmp_path)))
+
+    assert header in (tmp_path / 'aiida.in').read_text()
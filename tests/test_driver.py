@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Tests for the i-PI driver of :mod:`aiida_nwchem.calculations.driver` and its parser."""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.plugins import ParserFactory
+import numpy as np
+import pytest
+
+from aiida_nwchem.calculations import ipi_driver
+
+CELL = [[4., 0., 0.], [1., 5., 0.], [0.5, 0.5, 6.]]
+POSITIONS = [[[0., 0., 0.], [1., 0., 0.]], [[0., 0., 0.], [0., 1.5, 0.]]]
+
+
+def run_client(socket_path, received):
+    """Run a fake NWChem client, which returns the sum of the positions as energy and their negative as forces."""
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    status = 'NEEDINIT'
+    with client:
+        while True:
+            message = ipi_driver.receive_header(client)
+            if message == 'STATUS':
+                ipi_driver.send_header(client, status)
+            elif message == 'INIT':
+                _, length = ipi_driver.receive_values(client, 'i', 2)
+                ipi_driver.receive_exactly(client, length)
+                status = 'READY'
+            elif message == 'POSDATA':
+                cell = ipi_driver.receive_values(client, 'd', 9)
+                inverse = ipi_driver.receive_values(client, 'd', 9)
+                (natoms,) = ipi_driver.receive_values(client, 'i')
+                positions = ipi_driver.receive_values(client, 'd', 3 * natoms)
+                received.append({'cell': cell, 'inverse': inverse, 'positions': positions})
+                status = 'HAVEDATA'
+            elif message == 'GETFORCE':
+                positions = received[-1]['positions']
+                ipi_driver.send_header(client, 'FORCEREADY')
+                client.sendall(struct.pack('d', sum(positions)))
+                client.sendall(struct.pack('i', len(positions) // 3))
+                client.sendall(struct.pack(f'{len(positions)}d', *[-value for value in positions]))
+                client.sendall(struct.pack('9d', *[0.] * 9) + struct.pack('i', 0))
+                status = 'READY'
+            elif message == 'EXIT':
+                return
+
+
+def test_invert_matrix():
+    """Test the inverse of the cell, which is zero for the singular cell of a molecule."""
+    np.testing.assert_allclose(ipi_driver.invert_matrix(CELL), np.linalg.inv(CELL))
+    assert ipi_driver.invert_matrix([[0.] * 3] * 3) == [[0.] * 3] * 3
+
+
+def test_driver_main(tmp_path):
+    """Test that the driver sends the geometries in the i-PI convention and writes the results of each step."""
+    socket_name = f'test_{uuid.uuid4().hex[:8]}'
+    geometries_file = tmp_path / 'geometries.json'
+    steps_file = tmp_path / 'aiida.steps'
+    geometries_file.write_text(json.dumps([{'cell': CELL, 'positions': positions} for positions in POSITIONS]))
+
+    received = []
+    client = threading.Thread(target=run_client, args=(f'/tmp/ipi_{socket_name}', received))
+    client.start()
+    ipi_driver.main(geometries_file, socket_name, steps_file, timeout=10)
+    client.join(10)
+
+    cell = np.array(CELL) * ipi_driver.ANGSTROM_TO_BOHR
+    assert len(received) == 2
+    # i-PI sends the transpose of the matrix with the lattice vectors as columns and the transpose of its inverse
+    np.testing.assert_allclose(np.reshape(received[0]['cell'], (3, 3)), cell)
+    np.testing.assert_allclose(np.reshape(received[0]['inverse'], (3, 3)), np.linalg.inv(cell))
+
+    steps = [json.loads(line) for line in steps_file.read_text().splitlines()]
+    assert [step['step'] for step in steps] == [0, 1]
+    assert steps[1]['energy'] == pytest.approx(1.5 * ipi_driver.ANGSTROM_TO_BOHR)
+    np.testing.assert_allclose(steps[1]['forces'], -np.array(POSITIONS[1]) * ipi_driver.ANGSTROM_TO_BOHR)
+
+
+def test_driver_main_timeout(tmp_path):
+    """Test that the driver exits with an error if the client does not connect."""
+    geometries_file = tmp_path / 'geometries.json'
+    geometries_file.write_text(json.dumps([{'cell': CELL, 'positions': POSITIONS[0]}]))
+
+    with pytest.raises(SystemExit, match='did not connect'):
+        ipi_driver.main(geometries_file, f'test_{uuid.uuid4().hex[:8]}', tmp_path / 'aiida.steps', timeout=0.1)
+
+
+@pytest.mark.parametrize('num_steps, exit_status', ((2, 0), (1, 320)))
+def test_driver_parser(aiida_localhost, num_steps, exit_status):
+    """Test that the steps file is split into the energies and forces of the steps of the output trajectory."""
+    trajectory = orm.TrajectoryData()
+    trajectory.set_trajectory(symbols=['H', 'H'], positions=np.array(POSITIONS))
+    trajectory.store()
+
+    node = orm.CalcJobNode(computer=aiida_localhost, process_type='aiida.calculations:nwchem.driver')
+    node.set_option('resources', {'num_machines': 1})
+    node.base.links.add_incoming(trajectory, LinkType.INPUT_CALC, 'trajectory')
+    node.store()
+
+    steps = [{'step': step, 'energy': -1. - step, 'forces': [[0., 0., 0.1 * step]] * 2} for step in range(num_steps)]
+    retrieved = orm.FolderData()
+    retrieved.base.repository.put_object_from_bytes(
+        ''.join(json.dumps(step) + '\n' for step in steps).encode('utf-8'), 'aiida.steps'
+    )
+    retrieved.base.links.add_incoming(node, LinkType.CREATE, 'retrieved')
+    retrieved.store()
+
+    results, calcfunction = ParserFactory('nwchem.driver').parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.exit_status == exit_status
+    assert results['output_parameters']['number_of_steps'] == num_steps
+    np.testing.assert_allclose(results['output_trajectory'].get_array('energies'), [-1., -2.][:num_steps])
+    assert results['output_trajectory'].get_array('forces').shape == (num_steps, 2, 3)
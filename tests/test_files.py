@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.files` module."""
+from aiida.common.links import validate_link_label
+import numpy as np
+import pytest
+
+from aiida_nwchem.utils import files
+from aiida_nwchem.utils.files import get_file_parser, get_output_label, parse_cube, parse_hessian
+
+
+def test_parse_hessian(tmp_path):
+    """Test that the lower triangle of the Hessian is expanded into the full, symmetric matrix."""
+    filepath = tmp_path / 'aiida.hess'
+    filepath.write_text('  0.1000000000000000D+01\n -0.2000000000000000D+00\n  0.3000000000000000D+01\n')
+
+    assert get_file_parser(filepath.name) == ('hessian', parse_hessian)
+    assert get_output_label(filepath.name) == 'aiida_hess'
+    assert np.allclose(parse_hessian(filepath)['hessian'], [[1., -0.2], [-0.2, 3.]])
+
+    filepath.write_text('1.0 2.0\n')
+    with pytest.raises(ValueError):
+        parse_hessian(filepath)
+
+
+@pytest.mark.parametrize(
+    'filename, label', (
+        ('aiida.hess', 'aiida_hess'),
+        ('1.hess', 'file_1_hess'),
+        ('.movecs', 'movecs'),
+        ('a..b', 'a_b'),
+        ('_density__total_.cube', 'density_total_cube'),
+    )
+)
+def test_get_output_label(filename, label):
+    """Test that the label of an auxiliary file is a valid link label."""
+    assert get_output_label(filename) == label
+    validate_link_label(label)
+
+
+def test_parse_cube(tmp_path, monkeypatch):
+    """Test that the grid of a cube file is cropped and downsampled while it is read in chunks."""
+    grid = np.arange(4 * 3 * 5, dtype=np.float64).reshape(4, 3, 5)
+    lines = ['density', 'comment', '1 -1.0 0.0 0.0', '4 0.5 0.0 0.0', '3 0.0 0.5 0.0', '5 0.0 0.0 0.5']
+    lines.append('1 1.0 0.0 0.0 0.0')
+    lines.extend(' '.join(f'{value:.5E}' for value in row) for row in grid.reshape(-1, 5))
+    filepath = tmp_path / 'density.cube'
+    filepath.write_text('\n'.join(lines) + '\n')
+
+    monkeypatch.setattr(files, 'CUBE_CHUNK_SIZE', 16)
+    assert np.allclose(parse_cube(filepath)['grid'], grid)
+
+    result = parse_cube(filepath, stride=2, region=[[1, 4], [0, 3], [1, 5]])
+    assert np.allclose(result['grid'], grid[1:4:2, 0:3:2, 1:5:2])
+    assert np.allclose(result['origin'], np.array([-0.5, 0., 0.5]) * files.BOHR_TO_ANGSTROM)
+    assert np.allclose(result['voxel'], np.eye(3) * files.BOHR_TO_ANGSTROM)
+    assert result['atomic_numbers'].tolist() == [1]
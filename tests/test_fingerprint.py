@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.fingerprint` module."""
+from aiida import orm
+
+from aiida_nwchem.utils.fingerprint import canonicalize_structure, get_canonical_structure, get_input_fingerprint
+
+
+def test_fingerprint_site_order(h2o):
+    """Test that the fingerprint does not depend on the order of the sites or on numerical noise."""
+    shuffled = orm.StructureData(cell=h2o.cell, pbc=h2o.pbc)
+    for kind in reversed(h2o.kinds):
+        shuffled.append_kind(kind)
+    for site in reversed(h2o.sites):
+        shuffled.append_site(orm.Site(kind_name=site.kind_name, position=[x + 1e-9 for x in site.position]))
+
+    parameters = {'task': 'dft', 'basis': {'H': 'library sto-3g', 'O': 'library sto-3g'}}
+    reordered = {'basis': {'O': 'library sto-3g', 'H': 'library sto-3g'}, 'task': 'dft'}
+
+    assert get_input_fingerprint(parameters, h2o) == get_input_fingerprint(reordered, shuffled)
+    assert get_input_fingerprint(parameters, h2o) != get_input_fingerprint(parameters, h2o, add_cell=True)
+    canonical = get_canonical_structure(h2o).store()
+    canonical_shuffled = get_canonical_structure(shuffled).store()
+    assert canonical.base.caching.get_hash() == canonical_shuffled.base.caching.get_hash()
+
+
+def test_canonicalize_structure(h2o):
+    """Test that the outputs of ``canonicalize_structure`` for the same structure have the same hash."""
+    first = canonicalize_structure(h2o)
+    second = canonicalize_structure(h2o)
+    assert first.uuid != second.uuid
+    assert first.base.caching.get_hash() == second.base.caching.get_hash()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tests for the time it takes to import the modules of the plugin."""
+import subprocess
+import sys
+
+# Modules that are loaded for every calculation, parser and workchain of the plugin
+PLUGIN_MODULES = (
+    'aiida_nwchem.calculations',
+    'aiida_nwchem.parsers.nwchem',
+    'aiida_nwchem.parsers.driver',
+    'aiida_nwchem.workflows.base',
+    'aiida_nwchem.workflows.scaling',
+)
+
+# Modules that are only needed to create certain outputs or inputs and should be imported when they are used
+DEFERRED_MODULES = ('ase', 'spglib')
+
+# Maximum time in seconds to import the plugin once ``aiida-core`` itself is imported
+IMPORT_TIME_THRESHOLD = 0.2
+
+MARKER = 'aiida-nwchem-import-start'
+
+SCRIPT = f"""
+import sys
+import aiida.engine, aiida.orm, aiida.parsers
+print('{MARKER}', file=sys.stderr, flush=True)
+import {', '.join(PLUGIN_MODULES)}
+print(','.join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))
+"""
+
+
+def get_import_times():
+    """Import the plugin in a fresh interpreter with ``-X importtime``.
+
+    :return: tuple of the total self time in seconds of the modules imported for the plugin, after those of
+        ``aiida-core``, and the deferred modules that were imported nonetheless.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', SCRIPT],
+                            capture_output=True,
+                            check=True,
+                            text=True)
+    lines = result.stderr.splitlines()
+    lines = lines[lines.index(MARKER) + 1:]
+
+    total = 0
+    for line in lines:
+        if line.startswith('import time:') and '|' in line:
+            self_time = line.split(':', 1)[1].split('|')[0].strip()
+            if self_time.isdigit():
+                total += int(self_time)
+
+    return total * 1e-6, [name for name in result.stdout.strip().split(',') if name]
+
+
+def test_import_time():
+    """Test that importing the plugin is fast and does not import modules that are only needed occasionally."""
+    total, imported = get_import_times()
+    assert not imported, f'importing the plugin imports {imported}'
+    assert total < IMPORT_TIME_THRESHOLD, f'importing the plugin took {total:.3f} s'
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.nwpw` module."""
+from aiida import orm
+from ase.build import bulk
+
+from aiida_nwchem.utils.nwpw import get_cutoffs
+
+
+def test_get_cutoffs():
+    """Test that the largest cutoff of the elements in the structure is selected."""
+    structure = orm.StructureData(ase=bulk('MgO', 'rocksalt', a=4.2))
+    assert get_cutoffs(structure, {'Mg': 35, 'O': 45, 'F': 60}) == {'wavefunction_cutoff': 45., 'density_cutoff': 90.}
+    assert get_cutoffs(structure, {'Mg': 20, 'O': 25})['wavefunction_cutoff'] == 25.
+    assert get_cutoffs(structure, {})['wavefunction_cutoff'] == 30.
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.optimization` module."""
+import types
+
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.plugins import ParserFactory
+from aiida.transports.plugins.local import LocalTransport
+import numpy as np
+import pytest
+
+from aiida_nwchem.utils.optimization import (
+    EXTRA_OPTIMIZATION_STATUS,
+    analyze_optimization,
+    monitor_optimization,
+    parse_optimization_table,
+)
+
+
+def get_table_lines(energies, gradients):
+    """Return the lines of the table of the steps of an optimization with the given energies and maximum gradients."""
+    lines = []
+    for step, (energy, gradient) in enumerate(zip(energies, gradients)):
+        lines.extend([
+            '@ Step       Energy      Delta E   Gmax     Grms     Xrms     Xmax   Walltime',
+            '@ ---- ---------------- -------- -------- -------- -------- -------- --------',
+            f'@ {step:4d} {energy:16.8f}  0.0E+00 {gradient:8.5f}  0.00100  0.00100  0.00100 {step:8.1f}',
+        ])
+    return lines
+
+
+def test_parse_optimization_table():
+    """Test that the table contains one row per step, where a step that is printed again replaces the first one."""
+    lines = get_table_lines([-1.0, -1.5], [0.1, 0.05])
+    lines.append('@    1      -1.50000000 -5.0D-01  0.00010  0.00006  0.00030  0.00040      2.0')
+    table = parse_optimization_table(lines)
+
+    assert table.shape == (2, 8)
+    np.testing.assert_allclose(table[1], [1, -1.5, -0.5, 0.0001, 0.00006, 0.0003, 0.0004, 2.0])
+    assert parse_optimization_table(lines[:2]).shape == (0, 8)
+
+
+@pytest.mark.parametrize(
+    'energies, gradients, status', (
+        ([-1.0, -1.1, -1.2, -1.25, -1.27, -1.28], [0.1, 0.08, 0.06, 0.04, 0.02, 0.01], 'converging'),
+        ([-1.0, -1.1, -1.0, -1.1, -1.0, -1.1], [0.1] * 6, 'oscillating'),
+        ([-1.0, -1.0, -1.0, -1.0, -1.0, -1.0], [0.1, 0.1, 0.09, 0.1, 0.1, 0.1], 'stagnating'),
+        ([-1.0, -1.0, -1.0], [0.1] * 3, 'converging'),
+    )
+)
+def test_analyze_optimization(energies, gradients, status):
+    """Test the detection of oscillating and stagnating optimizations."""
+    analysis = analyze_optimization(parse_optimization_table(get_table_lines(energies, gradients)))
+    assert analysis['status'] == status
+    assert analysis['num_steps'] == len(energies)
+
+
+def test_monitor_optimization(tmp_path):
+    """Test that the monitor reads the table from the output on the remote and stops oscillating optimizations."""
+
+    extras = {}
+
+    class Node:  # pylint: disable=too-few-public-methods
+        """Node of a running calculation in ``tmp_path``."""
+
+        base = types.SimpleNamespace(extras=types.SimpleNamespace(set=extras.__setitem__))
+
+        @staticmethod
+        def get_option(name):
+            return {'output_filename': 'aiida.out'}[name]
+
+        @staticmethod
+        def get_remote_workdir():
+            return str(tmp_path)
+
+    filepath = tmp_path / 'aiida.out'
+    with LocalTransport() as transport:
+        filepath.write_text('\n'.join(get_table_lines([-1.0, -1.1, -1.2], [0.1] * 3)))
+        assert monitor_optimization(Node(), transport) is None
+        assert not extras
+
+        filepath.write_text('\n'.join(get_table_lines([-1.0, -1.1, -1.0, -1.1, -1.0, -1.1], [0.1] * 6)))
+        result = monitor_optimization(Node(), transport)
+        assert 'oscillating' in result.message
+        assert not result.override_exit_code
+        assert extras == {EXTRA_OPTIMIZATION_STATUS: 'oscillating'}
+
+
+@pytest.mark.parametrize('status, exit_status', ((None, 341), ('stagnating', 344)))
+def test_parse_monitored_optimization(aiida_localhost, filepath_data, status, exit_status):
+    """Test that the parser fails an optimization with the status for which the monitor killed it."""
+    node = orm.CalcJobNode(computer=aiida_localhost, process_type='aiida.calculations:nwchem.nwchem')
+    node.set_option('resources', {'num_machines': 1})
+    node.set_option('output_filename', 'aiida.out')
+    node.store()
+    if status is not None:
+        node.base.extras.set(EXTRA_OPTIMIZATION_STATUS, status)
+
+    retrieved = orm.FolderData()
+    retrieved.base.repository.put_object_from_file(
+        filepath_data / 'outputs' / 'dft_optimize_interrupted.out', 'aiida.out'
+    )
+    retrieved.base.links.add_incoming(node, LinkType.CREATE, 'retrieved')
+    retrieved.store()
+
+    results, calcfunction = ParserFactory('nwchem.nwchem').parse_from_node(node, store_provenance=False)
+
+    assert calcfunction.exit_status == exit_status
+    assert results['output_parameters']['convergence']['status'] == (status or 'converging')
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""Regression tests of the scanning of output files, which do not need the ``nwchem`` executable.
+
+The outputs in ``tests/data/outputs`` cover every task and theory that is parsed and the known failures. They are
+synthetic: they were written by hand after the format of NWChem 7.0.2, since NWChem cannot be run here, and only
+contain the sections that are parsed, so they should be replaced by outputs of real runs where these are available.
+Large outputs are generated by repeating parts of them. The results of scanning each output are compared to the golden
+results in ``tests/test_outputs``, which are regenerated with ``pytest --force-regen`` after an intended change of the
+parser.
+
+Each output also has a threshold for the time it takes to scan it, as a multiple of the time it takes to scan the
+small ``REFERENCE_OUTPUT`` on the same machine, such that changes of the parser can be checked offline for speed. The
+timing tests can be deselected with ``pytest -k "not timing"``.
+"""
+import pathlib
+import re
+import time
+
+import numpy as np
+import pytest
+
+from aiida_nwchem.parsers.nwchem import scan_output
+
+FILEPATH_OUTPUTS = pathlib.Path(__file__).parent / 'data' / 'outputs'
+
+# Arrays with more elements than this are compared by their shape, the sum of their absolute values and first elements
+MAX_ARRAY_SIZE = 64
+
+# Maximum time to scan an output relative to the time to scan the reference output, with a default for small outputs.
+# They are about three times the measured ratios of roughly 410, 210 and 50 for the large outputs, and at most 11 for
+# the small ones, such that a slowdown of the parser by a factor of three fails the tests.
+REFERENCE_OUTPUT = 'scf_energy'
+TIMING_THRESHOLDS = {
+    'dft_freq_large': 1200.,
+    'dft_optimize_large': 650.,
+    'nwpw_pspw_large': 150.,
+}
+DEFAULT_TIMING_THRESHOLD = 30.
+
+
+def generate_dft_freq_large(num_atoms=150):
+    """Return a frequency calculation with ``num_atoms`` atoms, with the tables of the one of water."""
+    lines = (FILEPATH_OUTPUTS / 'dft_freq.out').read_text().splitlines()
+    rng = np.random.default_rng(0)
+    num_modes = 3 * num_atoms
+    frequencies = np.concatenate([np.zeros(6), np.sort(rng.uniform(100., 3500., num_modes - 6))])
+
+    generated = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if re.match(r'^\s*\((Projected )?Frequencies expressed in cm-1\)$', line):
+            # Replace the blocks of the normal modes up to the tables of the dipoles and intensities
+            generated.append(line)
+            label = 'P.Frequency' if 'Projected' in line else 'Frequency'
+            modes = np.round(rng.uniform(-1., 1., (num_modes, num_modes)), 5)
+            for start in range(0, num_modes, 6):
+                columns = range(start, min(start + 6, num_modes))
+                generated.extend(['', '              ' + ''.join(f'{column + 1:12d}' for column in columns), ' '])
+                generated.append(f' {label:<12s}' + ''.join(f'{frequencies[column]:12.2f}' for column in columns))
+                generated.append(' ')
+                for row in range(num_modes):
+                    generated.append(f'{row + 1:12d} ' + ''.join(f'{modes[row, column]:12.5f}' for column in columns))
+            while not lines[index].startswith(' ------'):
+                index += 1
+        elif re.match(r'^\s+Mode\s+\[cm\*\*-1\]\s+\|\|', line):
+            generated.extend([line, lines[index]])
+            index += 1
+            infrared = '[atomic units]' in line
+            for mode in range(num_modes):
+                values = np.round(rng.uniform(0. if infrared else -1., 1., 4 if infrared else 3), 3)
+                row = f'{mode + 1:6d} {frequencies[mode]:12.3f} ||' + ''.join(f'{value:18.3f}' for value in values)
+                generated.append(row)
+            while re.match(r'^\s+\d+\s+[\-\d\.]+\s+\|\|', lines[index]):
+                index += 1
+        else:
+            generated.append(line)
+
+    return '\n'.join(generated) + '\n'
+
+
+def generate_dft_optimize_large(num_steps=250):
+    """Return a converged geometry optimization with ``num_steps`` steps, by repeating a step of a recorded one."""
+    lines = (FILEPATH_OUTPUTS / 'dft_optimize.out').read_text().splitlines()
+    first = lines.index('          Step   1') - 1
+    last = next(index for index, line in enumerate(lines) if line.startswith('@    1 '))
+    converged = lines.index('      Optimization converged') - 1
+    final = next(index for index, line in enumerate(lines) if line.startswith('@    3 ') and index > converged)
+
+    generated = lines[:first]
+    energies = -74.96590012 + 0.2 * np.exp(-np.arange(num_steps + 1) / 20.)
+    for step in range(1, num_steps + 1):
+        for line in lines[first:last + 1]:
+            if line == '          Step   1':
+                line = f'          Step {step:3d}'
+            elif line.startswith('@    1 '):
+                line = (
+                    f'@ {step:4d} {energies[step]:16.8f} {energies[step] - energies[step - 1]:8.1E}  0.01406  0.01213'
+                    f'  0.00300  0.00300 {step * 0.5:8.1f}'
+                )
+            generated.append(line)
+    generated.extend(lines[converged:final])
+    generated.append(f'@ {num_steps:4d} {energies[-1]:16.8f} -2.4D-05  0.00010  0.00006  0.00030  0.00040      2.0')
+    generated.extend(lines[final + 1:])
+
+    return '\n'.join(generated) + '\n'
+
+
+def generate_nwpw_pspw_large(num_atoms=500, num_steps=10):
+    """Return a PSPW calculation with the tables of the positions and forces of ``num_atoms`` atoms in each step."""
+    lines = (FILEPATH_OUTPUTS / 'nwpw_pspw.out').read_text().splitlines()
+    first = lines.index(' position of ions:')
+    last = next(index for index, line in enumerate(lines) if line.strip().startswith('C.O.M.'))
+    rng = np.random.default_rng(0)
+
+    generated = lines[:first]
+    for _ in range(num_steps):
+        positions = rng.uniform(-10., 10., (num_atoms, 3))
+        forces = rng.uniform(-0.1, 0.1, (num_atoms, 3))
+        generated.append(' position of ions:')
+        for index, position in enumerate(positions):
+            coordinates = ' '.join(f'{coordinate:10.5f}' for coordinate in position)
+            generated.append(f'{index + 1:9d} Si    ( {coordinates} ) - atomic mass=  27.977')
+        generated.append(' ion forces (au):')
+        for index, force in enumerate(forces):
+            generated.append(f'{index + 1:9d} Si    ( {force[0]:10.5f} {force[1]:10.5f} {force[2]:10.5f} )')
+        generated.append(lines[last])
+    generated.extend(lines[last + 1:])
+
+    return '\n'.join(generated) + '\n'
+
+
+GENERATED_OUTPUTS = {
+    'dft_freq_large': generate_dft_freq_large,
+    'dft_optimize_large': generate_dft_optimize_large,
+    'nwpw_pspw_large': generate_nwpw_pspw_large,
+}
+
+
+def serialize_array(array):
+    """Return an array as nested lists, or a summary of it if it has more than ``MAX_ARRAY_SIZE`` elements."""
+    if array.size <= MAX_ARRAY_SIZE:
+        return serialize(array.tolist())
+    return {
+        'shape': list(array.shape),
+        'abs_sum': serialize(np.nansum(np.abs(array))),
+        'head': serialize(array.ravel()[:6].tolist()),
+    }
+
+
+def serialize(value):
+    """Return the results of scanning an output in a form that can be stored and compared as golden results."""
+    if isinstance(value, dict):
+        return {key: serialize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [serialize(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return serialize_array(value)
+    if isinstance(value, (float, np.floating)):
+        # Round to ten significant digits, such that the order of sums does not matter
+        return float(f'{value:.10g}')
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def get_scan_time(content, repeats):
+    """Return the shortest of ``repeats`` times it takes to scan the content of an output."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scan_output(content)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.fixture(name='reference_time')
+def fixture_reference_time():
+    """Return the time it takes to scan the reference output on this machine, measured just before each test."""
+    return get_scan_time((FILEPATH_OUTPUTS / f'{REFERENCE_OUTPUT}.out').read_text(), repeats=20)
+
+
+OUTPUTS = sorted([filepath.stem for filepath in FILEPATH_OUTPUTS.glob('*.out')] + list(GENERATED_OUTPUTS))
+
+
+@pytest.fixture(name='output', params=OUTPUTS)
+def fixture_output(request):
+    """Return the name and content of each output of the corpus."""
+    name = request.param
+    if name in GENERATED_OUTPUTS:
+        return name, GENERATED_OUTPUTS[name]()
+    return name, (FILEPATH_OUTPUTS / f'{name}.out').read_text()
+
+
+def test_scan_output(output, data_regression):
+    """Test the results of scanning the outputs against their golden results."""
+    name, content = output
+    exit_code_label, exit_code_kwargs, results = scan_output(content)
+
+    data_regression.check(
+        serialize({
+            'exit_code_label': exit_code_label,
+            'exit_code_kwargs': exit_code_kwargs,
+            'results': results,
+        }),
+        basename=f'test_scan_output_{name}',
+    )
+
+
+def test_scan_output_timing(output, reference_time):
+    """Test the time it takes to scan the outputs relative to the reference output."""
+    name, content = output
+    elapsed = get_scan_time(content, repeats=3)
+    assert elapsed < TIMING_THRESHOLDS.get(name, DEFAULT_TIMING_THRESHOLD) * reference_time
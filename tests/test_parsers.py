@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.parsers.nwchem` module."""
+import asyncio
+import concurrent.futures
+
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.plugins import ParserFactory
+import numpy as np
+from plumpy.greenback_bridge import run_with_portal
+import pytest
+
+from aiida_nwchem.parsers.nwchem import NwchemOutputScanner, NwpwForceTables, get_process_pool, scan_output, wait_for
+
+FORCE_TABLE = """ position of ions:
+        1 O     (    0.00000    0.00000    0.00000 ) - atomic mass=  15.995
+        2 H     (    0.00000    1.43043   -1.10716 ) - atomic mass=   1.008
+ ion forces (au):
+        1 O     (   -0.00000   -0.00000    0.01584 )
+        2 H     (    0.00000   -0.00112   {} )
+      C.O.M.    (   -0.00000   -0.00000   -0.00000 )
+"""
+
+
+def test_nwpw_force_tables():
+    """Test that only the rows of the force tables are parsed, separately for each table."""
+    lines = (FORCE_TABLE.format('-0.00792') + FORCE_TABLE.format('-0.00100')).splitlines()
+    force_tables = NwpwForceTables()
+    consumed = [force_tables.feed(line) for line in lines]
+    results = force_tables.get_results()
+
+    assert consumed.count(True) == 6
+    assert results['forces'].dtype == np.float64
+    np.testing.assert_allclose(results['forces'], [[0., 0., 0.01584], [0., -0.00112, -0.001]])
+    assert results['forces_steps'].shape == (2, 2, 3)
+    assert results['forces_steps'][0, 1, 2] == -0.00792
+
+
+def test_parse_normal_modes():
+    """Test that the blocks of the table of normal modes are combined into a single array, with mode j in column j."""
+    modes = np.arange(1, 82, dtype=np.float64).reshape(9, 9) / 100
+    lines = [
+        '          NORMAL MODE EIGENVECTORS IN CARTESIAN COORDINATES',
+        '          -------------------------------------------------',
+        '                 (Projected Frequencies expressed in cm-1)',
+    ]
+    for columns in (range(6), range(6, 9)):
+        lines.extend(['', ''.join(f'{column + 1:12d}' for column in columns), ' '])
+        lines.extend([' P.Frequency ' + '        0.00' * len(columns), ' '])
+        for row in range(9):
+            lines.append(f'{row + 1:12d} ' + ''.join(f'{modes[row, column]:12.5f}' for column in columns))
+    lines.extend(['', ' ----------------------------------------------------------------------------'])
+
+    assert np.allclose(NwchemOutputScanner.parse_normal_modes(lines), modes)
+    assert NwchemOutputScanner.parse_normal_modes(lines[3:]) is None
+
+
+@pytest.mark.parametrize(
+    'error, exit_code_label', (
+        ('dft_scf: Calculation failed to converge 0', 'ERROR_SCF_NOT_CONVERGED'),
+        ('rohf_nr_solve: failed to converge 0', 'ERROR_SCF_NOT_CONVERGED'),
+        ('tce_energy: CCSD iterations not converged 0', 'ERROR_NWCHEM'),
+        ('int_init: cannot locate basis for geometry 0', 'ERROR_BASIS_NOT_FOUND'),
+        ('bas_tag_lib: no such basis available 0', 'ERROR_BASIS_NOT_FOUND'),
+        ('geom_check_distances: atoms too close 1', 'ERROR_GEOMETRY'),
+        ('ga_create: failed to allocate memory 12345678', 'ERROR_GA_MEMORY'),
+        ('eaf_write: failed 0', 'ERROR_DISK_FULL'),
+        ('task_optimize: failed 0', 'ERROR_GEOMETRY_OPTIMIZATION_NOT_CONVERGED'),
+        ('something odd happened 3', 'ERROR_NWCHEM'),
+    )
+)
+def test_get_error_exit_code(error, exit_code_label):
+    """Test that errors are classified by the routine that reported them, not by words that appear in them."""
+    error_dict = {'error': error, 'explanation': 'This error has not yet been assigned to a category'}
+    assert NwchemOutputScanner().get_error_exit_code(error_dict)[0] == exit_code_label
+
+
+def test_wait_for():
+    """Test that the result of a future is returned without a portal to the event loop."""
+    future = concurrent.futures.Future()
+    future.set_result('scanned')
+    assert wait_for(future) == 'scanned'
+
+
+def test_wait_for_portal():
+    """Test that the event loop keeps running while waiting through a portal, since it resolves the future itself."""
+    future = concurrent.futures.Future()
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, future.set_result, 'scanned')
+        return await run_with_portal(wait_for, future)
+
+    assert asyncio.run(asyncio.wait_for(main(), timeout=10)) == 'scanned'
+
+
+@pytest.mark.parametrize('name', ('dft_freq', 'dft_optimize_interrupted', 'unknown_error'))
+def test_scan_output_in_subprocess(filepath_data, name):
+    """Test that scanning an output in the process pool gives the same results as in the current process."""
+    content = (filepath_data / 'outputs' / f'{name}.out').read_text()
+    np.testing.assert_equal(get_process_pool().submit(scan_output, content).result(), scan_output(content))
+
+
+def test_parse_in_subprocess(aiida_localhost, filepath_data):
+    """Test that the outputs of the parser are the same with and without the ``parse_in_subprocess`` option."""
+    outputs = []
+    for parse_in_subprocess in (False, True):
+        node = orm.CalcJobNode(computer=aiida_localhost, process_type='aiida.calculations:nwchem.nwchem')
+        node.set_option('resources', {'num_machines': 1})
+        node.set_option('output_filename', 'aiida.out')
+        node.set_option('parse_in_subprocess', parse_in_subprocess)
+        node.store()
+
+        retrieved = orm.FolderData()
+        retrieved.base.repository.put_object_from_file(filepath_data / 'outputs' / 'dft_freq.out', 'aiida.out')
+        retrieved.base.links.add_incoming(node, LinkType.CREATE, 'retrieved')
+        retrieved.store()
+
+        results, calcfunction = ParserFactory('nwchem.nwchem').parse_from_node(node, store_provenance=False)
+        assert calcfunction.is_finished_ok
+        arrays = results['output_arrays']
+        outputs.append({
+            'output_parameters': results['output_parameters'].get_dict(),
+            'output_arrays': {name: arrays.get_array(name) for name in arrays.get_arraynames()},
+        })
+
+    np.testing.assert_equal(outputs[1], outputs[0])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.restart` module."""
+import pytest
+
+from aiida_nwchem.utils.restart import get_restart_files, validate_restart_policy
+
+ENTRIES = [
+    ('aiida.db', 10),
+    ('aiida.movecs', 100),
+    ('aiida.t1amp.0001', 5 * 1024**2),
+    ('aiida.movecs.bak', 100),
+    ('notes.dbx', 10),
+]
+
+
+def test_get_restart_files():
+    """Test the selection of restart files and the transfer action of each."""
+    restart_files = get_restart_files(ENTRIES, {'link': 'hardlink', 'exclude': ['t2amp']}, same_computer=True)
+    assert {entry.name: entry.action for entry in restart_files} == {
+        'aiida.db': 'copy',
+        'aiida.movecs': 'hardlink',
+        'aiida.t1amp.0001': 'hardlink',
+    }
+
+    restart_files = get_restart_files(ENTRIES, {'include': ['db', 't1amp'], 'max_size': 1}, same_computer=False)
+    assert {entry.name: entry.action for entry in restart_files} == {'aiida.db': 'copy', 'aiida.t1amp.0001': 'skip'}
+
+
+VALID_POLICIES = [{}, {'include': ['db'], 'max_size': 10, 'link': 'copy', 'checksums': True}]
+INVALID_POLICIES = [{'link': 'rsync'}, {'max_size': -1}, {'include': 'db'}, {'unknown': True}]
+
+
+@pytest.mark.parametrize('policy', VALID_POLICIES)
+def test_validate_restart_policy(policy):
+    """Test that a valid restart-transfer policy passes the validation."""
+    assert validate_restart_policy(policy) is None
+
+
+@pytest.mark.parametrize('policy', INVALID_POLICIES)
+def test_validate_restart_policy_invalid(policy):
+    """Test that an invalid restart-transfer policy returns an error message."""
+    assert isinstance(validate_restart_policy(policy), str)
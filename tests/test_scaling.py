@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.scaling` module."""
+import pytest
+
+from aiida_nwchem.utils.scaling import fit_scaling
+
+
+def test_fit_scaling():
+    """Test the fit of Amdahl's law and the recommended number of processes."""
+    num_mpiprocs = [8, 1, 4, 2, 16]
+    wall_times = [2. + 40. / num for num in num_mpiprocs]
+    result = fit_scaling(num_mpiprocs, wall_times, efficiency_threshold=0.7)
+
+    assert result['num_mpiprocs'] == [1, 2, 4, 8, 16]
+    assert result['serial_time'] == pytest.approx(2.)
+    assert result['parallel_time'] == pytest.approx(40.)
+    assert result['efficiencies'][3] == pytest.approx(0.75)
+    assert result['recommended_num_mpiprocs'] == 8
+
+
+def test_fit_scaling_noise():
+    """Test that the recommendation follows the fitted model rather than the benchmark with the most noise."""
+    num_mpiprocs = [1, 2, 4, 8, 16]
+    wall_times = [42., 22., 12., 5.5, 4.5]
+    result = fit_scaling(num_mpiprocs, wall_times, efficiency_threshold=0.9)
+
+    # The benchmark with 8 processes was lucky, with an efficiency above the threshold
+    assert result['efficiencies'][3] > 0.9
+    assert result['model_efficiencies'][3] < 0.9
+    assert result['recommended_num_mpiprocs'] == 4
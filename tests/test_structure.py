@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.structure` module."""
+import numpy as np
+import pytest
+
+from aiida_nwchem.utils.structure import create_structure, get_kinds, get_symbol
+
+
+@pytest.mark.parametrize(('tag', 'symbol'), (
+    ('O', 'O'),
+    ('H1', 'H'),
+    ('Ca2', 'Ca'),
+    ('CA', 'Ca'),
+    ('Co_a', 'Co'),
+    ('Cx', 'C'),
+    ('bq', 'X'),
+    ('1', 'X'),
+))
+def test_get_symbol(tag, symbol):
+    """Test that the element of a tag is determined as by NWChem."""
+    assert get_symbol(tag) == symbol
+
+
+def test_create_structure(h2o):
+    """Test that the output structure keeps the kinds, cell and periodic boundary conditions of the input."""
+    tags = [site.kind_name for site in h2o.sites]
+    positions = np.array([site.position for site in h2o.sites]) + 0.1
+    kinds = get_kinds(tags, h2o)
+    structure = create_structure(kinds, tags, positions, h2o.cell, h2o.pbc)
+
+    assert [kind.get_raw() for kind in structure.kinds] == [kind.get_raw() for kind in h2o.kinds]
+    assert structure.pbc == h2o.pbc
+    assert np.allclose(structure.cell, h2o.cell)
+    assert np.allclose([site.position for site in structure.sites], positions)
+    structure.store()
+
+
+def test_create_structure_without_reference():
+    """Test that kinds are created from the tags if they do not match the input structure."""
+    tags = ['O1', 'H', 'H']
+    kinds = get_kinds(tags)
+    structure = create_structure(kinds, tags, np.zeros((3, 3)))
+
+    assert [(kind.name, kind.symbol) for kind in structure.kinds] == [('O1', 'O'), ('H', 'H')]
+    assert structure.pbc == (False, False, False)
+    assert structure.get_formula() == 'H2O'
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.symmetry` module."""
+from aiida import orm
+from ase.build import bulk
+
+from aiida_nwchem.utils.symmetry import get_space_group, parse_point_group
+
+
+def test_get_space_group():
+    """Test the detection of the space group of a crystal."""
+    structure = orm.StructureData(ase=bulk('Si', cubic=True))
+    assert get_space_group(structure, 1e-3) == {'space_group': 'Fd-3m', 'space_group_number': 227}
+
+
+def test_parse_point_group():
+    """Test that the point group of the last geometry in the output is parsed."""
+    lines = [' Group name             C1       ', ' Group number              1', ' Group name             C2v       ']
+    assert parse_point_group(lines) == 'C2v'
+    assert parse_point_group(lines[1:2]) is None
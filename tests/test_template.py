@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.template` module."""
+from aiida_nwchem.utils.template import (
+    get_dplot_block,
+    get_parameter_block,
+    get_unknown_directives,
+    validate_directives,
+    validate_dplot,
+)
+
+
+def test_get_parameter_block():
+    """Test that tasks are written in order, each after its own directives."""
+    task = {'dft': {'xc': 'b3lyp'}, 'task': 'dft energy'}
+    parameters = {'scf': {'thresh': 1e-8}, 'set': {'tce:nts': 'T'}, 'task': ['scf energy', task]}
+    block = get_parameter_block(parameters)
+    assert block == (
+        'scf\n    thresh 1e-08\nend\nset tce:nts T\ntask scf energy\ndft\n    xc b3lyp\nend\ntask dft energy\n'
+    )
+    assert get_parameter_block(dict(parameters)) is block
+
+
+def test_validate_directives():
+    """Test the validation of the directives of known modules."""
+    assert validate_directives({'dft': {'xc': 'b3lyp', 'iterations': 50}, 'nwpw': {'anything': 1}}) is None
+    assert validate_directives({'dft': {'sym': 'off', 'noscf': True, 'cam': '0.33 cam_alpha 0.19'}}) is None
+    assert validate_directives({'task': [{'dft': {'xc': 'b3lyp'}}]}) is not None
+    assert validate_directives({'scf': {'vectors': ['input', 'atomic']}}) is not None
+
+
+def test_get_unknown_directives():
+    """Test that directives that are not known are reported as warnings, also in the list of tasks."""
+    assert not get_unknown_directives({'dft': {'xc': 'b3lyp'}, 'nwpw': {'anything': 1}})
+    warnings = get_unknown_directives({'task': [{'dft': {'xcc': 'b3lyp'}, 'task': 'dft energy'}]})
+    assert len(warnings) == 1 and 'xcc' in warnings[0]
+
+
+def test_get_parameter_block_order():
+    """Test that parameters that only differ in the order of their directives are not rendered from the cache."""
+    first = get_parameter_block({'dft': {'xc': 'b3lyp', 'iterations': 50}, 'task': 'dft energy'})
+    second = get_parameter_block({'dft': {'iterations': 50, 'xc': 'b3lyp'}, 'task': 'dft energy'})
+    assert first.index('xc') < first.index('iterations')
+    assert second.index('iterations') < second.index('xc')
+
+
+def test_get_dplot_block():
+    """Test that each cube file is written by its own ``dplot`` task."""
+    dplot = {'homo': {'limitxyz': [[-3., 3., 10]] * 3, 'orbitals': [5], 'spin': 'total'}}
+    assert validate_dplot(dplot) is None
+    assert get_dplot_block(dplot) == (
+        'dplot\n    title homo\n    limitxyz\n' + '    -3.0 3.0 10\n' * 3 + '    orbitals view; 1; 5\n'
+        '    spin total\n    gaussian\n    output homo.cube\nend\ntask dplot\n'
+    )
+    assert validate_dplot({'homo.cube': {}}) is not None
+    assert validate_dplot({'homo': {'limitxyz': [-3., 3., 10]}}) is not None
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.utils.thermochemistry` module."""
+import numpy as np
+
+from aiida_nwchem.utils.thermochemistry import (
+    BOLTZMANN_HARTREE,
+    HARTREE,
+    get_thermochemistry,
+    get_thermochemistry_from_parameters,
+)
+
+AVOGADRO = 6.02214076e23
+
+
+def test_monatomic():
+    """Test the Sackur-Tetrode entropy and the enthalpy of argon at standard conditions."""
+    result = get_thermochemistry([0.] * 3, [0.] * 3, 39.948, temperatures=[298.15], pressures=[1e5])
+    entropy = result['entropy'][0, 0] * HARTREE * AVOGADRO
+    assert np.isclose(entropy, 154.846, atol=0.01)
+    assert np.isclose(result['enthalpy'][0, 0], 2.5 * BOLTZMANN_HARTREE * 298.15)
+    assert np.isclose(result['heat_capacity'][0, 0], 1.5 * BOLTZMANN_HARTREE)
+    assert result['zero_point_energy'] == 0.
+
+
+def test_batch():
+    """Test that the thermochemistry of molecules with different numbers of modes is computed in one call."""
+    water = {
+        'frequencies': ['0.0'] * 6 + ['1652.3', '3813.4', '3915.2'],
+        'rotational_constants': [27.339733, 14.571766, 9.505543],
+        'molecular_weight': 18.0106,
+        'symmetry_number': 2,
+    }
+    carbon_dioxide = {
+        'frequencies': ['0.0'] * 5 + ['667.0', '667.0', '1333.0', '2349.0'],
+        'rotational_constants': [0., 0.3902, 0.3902],
+        'molecular_weight': 43.9898,
+        'symmetry_number': 2,
+    }
+    ammonia = {
+        'frequencies': ['0.0'] * 6 + ['1022.0', '1691.0', '1691.0', '3506.0', '3577.0', '3577.0'],
+        'rotational_constants': [9.444, 9.444, 6.196],
+        'molecular_weight': 17.0265,
+        'symmetry_number': 3,
+    }
+    temperatures = np.linspace(100., 1000., 10)
+    pressures = [1e4, 1e5, 1e6]
+
+    result = get_thermochemistry_from_parameters([water, carbon_dioxide, ammonia],
+                                                 energies=[-76.4, -188.6, -56.5],
+                                                 temperatures=temperatures,
+                                                 pressures=pressures)
+    assert result['gibbs_free_energy'].shape == (3, 10, 3)
+
+    for index, (molecule, energy) in enumerate(((carbon_dioxide, -188.6), (ammonia, -56.5))):
+        single = get_thermochemistry(
+            np.array(molecule['frequencies'], np.float64),
+            molecule['rotational_constants'],
+            molecule['molecular_weight'],
+            molecule['symmetry_number'],
+            energy=energy,
+            temperatures=temperatures,
+            pressures=pressures,
+        )
+        for key, value in single.items():
+            assert np.allclose(result[key][index + 1], value)
+
+    # Zero-point energy of water in Hartree and decrease of the free energy with the temperature and pressure
+    assert np.isclose(result['zero_point_energy'][0], 0.5 * sum([1652.3, 3813.4, 3915.2]) / 219474.6313632, rtol=1e-6)
+    assert np.all(np.diff(result['gibbs_free_energy'], axis=1) < 0)
+    assert np.all(np.diff(result['gibbs_free_energy'], axis=2) > 0)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :mod:`aiida_nwchem.workflows.base` module."""
+from aiida import orm
+from aiida.common.links import LinkType
+from aiida.engine.utils import instantiate_process
+from aiida.manage import get_manager
+from ase.build import bulk
+import pytest
+
+from aiida_nwchem.calculations.nwchem import NwchemCalculation
+from aiida_nwchem.workflows.base import NwchemBaseWorkChain
+
+BASIS = {'H': 'library sto-3g', 'O': 'library sto-3g'}
+
+
+def get_workchain(computer, structure, parameters, nwchem=None, **inputs):
+    """Return an instance of the work chain for the structure and parameters, of which the ``setup`` was run.
+
+    :param nwchem: additional inputs of the ``nwchem`` namespace.
+    :param inputs: additional inputs of the work chain.
+    """
+    code = orm.InstalledCode(computer=computer, filepath_executable='/usr/bin/nwchem').store()
+    inputs['nwchem'] = {'code': code, 'structure': structure, 'parameters': orm.Dict(parameters), **(nwchem or {})}
+    inputs['nwchem']['metadata'] = {'options': {'resources': {'num_machines': 1}}}
+
+    process = instantiate_process(get_manager().get_runner(), NwchemBaseWorkChain, **inputs)
+    process.setup()
+    return process
+
+
+@pytest.fixture(name='mgo')
+def fixture_mgo():
+    """Return a ``StructureData`` of the primitive cell of rock salt MgO."""
+    return orm.StructureData(ase=bulk('MgO', 'rocksalt', a=4.2))
+
+
+def get_failed_optimization(computer, structure, exit_code):
+    """Return the node of a geometry optimization that failed with the given exit code, with its output structure."""
+    node = orm.CalcJobNode(computer=computer, process_type='aiida.calculations:nwchem.nwchem')
+    node.set_option('resources', {'num_machines': 1})
+    node.set_exit_status(exit_code.status)
+    node.set_exit_message(exit_code.message)
+    node.store()
+
+    output_structure = structure.clone()
+    output_structure.base.links.add_incoming(node, LinkType.CREATE, 'output_structure')
+    output_structure.store()
+    remote_folder = orm.RemoteData(computer=computer, remote_path='/tmp')
+    remote_folder.base.links.add_incoming(node, LinkType.CREATE, 'remote_folder')
+    remote_folder.store()
+
+    return node
+
+
+@pytest.mark.parametrize(
+    'exit_code_label, trust', (
+        ('ERROR_GEOMETRY_OPTIMIZATION_OSCILLATING', 0.15),
+        ('ERROR_GEOMETRY_OPTIMIZATION_STAGNATING', None),
+    )
+)
+def test_handle_geometry_optimization_not_converging(aiida_localhost, h2o, exit_code_label, trust):
+    """Test that a failed optimization is restarted from its output structure without the restart folder."""
+    restart_folder = orm.RemoteData(computer=aiida_localhost, remote_path='/tmp')
+    parameters = {'basis': BASIS, 'task': 'scf optimize'}
+    process = get_workchain(aiida_localhost, h2o, parameters, nwchem={'restart_folder': restart_folder})
+
+    node = get_failed_optimization(aiida_localhost, h2o, getattr(NwchemCalculation.exit_codes, exit_code_label))
+    report = process.handle_geometry_optimization_not_converging(node)
+
+    assert report.do_break
+    assert process.ctx.inputs.structure.uuid == node.outputs.output_structure.uuid
+    assert 'restart_folder' not in process.ctx.inputs
+    assert process.ctx.inputs.parameters.get_dict().get('driver', {}).get('trust', None) == trust
+
+
+@pytest.mark.parametrize('kpoints_distance, mesh', ((0.2, [13, 13, 13]), (0.5, [6, 6, 6])))
+def test_setup_kpoints_distance(aiida_localhost, mgo, kpoints_distance, mesh):
+    """Test that the k-point mesh of a periodic calculation is derived from the distance between k-points."""
+    nwchem = {'add_cell': orm.Bool(True)}
+    distance = orm.Float(kpoints_distance)
+    process = get_workchain(aiida_localhost, mgo, {'task': 'pspw energy'}, nwchem=nwchem, kpoints_distance=distance)
+    assert process.ctx.inputs.kpoints.get_kpoints_mesh() == (mesh, [0., 0., 0.])
+
+
+def test_setup_kpoints_distance_explicit(aiida_localhost, mgo):
+    """Test that the ``kpoints_distance`` is ignored if the ``kpoints`` are given."""
+    kpoints = orm.KpointsData()
+    kpoints.set_kpoints_mesh([2, 2, 2])
+    nwchem = {'add_cell': orm.Bool(True), 'kpoints': kpoints}
+    distance = orm.Float(0.2)
+    process = get_workchain(aiida_localhost, mgo, {'task': 'pspw energy'}, nwchem=nwchem, kpoints_distance=distance)
+    assert process.ctx.inputs.kpoints.uuid == kpoints.uuid
+
+
+@pytest.mark.parametrize('nwpw, cutoff', (({}, 45.), ({'cutoff': 30.}, 30.)))
+def test_setup_cutoff_hints(aiida_localhost, mgo, nwpw, cutoff):
+    """Test that the NWPW cutoff is the largest hint of the elements of the structure, unless it is set explicitly."""
+    hints = orm.Dict({'Mg': 35., 'O': 45., 'F': 60.})
+    process = get_workchain(aiida_localhost, mgo, {'nwpw': nwpw, 'task': 'pspw energy'}, cutoff_hints=hints)
+    assert process.ctx.inputs.parameters['nwpw']['cutoff'] == cutoff